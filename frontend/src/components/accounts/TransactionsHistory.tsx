@@ -13,12 +13,12 @@ import {
   Tooltip,
   Text,
   Center,
-  Pagination,
   Box
 } from "@mantine/core";
 import { DatePickerInput } from "@mantine/dates";
 import { FileDown, AlertCircle, Copy } from "lucide-react";
 import { api } from "../../utils/api/axios";
+import { downloadReport, saveFile } from "../../utils/api/reportJobs";
 import { isAxiosError } from "axios";
 import { useAuth } from '../../components/context/useAuthHook';
 
@@ -54,13 +54,16 @@ const TransactionsPage = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [downloadFormat, setDownloadFormat] = useState("csv");
-  const [currentPage, setCurrentPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [prevCursor, setPrevCursor] = useState<string | null>(null);
+  const [totalRecords, setTotalRecords] = useState(0);
   const [utilityFilter, setUtilityFilter] = useState<string>("");
   const [statusFilter, setStatusFilter] = useState<string>("");
   const [summary, setSummary] = useState<Summary>({});
   const { isLoggedIn } = useAuth();
-  const fetchTransactions = async (page = 1) => {
+  // No cursor loads the first page (with the period summary); the API hands
+  // back opaque next/prev cursors for the neighbouring pages
+  const fetchTransactions = async (cursor?: string) => {
     if (!validateDates()) return;
 
     setLoading(true);
@@ -71,15 +74,19 @@ const TransactionsPage = () => {
         params: {
           start_date: formatDate(startDate),
           end_date: formatDate(endDate, true),
-          page,
+          cursor,
           utility_type: utilityFilter || undefined,
           status: statusFilter || undefined,
         },
       });
       
       setTransactions(response.data.transactions || []);
-      setTotalPages(response.data.pagination.total_pages);
-      setSummary(response.data.summary || {});
+      setNextCursor(response.data.pagination.next_cursor);
+      setPrevCursor(response.data.pagination.prev_cursor);
+      if (response.data.summary) setSummary(response.data.summary);
+      if (response.data.pagination.total_records !== undefined) {
+        setTotalRecords(response.data.pagination.total_records);
+      }
     } catch (err) {
       console.error("API Error:", err);
       setError(isAxiosError(err) ? err.response?.data?.message : "Failed to fetch transactions");
@@ -108,34 +115,26 @@ const TransactionsPage = () => {
     setError(null);
     
     try {
-      const response = await api.get("/transactions/tokens/download", {
-        params: {
-          start_date: formatDate(startDate),
-          end_date: formatDate(endDate, true),
-          format: downloadFormat
-        },
-        responseType: "blob"
-      });
-      
-      // Create download link
-      const url = window.URL.createObjectURL(new Blob([response.data]));
-      const link = document.createElement('a');
-      link.href = url;
-      
+      const params = {
+        start_date: formatDate(startDate),
+        end_date: formatDate(endDate, true),
+        format: downloadFormat
+      };
       // Set filename based on format
       const fileName = `transactions_${formatDate(startDate).replace(/[: ]/g, '')}_${formatDate(endDate).replace(/[: ]/g, '')}.${downloadFormat}`;
-      link.setAttribute('download', fileName);
-      
-      // Trigger download
-      document.body.appendChild(link);
-      link.click();
-      link.remove();
-      window.URL.revokeObjectURL(url);
+
+      if (downloadFormat === "csv") {
+        const response = await api.get("/transactions/tokens/download", { params, responseType: "blob" });
+        saveFile(response.data, fileName);
+      } else {
+        // PDF/XLSX are rendered by the report worker; wait for the job, then download it
+        await downloadReport("/transactions/tokens/download", params, fileName);
+      }
     } catch (error) {
       console.error('Download failed:', error);
       setError(isAxiosError(error) ? 
         error.response?.data?.message || 'Download failed' : 
-        'Failed to download statement');
+        error instanceof Error ? error.message : 'Failed to download statement');
     }
   };
 
@@ -180,7 +179,7 @@ const TransactionsPage = () => {
                 { value: "expired", label: "Expired" }
               ]}
             />
-            <Button onClick={() => fetchTransactions(1)} loading={loading}>
+            <Button onClick={() => fetchTransactions()} loading={loading}>
               View Transactions
             </Button>
           </Group>
@@ -283,16 +282,23 @@ const TransactionsPage = () => {
             </Table.Tbody>
           </Table>
           
-          {totalPages > 1 && (
+          {(nextCursor || prevCursor) && (
             <Group justify="center" mt="md">
-              <Pagination
-                value={currentPage}
-                onChange={(page) => {
-                  setCurrentPage(page);
-                  fetchTransactions(page);
-                }}
-                total={totalPages}
-              />
+              <Button
+                variant="default"
+                disabled={!prevCursor || loading}
+                onClick={() => prevCursor && fetchTransactions(prevCursor)}
+              >
+                Previous
+              </Button>
+              <Text size="sm">{totalRecords.toLocaleString()} transactions</Text>
+              <Button
+                variant="default"
+                disabled={!nextCursor || loading}
+                onClick={() => nextCursor && fetchTransactions(nextCursor)}
+              >
+                Next
+              </Button>
             </Group>
           )}
         </Card>
@@ -19,6 +19,7 @@ import {
 import { DatePickerInput } from "@mantine/dates";
 import { FileDown, AlertCircle, Copy, ArrowUp, ArrowDown } from "lucide-react";
 import { api } from "../../utils/api/axios";
+import { downloadReport, saveFile } from "../../utils/api/reportJobs";
 import { isAxiosError } from "axios";
 import { useAuth } from "../context/useAuthHook";
 import { Droplet, Zap, Flame, Wallet } from "lucide-react";
@@ -261,30 +262,28 @@ const WalletsTransactions = () => {
 
     setLoading(true);
     try {
-      const response = await api.get(
-        "/wallets_transactions/wallet-dir-pay-transactions/download",
-        {
-          params: {
-            start_date: formatDate(startDate),
-            end_date: formatDate(endDate, true),
-            format: downloadFormat,
-          },
-          responseType: "blob",
-        }
-      );
-
-      const url = window.URL.createObjectURL(new Blob([response.data]));
-      const link = document.createElement("a");
-      link.href = url;
-      link.setAttribute("download", `transactions.${downloadFormat}`);
-      document.body.appendChild(link);
-      link.click();
-      link.remove();
-      window.URL.revokeObjectURL(url);
+      const downloadUrl = "/wallets_transactions/wallet-dir-pay-transactions/download";
+      const params = {
+        start_date: formatDate(startDate),
+        end_date: formatDate(endDate, true),
+        format: downloadFormat,
+      };
+
+      if (downloadFormat === "csv") {
+        const response = await api.get(downloadUrl, { params, responseType: "blob" });
+        saveFile(response.data, `transactions.${downloadFormat}`);
+      } else {
+        // PDF/XLSX are rendered by the report worker; wait for the job, then download it
+        await downloadReport(downloadUrl, params, `transactions.${downloadFormat}`);
+      }
     } catch (err) {
       console.error("Download Error:", err);
       setError(
-        isAxiosError(err) ? err.response?.data?.message : "Failed to download transactions"
+        isAxiosError(err)
+          ? err.response?.data?.message
+          : err instanceof Error
+            ? err.message
+            : "Failed to download transactions"
       );
     } finally {
       setLoading(false);
@@ -3,11 +3,28 @@
 import { api } from './axios';
 import { Message, MessageFolder } from '../../components/messages/types';
 
+// The listing is keyset-paginated (newest first); the largest page the API serves
+const MESSAGES_PAGE_LIMIT = 100;
+
+// Follow X-Next-Cursor (exposed through CORS) until the folder has been read completely
+const fetchAllMessages = async (folder: MessageFolder): Promise<Message[]> => {
+  const messages: Message[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get('/messages/messages', {
+      params: { folder, limit: MESSAGES_PAGE_LIMIT, cursor }
+    });
+    messages.push(...response.data);
+    cursor = response.headers['x-next-cursor'] || undefined;
+  } while (cursor);
+  return messages;
+};
+
 export const messageService = {
   getMessages: async (folder: MessageFolder): Promise<Message[]> => {
     try {
-      const response = await api.get(`/messages/messages?folder=${folder}`);
-      return response.data.map((message: Message) => {
+      const messages = await fetchAllMessages(folder);
+      return messages.map((message: Message) => {
         try {
           let parsedContent;
           try {
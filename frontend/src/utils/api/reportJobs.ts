@@ -0,0 +1,61 @@
+// src/utils/api/reportJobs.ts
+
+import { api } from './axios';
+
+interface QueuedReport {
+  job_id: string;
+  status_url: string;
+}
+
+interface ReportJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  error: string | null;
+  message: string | null;
+  download_url?: string;
+}
+
+const POLL_INTERVAL_MS = 2000;
+const MAX_WAIT_MS = 10 * 60 * 1000;
+
+export const saveFile = (data: BlobPart, fileName: string) => {
+  const url = window.URL.createObjectURL(new Blob([data]));
+  const link = document.createElement('a');
+  link.href = url;
+  link.setAttribute('download', fileName);
+  document.body.appendChild(link);
+  link.click();
+  link.remove();
+  window.URL.revokeObjectURL(url);
+};
+
+/**
+ * Ask a statement download endpoint for a report job (async=1), poll the job
+ * until the worker has rendered the file, then download and save it.
+ */
+export const downloadReport = async (
+  url: string,
+  params: Record<string, string>,
+  fileName: string
+): Promise<void> => {
+  const { data: queued } = await api.get<QueuedReport>(url, { params: { ...params, async: 1 } });
+
+  const deadline = Date.now() + MAX_WAIT_MS;
+  while (Date.now() < deadline) {
+    const { data: job } = await api.get<ReportJob>(`/jobs/${queued.job_id}`);
+    if (job.status === 'completed') {
+      if (!job.download_url) {
+        throw new Error(job.message || 'No transactions found for the selected period');
+      }
+      // download_url is absolute from the server root; the api client already prefixes /api
+      const file = await api.get(job.download_url.replace(/^\/api/, ''), { responseType: 'blob' });
+      saveFile(file.data, fileName);
+      return;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Report generation failed');
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+  throw new Error('The report is still being generated, please try again later');
+};
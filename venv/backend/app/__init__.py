@@ -0,0 +1,130 @@
+# // app/__init__.py
+from flask import Flask
+from flask_pymongo import PyMongo
+from flask_jwt_extended import JWTManager
+from flask_mail import Mail
+from flask_cors import CORS
+import os
+import logging
+from flask_jwt_extended import JWTManager
+
+
+from dotenv import load_dotenv
+load_dotenv()
+
+mongo = PyMongo()
+jwt = JWTManager()
+mail = Mail()
+
+logger = logging.getLogger(__name__)
+
+def create_app():
+    app = Flask(__name__)
+    app.config.from_object('app.config.Config')
+    logging.basicConfig(level=app.config['LOG_LEVEL'])
+    app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
+    app.config["JWT_HEADER_TYPE"] = "Bearer"
+    app.config["JWT_COOKIE_SECURE"] = False  # Set to True in production with HTTPS
+
+    jwt = JWTManager(app)
+
+    # Set up upload folder
+    upload_folder = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads')
+    app.config['UPLOAD_FOLDER'] = upload_folder
+
+    if not os.path.exists(upload_folder):
+        os.makedirs(upload_folder)
+        logger.info(f"Created uploads folder at {upload_folder}")
+
+    # Finished background reports are written here by the job worker
+    reports_folder = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'reports')
+    app.config['REPORTS_FOLDER'] = reports_folder
+    os.makedirs(reports_folder, exist_ok=True)
+
+  
+
+    # Configure CORS
+    # CORS(app, supports_credentials=True)
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": ["http://localhost:5173"],
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS","PATCH"],
+            "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
+            "expose_headers": ["Content-Type", "Authorization", "X-Next-Cursor", "X-Prev-Cursor"],
+            "supports_credentials": True,
+            "send_wildcard": False,
+            "max_age": 120
+        }
+    })
+
+    # Request/Mongo metrics; the command listener must be given to the client when it is built
+    from app.utils.metrics import init_metrics
+    command_listeners = init_metrics(app)
+
+    # Initialize extensions
+    mongo.init_app(app, event_listeners=command_listeners)
+    jwt.init_app(app)
+    mail.init_app(app)
+
+    # Register blueprints
+    from app.routes.auth import auth_bp
+    from app.routes.verification import verification_bp
+    from app.routes.token_jwt import token_jwt_bp
+    from app.routes.dashboard import dashboard_bp
+    from app.routes.transactions import transactions_bp
+    from app.routes.messages import messages_bp
+    from app.routes.utilities import utilities_bp
+    from app.routes.wallet import wallet_bp
+    from app.routes.uploads import upload_bp 
+    from app.routes.wallets_transactions import wallets_transactions_bp
+    from app.routes.jobs import jobs_bp
+    from app.routes.cache import cache_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(verification_bp, url_prefix='/api/verification')
+    app.register_blueprint(token_jwt_bp, url_prefix='/api')
+    app.register_blueprint(transactions_bp, url_prefix='/api/transactions')
+    app.register_blueprint(messages_bp, url_prefix='/api/messages')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(wallet_bp, url_prefix='/api/wallet')
+    app.register_blueprint(utilities_bp, url_prefix='/api/utilities')
+    app.register_blueprint(upload_bp, url_prefix='/api/files')
+    app.register_blueprint(wallets_transactions_bp, url_prefix='/api/wallets_transactions')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(cache_bp, url_prefix='/api/cache')
+
+    if app.config['ENSURE_INDEXES_ON_STARTUP']:
+        from app.utils.db_indexes import ensure_indexes
+        try:
+            with app.app_context():
+                # Never drops indexes: during a rolling deploy the old instances still use them
+                ensure_indexes(drop_superseded=False)
+        except Exception as e:
+            # Serving slower beats not serving; run ensure_indexes.py once Mongo is reachable
+            logger.error(f"Index bootstrap failed: {str(e)}")
+
+    # Rollups only cover writes made since they were introduced; until the one-off
+    # backfill job has run, reads fall back to scanning token history
+    try:
+        from app.services.job_queue import JobQueue
+        from app.services.ledger_rollup_service import LedgerRollupService
+        with app.app_context():
+            if not LedgerRollupService.is_backfilled():
+                JobQueue.enqueue('rebuild_ledger_rollups', {}, idempotency_key='ledger-rollups-backfill')
+    except Exception as e:
+        logger.error(f"Could not queue the ledger rollup backfill: {str(e)}")
+
+    # Blueprint imports above register the cached services' invalidation hooks
+    from app.utils.cache import ChangeStreamInvalidator, change_streams_supported, configure_caches
+    configure_caches(app.config['CACHE_ENABLED'])
+    change_stream = app.config['CACHE_CHANGE_STREAM']
+    if app.config['CACHE_ENABLED'] and change_stream != 'false':
+        if change_stream == 'true' or change_streams_supported(mongo.db):
+            app.extensions['cache_invalidator'] = ChangeStreamInvalidator(mongo.db).start()
+        else:
+            logger.warning("Cache change stream off (MongoDB is not a replica set): with several workers, "
+                           "cached users, prices and balances written by another worker stay stale up to their TTL")
+
+    return app
+
+
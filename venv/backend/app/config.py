@@ -0,0 +1,48 @@
+import os
+from dotenv import load_dotenv
+from datetime import timedelta
+
+load_dotenv()  # Load environment variables from .env file
+
+class Config:
+    SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default_jwt_secret_key')
+    MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/token_meter_recharge')
+    
+    MAIL_SERVER = os.getenv('SMTP_HOST', 'localhost')
+    MAIL_PORT = int(os.getenv('SMTP_PORT', '1025'))
+    MAIL_USERNAME = os.getenv('MAIL_USERNAME', None)
+    MAIL_PASSWORD = os.getenv('MAIL_PASSWORD', None)
+    MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'admin@tokenmeter.com')
+
+    # In-process read caches (unit prices, users, wallet balances); the change
+    # stream keeps several workers coherent but needs a replica set. 'auto' follows
+    # it whenever MongoDB is a replica set or mongos; without it, multi-worker
+    # deployments see other workers' writes only after the cache TTL
+    CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
+    CACHE_CHANGE_STREAM = os.getenv('CACHE_CHANGE_STREAM', 'auto').lower()
+
+    # Create the query indexes (app/utils/db_indexes.py) when the app starts
+    ENSURE_INDEXES_ON_STARTUP = os.getenv('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+
+    # Shared secret meter gateways (and the fleet simulator) send as X-Meter-Key to
+    # redeem tokens for any user; unset means only logged-in users can redeem
+    METER_API_KEY = os.getenv('METER_API_KEY')
+
+    # Finished background reports (files and job rows) are deleted after this long
+    REPORT_TTL = timedelta(hours=float(os.getenv('REPORT_TTL_HOURS', '24')))
+
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+    # Request latency and Mongo command metrics on /metrics (app/utils/metrics.py);
+    # METRICS_SAMPLE_RATE instruments that fraction of requests
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', '1.0'))
+    METRICS_SLOW_QUERY_MS = float(os.getenv('METRICS_SLOW_QUERY_MS', '100'))
+    # When set, scrapers must send "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    JWT_TOKEN_LOCATION = ['headers']
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    JWT_COOKIE_CSRF_PROTECT = False  # During development
@@ -0,0 +1,274 @@
+# backend/app/meter_simulator/fleet_simulator.py
+"""Headless, vectorized meter fleet for capacity testing.
+
+Runs the same consumption model as MeterEmulator.simulate_usage (USAGE_RATE
+units per 30-second tick, varied by +/- USAGE_VARIATION) for every virtual
+meter at once with NumPy. Each tick's meter readings are written to the
+`meters` collection with unordered bulk_write batches. Consumption only ever
+touches the meter documents: utilities_balance is the owner's pool of
+purchased units and is drawn down by token redemption alone.
+
+Meters that run low can optionally redeem their owner's active tokens
+through the backend batch endpoint. The backend then looks the tokens up in
+its own MONGO_URI database, so redemption runs must seed that database.
+"""
+import logging
+import time
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+from pymongo import MongoClient, UpdateOne
+
+from app.meter_simulator.utils import USAGE_RATE, USAGE_VARIATION
+
+logger = logging.getLogger(__name__)
+
+UTILITY_TYPES = list(USAGE_RATE)
+
+
+@dataclass
+class FleetConfig:
+    meters: int = 100_000
+    users: int = 20_000
+    ticks: int = 20
+    seed: int = 42
+    batch_size: int = 1000
+    initial_units: float = 50.0
+    low_balance: float = 10.0
+    redeem: bool = False
+    backend_url: str = 'http://localhost:5000'
+    mongo_uri: str = 'mongodb://localhost:27017/'
+    db_name: str = 'token_meter_fleet'
+    realtime: bool = False
+    tick_seconds: float = 30.0
+
+
+class LatencyHistogram:
+    """Log-spaced latency buckets from 0.1 ms to 100 s."""
+    EDGES_MS = np.logspace(-1, 5, 25)
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds * 1000)
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.samples, q)) if self.samples else 0.0
+
+    def render(self, width: int = 40) -> str:
+        if not self.samples:
+            return '  (no samples)'
+        counts, edges = np.histogram(self.samples, bins=self.EDGES_MS)
+        peak = counts.max()
+        lines = []
+        for count, low, high in zip(counts, edges[:-1], edges[1:]):
+            if count:
+                bar = '#' * max(1, int(width * count / peak))
+                lines.append(f'  {low:>9.1f} - {high:>9.1f} ms {count:>7} {bar}')
+        return '\n'.join(lines)
+
+
+@dataclass
+class FleetReport:
+    ticks: int = 0
+    meter_readings: int = 0
+    meter_updates: int = 0
+    redemptions: int = 0
+    elapsed: float = 0.0
+    write_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    redeem_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def render(self) -> str:
+        elapsed = self.elapsed or float('nan')
+        lines = [
+            f'ticks={self.ticks} meter_readings={self.meter_readings} elapsed={self.elapsed:.2f}s',
+            f'readings/sec={self.meter_readings / elapsed:,.0f} '
+            f'meter_updates/sec={self.meter_updates / elapsed:,.0f} '
+            f'redemptions={self.redemptions}'
+        ]
+        for name, histogram in (('bulk_write', self.write_latency), ('redeem', self.redeem_latency)):
+            lines.append(
+                f'{name} latency: n={len(histogram.samples)} p50={histogram.percentile(50):.1f}ms '
+                f'p95={histogram.percentile(95):.1f}ms p99={histogram.percentile(99):.1f}ms'
+            )
+            lines.append(histogram.render())
+        return '\n'.join(lines)
+
+
+class FleetSimulator:
+    def __init__(self, config: FleetConfig, db=None, token_handler=None):
+        self.config = config
+        self.rng = np.random.default_rng(config.seed)
+        self.db = db if db is not None else MongoClient(config.mongo_uri)[config.db_name]
+        self.token_handler = token_handler
+
+        # Each meter belongs to one user and measures one utility
+        self.user_index = self.rng.integers(0, config.users, config.meters)
+        self.utility_index = self.rng.integers(0, len(UTILITY_TYPES), config.meters)
+        self.base_rate = np.array([USAGE_RATE[t] for t in UTILITY_TYPES])[self.utility_index]
+        self.balance = np.full(config.meters, config.initial_units, dtype=np.float64)
+        self.report = FleetReport()
+        self._redeem_checked = False
+
+    @staticmethod
+    def user_email(index: int) -> str:
+        return f'fleet{index:06d}@tokenmeter.com'
+
+    @staticmethod
+    def meter_id(index: int) -> str:
+        return f'FLT{index:07d}'
+
+    def seed_database(self, tokens_per_user: int = 2) -> None:
+        """Reset the fleet's meters and balances and give every user active tokens (for redemption runs)."""
+        config = self.config
+        # Every reading is an update by meter_id
+        self.db.meters.create_index('meter_id', unique=True, name='meter_id')
+        self.db.meters.delete_many({'meter_id': {'$regex': '^FLT'}})
+        self.db.utilities_balance.delete_many({'user_email': {'$regex': '^fleet'}})
+        self.db.utility_recharge_tokens.delete_many({'user_email': {'$regex': '^fleet'}})
+
+        meters = [
+            {'meter_id': self.meter_id(meter), 'user_email': self.user_email(int(self.user_index[meter])),
+             'utility_type': UTILITY_TYPES[int(self.utility_index[meter])], 'units': config.initial_units}
+            for meter in range(config.meters)
+        ]
+        for start in range(0, len(meters), config.batch_size * 10):
+            self.db.meters.insert_many(meters[start:start + config.batch_size * 10], ordered=False)
+
+        balances = [
+            {'user_email': self.user_email(user), 'utility_type': utility_type,
+             'units': config.initial_units * 10, 'recharge_history': []}
+            for user in range(config.users) for utility_type in UTILITY_TYPES
+        ]
+        for start in range(0, len(balances), config.batch_size * 10):
+            self.db.utilities_balance.insert_many(balances[start:start + config.batch_size * 10], ordered=False)
+
+        if not tokens_per_user:
+            return
+        # Separate stream so seeding does not shift the consumption draws
+        rng = np.random.default_rng([config.seed, 1])
+        created_at = datetime.utcnow()
+        digits = rng.integers(0, 10 ** 16, config.users * len(UTILITY_TYPES) * tokens_per_user, dtype=np.int64)
+        tokens, position = [], 0
+        for user in range(config.users):
+            for utility_type in UTILITY_TYPES:
+                for _ in range(tokens_per_user):
+                    raw = f'{int(digits[position]):016d}'
+                    position += 1
+                    units = float(rng.integers(10, 100))
+                    tokens.append({
+                        'recharge_token': '-'.join(raw[i:i + 4] for i in range(0, 16, 4)),
+                        'user_email': self.user_email(user),
+                        'utility_type': utility_type,
+                        'units': units,
+                        'total_amount': units * 1.5,
+                        'status': 'active',
+                        'created_at': created_at
+                    })
+        for start in range(0, len(tokens), config.batch_size * 10):
+            self.db.utility_recharge_tokens.insert_many(tokens[start:start + config.batch_size * 10], ordered=False)
+
+    def consume(self) -> np.ndarray:
+        """One tick of usage for every meter, clipped so no meter goes below zero."""
+        variation = self.rng.uniform(-USAGE_VARIATION, USAGE_VARIATION, self.config.meters)
+        usage = np.minimum(np.maximum(0, self.base_rate * (1 + variation)), self.balance)
+        self.balance -= usage
+        return usage
+
+    def meter_operations(self, changed: np.ndarray) -> List[UpdateOne]:
+        """One reading per changed meter, setting the meter document to its current balance."""
+        read_at = datetime.utcnow()
+        return [
+            UpdateOne(
+                {'meter_id': self.meter_id(int(meter))},
+                {'$set': {'units': float(self.balance[meter]), 'last_reading': read_at}}
+            )
+            for meter in np.flatnonzero(changed)
+        ]
+
+    def apply(self, operations: List[UpdateOne]) -> None:
+        for start in range(0, len(operations), self.config.batch_size):
+            batch = operations[start:start + self.config.batch_size]
+            began = time.perf_counter()
+            result = self.db.meters.bulk_write(batch, ordered=False)
+            self.report.write_latency.record(time.perf_counter() - began)
+            if result.matched_count < len(batch):
+                raise RuntimeError(
+                    f'{len(batch) - result.matched_count} meters missing from {self.db.name}.meters; '
+                    f'run with --seed-db first'
+                )
+            self.report.meter_updates += len(batch)
+
+    def redeem_low_meters(self) -> np.ndarray:
+        """Redeem one active token of the owner for every low meter and top the meter up.
+
+        Returns a mask of the meters that were topped up.
+        """
+        topped_up = np.zeros(self.config.meters, dtype=bool)
+        low = np.flatnonzero(self.balance < self.config.low_balance)
+        if not low.size or self.token_handler is None:
+            return topped_up
+
+        wanted: Dict[tuple, List[int]] = {}
+        for meter in low:
+            key = (self.user_email(int(self.user_index[meter])), UTILITY_TYPES[int(self.utility_index[meter])])
+            wanted.setdefault(key, []).append(int(meter))
+
+        available = {}
+        for token in self.db.utility_recharge_tokens.find(
+            {'status': 'active', 'user_email': {'$in': sorted({email for email, _ in wanted})}},
+            {'recharge_token': 1, 'user_email': 1, 'utility_type': 1}
+        ):
+            available.setdefault((token['user_email'], token['utility_type']), []).append(token['recharge_token'])
+
+        redemptions = []
+        for key, meters in wanted.items():
+            for meter, token in zip(meters, available.get(key, [])):
+                redemptions.append({'meter_id': self.meter_id(meter), 'token': token, 'utility_type': key[1]})
+        if not redemptions:
+            return topped_up
+
+        meters_by_id = {self.meter_id(int(meter)): int(meter) for meter in low}
+        for start in range(0, len(redemptions), self.config.batch_size):
+            batch = redemptions[start:start + self.config.batch_size]
+            began = time.perf_counter()
+            results = self.token_handler.redeem_tokens(batch)
+            self.report.redeem_latency.record(time.perf_counter() - began)
+            if not self._redeem_checked:
+                self._redeem_checked = True
+                if all(result['status'] == 'not_found' for result in results):
+                    raise RuntimeError(
+                        f'The backend found none of the {len(results)} tokens seeded in {self.db.name}; '
+                        f'point the simulator at the same database as the backend\'s MONGO_URI'
+                    )
+            for result in results:
+                if result['status'] == 'redeemed':
+                    meter = meters_by_id[result['meter_id']]
+                    self.balance[meter] += result['units']
+                    topped_up[meter] = True
+                    self.report.redemptions += 1
+        return topped_up
+
+    def run(self) -> FleetReport:
+        started = time.perf_counter()
+        for tick in range(self.config.ticks):
+            tick_began = time.perf_counter()
+            usage = self.consume()
+            changed = usage > 0
+            if self.config.redeem:
+                changed |= self.redeem_low_meters()
+            self.apply(self.meter_operations(changed))
+
+            self.report.ticks += 1
+            self.report.meter_readings += self.config.meters
+            logger.info(f'Tick {tick + 1}/{self.config.ticks}: {usage.sum():.1f} units consumed, '
+                        f'{int((self.balance < self.config.low_balance).sum())} meters low')
+
+            if self.config.realtime:
+                time.sleep(max(0.0, self.config.tick_seconds - (time.perf_counter() - tick_began)))
+
+        self.report.elapsed = time.perf_counter() - started
+        return self.report
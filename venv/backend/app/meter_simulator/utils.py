@@ -0,0 +1,10 @@
+# Units consumed per 30-second meter tick, varied by +/- USAGE_VARIATION
+USAGE_RATE = {'water': 0.2, 'gas': 0.2, 'energy': 0.3}
+USAGE_VARIATION = 0.2
+
+def format_token(raw_token):
+    """Format the token to include hyphens (XXXX-XXXX-XXXX-XXXX)."""
+    cleaned_token = ''.join(filter(str.isdigit, raw_token))
+    if len(cleaned_token) != 16:
+        return None
+    return '-'.join([cleaned_token[i:i+4] for i in range(0, 16, 4)])
\ No newline at end of file
@@ -0,0 +1,14 @@
+# routes/cache.py
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from http import HTTPStatus
+from app.utils.cache import cache_stats
+
+cache_bp = Blueprint('cache', __name__)
+
+
+@cache_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Hit/miss, eviction and invalidation counters for this worker's caches"""
+    return jsonify({'caches': cache_stats()}), HTTPStatus.OK
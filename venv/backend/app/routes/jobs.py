@@ -0,0 +1,119 @@
+# routes/jobs.py
+from flask import Blueprint, jsonify, request, send_file, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from http import HTTPStatus
+from datetime import datetime
+from app.services.job_queue import JobQueue, JobStatus
+from app.services.job_handlers import REPORT_KINDS, REPORT_FORMATS, enqueue_statement_report
+from app.utils.streaming_export import MIMETYPES
+import os
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def serialize_job(job):
+    result = job.get('result') or {}
+    data = {
+        'job_id': str(job['_id']),
+        'type': job['type'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'error': job.get('error'),
+        'created_at': job['created_at'].isoformat(),
+        'completed_at': job['completed_at'].isoformat() if job.get('completed_at') else None,
+        'message': result.get('message')
+    }
+    if job['status'] == JobStatus.COMPLETED and result.get('file_name'):
+        data['download_url'] = f"/api/jobs/{job['_id']}/download"
+    return data
+
+
+def queued_report_response(user_email, kind, format_type, start_date, end_date):
+    """202 with the job rendering the report; clients poll status_url, then fetch its download_url."""
+    # Clients may retry with the same Idempotency-Key without queuing a second report
+    job_id = enqueue_statement_report(user_email, kind, format_type, start_date, end_date,
+                                      request.headers.get('Idempotency-Key'))
+    return jsonify({
+        'job_id': job_id,
+        'status_url': f"/api/jobs/{job_id}"
+    }), HTTPStatus.ACCEPTED
+
+
+def request_flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def report_is_queued(format_type):
+    """Whether a statement download asked for a report job (202) instead of the file.
+
+    Opt-in only, so existing clients keep getting the file: async=1 queues any
+    format, and stream=1 queues XLSX/PDF, which cannot be sent before they are complete.
+    """
+    return request_flag('async') or (request_flag('stream') and format_type in ('xlsx', 'pdf'))
+
+
+def get_user_job(job_id):
+    job = JobQueue.get(job_id)
+    if not job or job.get('user_email') != get_jwt_identity():
+        return None
+    return job
+
+
+@jobs_bp.route('/reports', methods=['POST'])
+@jwt_required()
+def request_report():
+    """Queue a statement report instead of rendering it in the request thread."""
+    current_user = get_jwt_identity()
+    data = request.get_json() or {}
+    kind = data.get('kind', 'tokens')
+    format_type = data.get('format', 'pdf').lower()
+
+    if kind not in REPORT_KINDS:
+        return jsonify({'message': 'Invalid report kind'}), HTTPStatus.BAD_REQUEST
+    if format_type not in REPORT_FORMATS:
+        return jsonify({'message': 'Unsupported format'}), HTTPStatus.BAD_REQUEST
+
+    try:
+        start_date = datetime.strptime(data['start_date'], "%Y-%m-%d %H:%M:%S")
+        end_date = datetime.strptime(data['end_date'], "%Y-%m-%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        return jsonify({
+            'message': 'Invalid date format. Please use YYYY-MM-DD HH:MM:SS format'
+        }), HTTPStatus.BAD_REQUEST
+
+    return queued_report_response(current_user, kind, format_type, start_date, end_date)
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job_status(job_id):
+    job = get_user_job(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), HTTPStatus.NOT_FOUND
+    return jsonify(serialize_job(job)), HTTPStatus.OK
+
+
+@jobs_bp.route('/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_report(job_id):
+    job = get_user_job(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), HTTPStatus.NOT_FOUND
+
+    result = job.get('result') or {}
+    if job['status'] != JobStatus.COMPLETED or not result.get('file_name'):
+        return jsonify({
+            'message': result.get('message') or 'Report is not ready',
+            'status': job['status']
+        }), HTTPStatus.CONFLICT if job['status'] != JobStatus.COMPLETED else HTTPStatus.NOT_FOUND
+
+    file_path = os.path.join(current_app.config['REPORTS_FOLDER'], result['file_name'])
+    if not os.path.exists(file_path):
+        return jsonify({'message': 'Report file has expired'}), HTTPStatus.GONE
+
+    return send_file(
+        file_path,
+        mimetype=MIMETYPES[job['payload']['format']],
+        as_attachment=True,
+        download_name=result['download_name']
+    )
@@ -0,0 +1,408 @@
+# backend/app/routes/messages.py 
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app import mongo 
+from app.services.user_service import UserService
+from app.utils.message_encryption import MessageEncryption
+from app.utils.pagination import InvalidCursor, paginate, parse_limit
+from pymongo import DESCENDING
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+messages_bp = Blueprint('messages', __name__)
+ 
+def get_user(email):
+    return UserService.get_user(email)
+def get_registered_users():
+    return UserService.registered_emails()
+# Keys are derived on first use, once per process (see app.utils.message_encryption)
+encryption = MessageEncryption()
+
+
+class MessageStatus:
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+@messages_bp.route('/messages', methods=['POST'])
+@jwt_required()
+def send_message():
+    try:
+        data = request.get_json()
+        sender = get_jwt_identity()
+        recipient = data.get('recipient')
+        content = data.get('content')
+        
+        if not recipient or not content:
+            return jsonify({'message': 'Recipient and content are required'}), 400
+        
+        recipient_user = get_user(recipient)
+        if not recipient_user:
+            return jsonify({'message': 'Recipient not found'}), 404
+        
+        # Encrypt the message content
+        encrypted_content = encryption.encrypt_message(content)
+        
+        message = {
+            'sender': sender,
+            'recipient': recipient,
+            'content': encrypted_content,
+            'timestamp': datetime.utcnow(),
+            'read': False,
+            'status': MessageStatus.SENT,  # Set initial status as SENT
+            'delivery_timestamp': datetime.utcnow()  # Track when message was delivered
+        }
+        
+        result = mongo.db.messages.insert_one(message)
+        return jsonify({
+            'message': 'Message sent successfully',
+            'message_id': str(result.inserted_id)
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error sending message: {str(e)}")
+        return jsonify({'message': 'An error occurred'}), 500
+
+
+
+MESSAGES_PAGE_SIZE = 50
+
+def message_folder_query(current_user, folder='all'):
+    """Mongo filter for a mailbox folder; each shape is backed by a messages index"""
+    if folder == 'inbox':
+        return {'recipient': current_user}
+    elif folder == 'outbox':
+        return {'sender': current_user, 'status': 'pending'}
+    elif folder == 'sent':
+        return {'sender': current_user, 'status': 'sent'}
+    return {
+        '$or': [
+            {'recipient': current_user},
+            {'sender': current_user}
+        ]
+    }
+
+# Modify the get_messages route to handle encryption
+@messages_bp.route('/messages', methods=['GET'])
+@jwt_required()
+def get_messages():
+    try:
+        current_user = get_jwt_identity()
+        folder = request.args.get('folder', 'all')
+        query = message_folder_query(current_user, folder)
+
+        # Newest first, one page at a time; the body stays a plain list and the
+        # cursors for the neighbouring pages travel in X-Next-Cursor / X-Prev-Cursor
+        try:
+            page = paginate(
+                mongo.db.messages, query, 'timestamp', DESCENDING,
+                limit=parse_limit(request.args.get('limit'), MESSAGES_PAGE_SIZE),
+                cursor=request.args.get('cursor')
+            )
+        except InvalidCursor as ic:
+            return jsonify({'message': str(ic)}), 400
+        messages = page.items
+
+        # Only the returned page is decrypted; repeat views come from the decrypted cache
+        plaintexts = encryption.decrypt_messages(messages)
+
+        # Process messages
+        processed_messages = []
+        for message, decrypted_content in zip(messages, plaintexts):
+            try:
+                # Convert ObjectId to string
+                message['_id'] = str(message['_id'])
+                if 'parent_id' in message:
+                    message['parent_id'] = str(message['parent_id'])
+                
+                # Convert datetime to ISO format string
+                message['timestamp'] = message['timestamp'].isoformat()
+                
+                if decrypted_content is not None:
+                    message['content'] = json.dumps({
+                        'decryptedContent': decrypted_content,
+                        'isDecrypted': True
+                    })
+                else:
+                    message['content'] = json.dumps({
+                        'decryptedContent': '[Message decryption failed]',
+                        'isDecrypted': False
+                    })
+                
+                processed_messages.append(message)
+                
+            except Exception as e:
+                logger.error(f"Error processing message {message.get('_id', 'unknown')}: {str(e)}")
+                continue
+
+        return jsonify(processed_messages), 200, page.headers()
+
+    except Exception as e:
+        logger.error(f"Error fetching messages: {str(e)}")
+        return jsonify({'message': 'An error occurred'}), 500
+
+@messages_bp.route('/messages/counts', methods=['GET'])
+@jwt_required()
+def get_message_counts():
+    try:
+        current_user = get_jwt_identity()
+        
+        # Get counts for each folder
+        inbox_count = mongo.db.messages.count_documents({
+            'recipient': current_user,
+            'status': 'sent',
+            'read': False  # Changed from isRead to read to match schema
+        })
+        
+        outbox_count = mongo.db.messages.count_documents({
+            'sender': current_user,
+            'status': 'pending'
+        })
+        
+        sent_count = mongo.db.messages.count_documents({
+            'sender': current_user,
+            'status': 'sent'
+        })
+        
+        return jsonify({
+            'inbox': inbox_count,
+            'outbox': outbox_count,
+            'sent': sent_count
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error getting message counts: {str(e)}")
+        return jsonify({'message': 'An error occurred'}), 500
+@messages_bp.route('/messages/<message_id>/reply', methods=['POST'])
+@jwt_required()
+def reply_to_message(message_id):
+    try:
+        current_user = get_jwt_identity()
+        data = request.get_json()
+        content = data.get('content')
+        
+        # Get original message
+        original_message = mongo.db.messages.find_one({'_id': ObjectId(message_id)})
+        if not original_message:
+            return jsonify({'message': 'Original message not found'}), 404
+            
+        # Create reply message
+        reply = {
+            'sender': current_user,
+            'recipient': original_message['sender'],
+            'content': content,
+            'timestamp': datetime.utcnow(),
+            'parent_id': ObjectId(message_id),
+            'isRead': False,
+            'status': 'sent'
+        }
+        
+        result = mongo.db.messages.insert_one(reply)
+        return jsonify({
+            'message': 'Reply sent successfully',
+            'message_id': str(result.inserted_id)
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error sending reply: {str(e)}")
+        return jsonify({'message': 'An error occurred'}), 500
+
+
+from flask import jsonify
+from bson import ObjectId
+from datetime import datetime
+
+@messages_bp.route('/<message_id>/read', methods=['PATCH','OPTIONS'])
+@jwt_required()
+def mark_message_read(message_id):
+     # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        response = jsonify({'message': 'OK'})
+        response.headers.add('Access-Control-Allow-Methods', 'PATCH')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        return response
+    try:
+        current_user = get_jwt_identity()
+        
+        # Validate message exists and user has permission
+        message = mongo.db.messages.find_one({
+            '_id': ObjectId(message_id),
+            '$or': [
+                {'recipient': current_user},
+                {'sender': current_user}
+            ]
+        })
+        
+        if not message:
+            return jsonify({
+                'message': 'Message not found or you don\'t have permission'
+            }), 404
+            
+        # Update message read status
+        result = mongo.db.messages.update_one(
+            {'_id': ObjectId(message_id)},
+            {
+                '$set': {
+                    'read': True,
+                    'read_timestamp': datetime.utcnow()
+                }
+            }
+        )
+        
+        if result.modified_count > 0:
+            return jsonify({
+                'message': 'Message marked as read',
+                'message_id': message_id
+            }), 200
+        else:
+            return jsonify({
+                'message': 'Message status was not updated'
+            }), 400
+            
+    except Exception as e:
+        logger.error(f"Error marking message as read: {str(e)}")
+        return jsonify({'message': 'An error occurred'}), 500
+
+@messages_bp.route('/messages/<message_id>/unread', methods=['PATCH'])
+@jwt_required()
+def mark_message_unread(message_id):
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        response = jsonify({'message': 'OK'})
+        response.headers.add('Access-Control-Allow-Methods', 'PATCH')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        return response
+    try:
+        current_user = get_jwt_identity()
+        
+        # Validate message exists and user has permission
+        message = mongo.db.messages.find_one({
+            '_id': ObjectId(message_id),
+            '$or': [
+                {'recipient': current_user},
+                {'sender': current_user}
+            ]
+        })
+        
+        if not message:
+            return jsonify({
+                'message': 'Message not found or you don\'t have permission'
+            }), 404
+            
+        # Check if message is in valid folders for unread status
+        valid_folders = ['inbox', 'sent', 'outbox']
+        message_folder = message.get('folder', 'inbox')  # Default to inbox if folder not specified
+        
+        if message_folder not in valid_folders:
+            return jsonify({
+                'message': f'Cannot mark messages as unread in {message_folder} folder'
+            }), 400
+            
+        # Update message read status
+        result = mongo.db.messages.update_one(
+            {'_id': ObjectId(message_id)},
+            {
+                '$set': {
+                    'read': False,
+                    'unread_timestamp': datetime.utcnow()
+                }
+            }
+        )
+        
+        if result.modified_count > 0:
+            return jsonify({
+                'message': 'Message marked as unread',
+                'message_id': message_id
+            }), 200
+        else:
+            return jsonify({
+                'message': 'Message status was not updated'
+            }), 400
+            
+    except Exception as e:
+        logger.error(f"Error marking message as unread: {str(e)}")
+        return jsonify({'message': 'An error occurred'}), 500
+    
+# Add a cleanup task for pending messages
+def cleanup_pending_messages():
+    """Delete pending messages older than 24 hours"""
+    cleanup_time = datetime.utcnow() - timedelta(hours=24)
+    mongo.db.messages.delete_many({
+        'status': MessageStatus.PENDING,
+        'timestamp': {'$lt': cleanup_time}
+    })
+
+
+@messages_bp.route('/messages/<message_id>', methods=['DELETE'])
+@jwt_required()
+def delete_message(message_id):
+    try:
+        user = get_jwt_identity()
+        
+        message = mongo.db.messages.find_one({'_id': ObjectId(message_id)})
+        if not message:
+            return jsonify({'message': 'Message not found'}), 404
+            
+        update_field = None
+        if message['sender'] == user:
+            update_field = 'deleted_by_sender'
+        elif message['recipient'] == user:
+            update_field = 'deleted_by_recipient'
+            
+        if update_field:
+            mongo.db.messages.update_one(
+                {'_id': ObjectId(message_id)},
+                {'$set': {update_field: True}}
+            )
+            
+            # If both sender and recipient have deleted, actually remove the message
+            message = mongo.db.messages.find_one({'_id': ObjectId(message_id)})
+            if message.get('deleted_by_sender') and message.get('deleted_by_recipient'):
+                mongo.db.messages.delete_one({'_id': ObjectId(message_id)})
+            
+        return jsonify({'message': 'Message deleted successfully'}), 200
+        
+    except Exception as e:
+        mongo.db.error_logs.insert_one({
+            'error': str(e),
+            'timestamp': datetime.utcnow(),
+            'endpoint': f'/messages/{message_id}',
+            'method': 'DELETE'
+        })
+        return jsonify({'message': 'An error occurred'}), 500
+@messages_bp.route('/messages/<message_id>', methods=['PUT'])
+@jwt_required()
+def update_message(message_id):
+    user = get_jwt_identity()
+    data = request.get_json()
+    
+    message = mongo.db.messages.find_one({
+        '_id': ObjectId(message_id),
+        'recipient': user
+    })
+    
+    if not message:
+        return jsonify({'message': 'Message not found'}), 404
+    
+    # Update read status
+    if 'read' in data:
+        mongo.db.messages.update_one(
+            {'_id': ObjectId(message_id)},
+            {'$set': {'read': data['read']}}
+        )
+    
+    return jsonify({'message': 'Message updated successfully'}), 200
+
+
+@messages_bp.route('/users', methods=['GET'])
+@jwt_required()
+def get_registered_contacts():
+    current_user = get_jwt_identity()
+    users = get_registered_users()
+    # Remove current user from the list
+    users = [user for user in users if user != current_user]
+    return jsonify(users), 200
\ No newline at end of file
@@ -0,0 +1,268 @@
+# routes/utilities.py
+from flask import request
+import logging
+from flask import Blueprint, g, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from http import HTTPStatus
+from app.services.utility_service import UtilityService  
+from app.services.ledger_rollup_service import LedgerRollupService
+from app.services.redemption_service import TokenRedemptionService
+from app.utils.decorators import meter_or_user_required
+from app import mongo
+from http import HTTPStatus
+from datetime import datetime
+from collections import Counter
+
+utilities_bp = Blueprint('utilities', __name__)
+logger = logging.getLogger(__name__)
+
+
+@utilities_bp.route("/utility_unit_price", methods=["GET", "OPTIONS"])
+@jwt_required()
+ 
+def get_utility_prices():
+    """API to fetch current utility prices."""
+    # if request.method == "OPTIONS":
+    #     response = jsonify({'message': 'Preflight successful'})
+    #     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:5173')
+    #     response.headers.add('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+    #     response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+    #     response.headers.add('Access-Control-Allow-Credentials', 'true')
+    #     return response, HTTPStatus.OK
+
+    prices = {
+        "water": UtilityService.get_unit_price("water"),
+        "gas": UtilityService.get_unit_price("gas"),
+        "energy": UtilityService.get_unit_price("energy"),
+    }
+    return jsonify(prices), HTTPStatus.OK
+ 
+@utilities_bp.route('/balances', methods=['GET'])
+@jwt_required()
+def get_utility_balances():
+    try:
+        user_email = get_jwt_identity()
+        # print("User Email:", user_email)
+        balances = UtilityService.get_utility_balances(user_email)
+        
+        return jsonify({
+            'utilities': [balance.__dict__ for balance in balances]
+        }), HTTPStatus.OK
+        
+    except Exception as e:
+        return jsonify({
+            'message': 'An error occurred',
+            'error': str(e)
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+
+@utilities_bp.route('/all-balances', methods=['GET'])
+@jwt_required()
+def get_all_utility_balances():
+    try:
+        user_email = get_jwt_identity()
+        balances = UtilityService.get_all_utility_balances(user_email)
+        
+        return jsonify({
+            'utilities': balances
+        }), HTTPStatus.OK
+        
+    except Exception as e:
+        return jsonify({
+            'message': 'An error occurred',
+            'error': str(e)
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@utilities_bp.route('/specific-utility-balance', methods=['GET'])
+@jwt_required()
+def get_specific_utility_balance():
+    try:
+        # Retrieve the user email from the JWT token
+        user_email = get_jwt_identity()
+
+        # Get the utility type from query parameter (e.g., ?utility_type=gas)
+        utility_type = request.args.get('utility_type')
+
+        # Check if the utility type is valid
+        if utility_type not in ['gas', 'water', 'energy']:
+            return jsonify({
+                'message': 'Invalid utility type',
+                'error': 'Valid types are gas, water, or energy'
+            }), HTTPStatus.BAD_REQUEST
+
+        # Fetch the utility balance from the respective collection
+        balance = UtilityService.get_specific_utility_balance(user_email, utility_type)
+
+        # Ensure balance is correctly formatted
+        return jsonify({
+            'utility_type': utility_type,
+            'balance': int(balance)  # Convert to int to prevent serialization issues
+        }), HTTPStatus.OK
+
+    except Exception as e:
+        return jsonify({
+            'message': 'An error occurred',
+            'error': str(e)
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+    
+@utilities_bp.route('/get_monthly_utility_data', methods=['GET'])
+@jwt_required()
+def get_monthly_utility_data():
+
+    try:
+        user_email = get_jwt_identity()
+        # logging.debug(f"Fetching monthly utility data for user: {user_email}")
+        monthly_data = UtilityService.get_monthly_utility_data(user_email)
+        # logging.debug(f"Monthly data: {monthly_data}")
+        
+        return jsonify({
+            'utilities': monthly_data
+        }), HTTPStatus.OK
+        
+    except Exception as e:
+        return jsonify({
+            'message': 'An error occurred',
+            'error': str(e)
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+    
+
+ # routes/utility_routes.py
+
+import re
+from flask import jsonify
+
+def is_valid_token(recharge_token):
+    """Validate the token format (should be 16 digits grouped as XXXX-XXXX-XXXX-XXXX)"""
+    return bool(re.match(r"^\d{4}-\d{4}-\d{4}-\d{4}$", recharge_token))
+ 
+
+@utilities_bp.route('/process-meter-recharge', methods=['POST'])
+def process_meter_recharge():
+    try:
+        data = request.json
+
+        # Validate required fields FIRST
+        required_fields = ['user_email', 'utility_type', 'token', 'units', 'timestamp']
+        if not all(field in data for field in required_fields):
+            return jsonify({'error': 'Missing required fields'}), 400
+
+        recharge_token = data["token"]
+
+        # Validate token format
+        if not is_valid_token(recharge_token):
+            return jsonify({"error": "Invalid token format"}), 400
+
+        # The token, not the request body, decides whose balance and which rollup bucket move
+        token_record = mongo.db.utility_recharge_tokens.find_one(
+            {'recharge_token': recharge_token},
+            {'user_email': 1, 'utility_type': 1, 'units': 1, 'total_amount': 1}
+        )
+        if not token_record:
+            return jsonify({'error': 'Token not found'}), 404
+        if (token_record['user_email'], token_record['utility_type']) != (data['user_email'], data['utility_type']):
+            return jsonify({'error': 'Token does not belong to this user and utility'}), 400
+        user_email = token_record['user_email']
+        utility_type = token_record['utility_type']
+        units = token_record['units']
+
+        # Get current utility balance
+        utilities_balance = mongo.db.utilities_balance
+        current_balance = utilities_balance.find_one({
+            'user_email': user_email,
+            'utility_type': utility_type
+        })
+
+        if not current_balance:
+            return jsonify({'error': 'Utility balance record not found'}), 404
+
+        # The one timestamp for this redemption: stored as the token's used_at (UTC) and
+        # used for the rollup month, so rebuild_ledger_rollups.py buckets it the same way
+        applied_at = datetime.utcnow()
+
+        # Start a session for atomic operations
+        with mongo.db.client.start_session() as session:
+            with session.start_transaction():
+                token_update = mongo.db.utility_recharge_tokens.update_one(
+                    {'recharge_token': recharge_token, 'status': 'active'},
+                    {'$set': {'status': 'used', 'used_at': applied_at}},
+                    session=session
+                )
+                if token_update.modified_count == 0:
+                    raise Exception('Token is not active')
+
+                # Update utility balance
+                result = utilities_balance.update_one(
+                    {
+                        'user_email': user_email,
+                        'utility_type': utility_type
+                    },
+                    {
+                        '$inc': {'units': -units},
+                        '$push': {
+                            'recharge_history': {
+                                'token': recharge_token,
+                                'units': units,
+                                'timestamp': datetime.fromisoformat(data['timestamp'])
+                            }
+                        },
+                        '$set': {'last_updated': applied_at}
+                    },
+                    session=session
+                )
+
+                if result.modified_count == 0:
+                    raise Exception('Failed to update utility balance')
+
+                # Record the redemption in the monthly ledger rollup
+                LedgerRollupService.record_redemption(
+                    user_email,
+                    utility_type,
+                    units,
+                    token_record.get('total_amount', 0),
+                    applied_at,
+                    session=session
+                )
+
+        return jsonify({
+            'message': 'Recharge processed successfully',
+            'units_deducted': units
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@utilities_bp.route('/redeem-tokens', methods=['POST'])
+@meter_or_user_required
+def redeem_tokens():
+    """Redeem a batch of {meter_id, token[, utility_type]} pairs uploaded by a concentrator
+
+    Meter gateways authenticate with X-Meter-Key and may redeem any token;
+    a logged-in user can only redeem their own.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        redemptions = data.get('redemptions')
+
+        if not isinstance(redemptions, list) or not redemptions:
+            return jsonify({'error': 'redemptions must be a non-empty list'}), 400
+        if len(redemptions) > TokenRedemptionService.MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'At most {TokenRedemptionService.MAX_BATCH_SIZE} redemptions per request'
+            }), 413
+
+        results = TokenRedemptionService.redeem_batch(redemptions, owner=g.acting_user)
+        return jsonify({
+            'results': results,
+            'summary': dict(Counter(result['status'] for result in results))
+        }), 200
+
+    except Exception as e:
+        logging.error(f"Batch redemption failed: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# Add the blueprint to your Flask app
+# In your main app.py:
+# from routes.utility_routes import utility_bp
+# app.register_blueprint(utility_bp)   
\ No newline at end of file
@@ -0,0 +1,138 @@
+# services/job_handlers.py
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from flask import current_app
+from app import mongo, mail
+from app.services.job_queue import JobQueue
+from app.services.ledger_rollup_service import LedgerRollupService
+from app.utils.email import send_token_email
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+REPORT_KINDS = ('tokens', 'wallet')
+REPORT_FORMATS = ('csv', 'xlsx', 'pdf')
+DEFAULT_REPORT_TTL = timedelta(hours=24)
+
+
+@dataclass
+class JobHandler:
+    run: Callable
+    batch_size: int = 0  # > 0: the handler receives a list of up to batch_size jobs
+    ttl: Optional[Callable[[], timedelta]] = None  # completed jobs expire (expires_at) after ttl()
+
+
+def send_token_emails(jobs: List[Dict]) -> Dict:
+    """Send every claimed token email over a single SMTP connection.
+
+    Returns the per-job exception (or None on success); a failure to open
+    the connection propagates and fails the whole batch.
+    """
+    results = {}
+    with mail.connect() as connection:
+        for job in jobs:
+            try:
+                send_token_email(job['payload']['email'], job['payload']['token_data'], connection=connection)
+                results[job['_id']] = None
+            except Exception as e:
+                results[job['_id']] = e
+    return results
+
+
+def enqueue_statement_report(user_email: str, kind: str, format_type: str, start_date: datetime,
+                             end_date: datetime, idempotency_key: Optional[str] = None) -> str:
+    """Queue a statement_report job; a repeated idempotency key returns the queued job."""
+    return JobQueue.enqueue(
+        'statement_report',
+        {
+            'user_email': user_email,
+            'kind': kind,
+            'format': format_type,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat()
+        },
+        idempotency_key=f"report:{user_email}:{idempotency_key}" if idempotency_key else None,
+        user_email=user_email
+    )
+
+
+def build_statement_report(job: Dict) -> Dict:
+    """Render a statement to REPORTS_FOLDER using the streaming exporters."""
+    payload = job['payload']
+    user_email = payload['user_email']
+    format_type = payload['format']
+    start_date = datetime.fromisoformat(payload['start_date'])
+    end_date = datetime.fromisoformat(payload['end_date'])
+
+    user = mongo.db.users.find_one({"email": user_email})
+    if not user:
+        raise ValueError(f"User not found: {user_email}")
+
+    if payload['kind'] == 'tokens':
+        from app.routes.transactions import transaction_report_chunks
+        chunks = transaction_report_chunks(user_email, user, start_date, end_date, format_type)
+    else:
+        from app.routes.wallets_transactions import DocumentGenerator
+        chunks = DocumentGenerator.stream_document(format_type, user, start_date, end_date)
+
+    if chunks is None:
+        return {'message': 'No transactions found for the selected period'}
+
+    file_name = f"{job['_id']}.{format_type}"
+    file_path = os.path.join(current_app.config['REPORTS_FOLDER'], file_name)
+    partial_path = f"{file_path}.part"
+    with open(partial_path, 'wb') as output:
+        for chunk in chunks:
+            output.write(chunk)
+    os.replace(partial_path, file_path)
+
+    logger.info(f"Report {file_name} generated for {user_email}")
+    return {
+        'file_name': file_name,
+        'download_name': f"transactions_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.{format_type}"
+    }
+
+
+def report_ttl() -> timedelta:
+    return current_app.config.get('REPORT_TTL', DEFAULT_REPORT_TTL)
+
+
+def purge_expired_reports() -> int:
+    """Delete report files older than REPORT_TTL and the expired report jobs pointing at them.
+
+    The expires_at TTL index removes the rows on its own as well; this also
+    catches files whose row is already gone and .part files of crashed workers.
+    Returns how many files were deleted.
+    """
+    now = datetime.utcnow()
+    JobQueue.collection().delete_many({'type': 'statement_report', 'expires_at': {'$lte': now}})
+
+    reports_folder = current_app.config['REPORTS_FOLDER']
+    cutoff = (now - report_ttl() - datetime(1970, 1, 1)).total_seconds()
+    removed = 0
+    for file_name in os.listdir(reports_folder):
+        file_path = os.path.join(reports_folder, file_name)
+        try:
+            if os.path.getmtime(file_path) < cutoff:
+                os.remove(file_path)
+                removed += 1
+        except FileNotFoundError:
+            # Another worker process purged it first
+            continue
+    if removed:
+        logger.info(f"Purged {removed} expired report file(s)")
+    return removed
+
+
+def backfill_ledger_rollups(job: Dict) -> Dict:
+    """One-off rebuild of the rollups from token history (queued by create_app until done)."""
+    return {'message': f"{len(LedgerRollupService.backfill())} rollup(s) written"}
+
+
+JOB_HANDLERS = {
+    'send_token_email': JobHandler(send_token_emails, batch_size=50),
+    'statement_report': JobHandler(build_statement_report, ttl=report_ttl),
+    'rebuild_ledger_rollups': JobHandler(backfill_ledger_rollups),
+}
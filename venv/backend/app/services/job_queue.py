@@ -0,0 +1,218 @@
+# services/job_queue.py
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app import mongo
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+
+class JobQueue:
+    """Background jobs stored in the `jobs` collection.
+
+    Workers claim jobs with an atomic find_one_and_update, failed attempts
+    are re-queued with exponential backoff until max_attempts is reached,
+    and an optional idempotency key makes enqueueing safe to repeat.
+
+    A claim is a lease: the worker renews locked_at with heartbeat() every
+    HEARTBEAT_INTERVAL while the job runs, requeue_stale only takes jobs whose
+    lease has not been renewed for STALE_AFTER, and complete()/fail() only
+    write while the caller still holds the lease.
+
+    Completed jobs may carry an expires_at; the TTL index removes those rows
+    once it has passed.
+    """
+    RETRY_BASE_SECONDS = 30
+    RETRY_MAX_SECONDS = 3600
+    DEFAULT_MAX_ATTEMPTS = 5
+    STALE_AFTER = timedelta(minutes=15)
+    HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+    @staticmethod
+    def collection():
+        return mongo.db.jobs
+
+    @classmethod
+    def ensure_indexes(cls) -> None:
+        cls.collection().create_index(
+            [('status', ASCENDING), ('type', ASCENDING), ('run_at', ASCENDING)],
+            name='status_type_run_at'
+        )
+        cls.collection().create_index(
+            'idempotency_key', name='idempotency_key', unique=True, sparse=True
+        )
+        cls.collection().create_index('expires_at', name='expires_at_ttl', expireAfterSeconds=0)
+
+    @classmethod
+    def build(cls, job_type: str, payload: Dict, idempotency_key: Optional[str] = None,
+              user_email: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Dict:
+        now = datetime.utcnow()
+        job = {
+            '_id': ObjectId(),
+            'type': job_type,
+            'payload': payload,
+            'user_email': user_email,
+            'status': JobStatus.QUEUED,
+            'attempts': 0,
+            'max_attempts': max_attempts,
+            'run_at': now,
+            'created_at': now,
+            'updated_at': now,
+            'result': None,
+            'error': None
+        }
+        if idempotency_key:
+            job['idempotency_key'] = idempotency_key
+        return job
+
+    @classmethod
+    def enqueue(cls, job_type: str, payload: Dict, idempotency_key: Optional[str] = None,
+                user_email: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                session=None) -> str:
+        """Queue a job and return its id; an existing job with the same idempotency key is reused."""
+        job = cls.build(job_type, payload, idempotency_key, user_email, max_attempts)
+        try:
+            cls.collection().insert_one(job, session=session)
+            return str(job['_id'])
+        except DuplicateKeyError:
+            existing = cls.collection().find_one({'idempotency_key': idempotency_key}, {'_id': 1})
+            return str(existing['_id'])
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[Dict]:
+        if not ObjectId.is_valid(job_id):
+            return None
+        return cls.collection().find_one({'_id': ObjectId(job_id)})
+
+    @classmethod
+    def claim(cls, worker_id: str, job_types: Optional[List[str]] = None,
+              exclude_types: Optional[List[str]] = None) -> Optional[Dict]:
+        """Atomically take the oldest due job, or return None when nothing is due."""
+        now = datetime.utcnow()
+        query = {'status': JobStatus.QUEUED, 'run_at': {'$lte': now}}
+        if job_types:
+            query['type'] = {'$in': job_types}
+        elif exclude_types:
+            query['type'] = {'$nin': exclude_types}
+
+        return cls.collection().find_one_and_update(
+            query,
+            {
+                '$set': {
+                    'status': JobStatus.RUNNING,
+                    'locked_by': worker_id,
+                    'locked_at': now,
+                    'updated_at': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('run_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    def claim_batch(cls, worker_id: str, job_type: str, limit: int) -> List[Dict]:
+        jobs = []
+        while len(jobs) < limit:
+            job = cls.claim(worker_id, job_types=[job_type])
+            if not job:
+                break
+            jobs.append(job)
+        return jobs
+
+    @staticmethod
+    def _leased(job: Dict) -> Dict:
+        """Filter matching the job only while the worker that claimed it still holds it."""
+        return {'_id': job['_id'], 'status': JobStatus.RUNNING, 'locked_by': job.get('locked_by')}
+
+    @classmethod
+    def heartbeat(cls, jobs: List[Dict]) -> int:
+        """Renew the lease on running jobs; returns how many are still held."""
+        now = datetime.utcnow()
+        result = cls.collection().update_many(
+            {'$or': [cls._leased(job) for job in jobs]},
+            {'$set': {'locked_at': now, 'updated_at': now}}
+        )
+        return result.matched_count
+
+    @classmethod
+    def complete(cls, job: Dict, result: Optional[Dict] = None, expires_at: Optional[datetime] = None) -> bool:
+        """Store the result; False (and nothing written) when the lease was lost to another worker."""
+        update = {
+            'status': JobStatus.COMPLETED,
+            'result': result,
+            'error': None,
+            'completed_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+        if expires_at:
+            update['expires_at'] = expires_at
+        updated = cls.collection().update_one(cls._leased(job), {'$set': update})
+        if not updated.matched_count:
+            logger.warning(f"Job {job['_id']} ({job['type']}) finished after its lease was lost; result dropped")
+            return False
+        return True
+
+    @classmethod
+    def retry_delay(cls, attempts: int) -> timedelta:
+        seconds = cls.RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, cls.RETRY_MAX_SECONDS))
+
+    @classmethod
+    def _after_failure(cls, job: Dict, now: datetime):
+        """Status and run_at for a job whose attempt (already counted by claim) did not finish."""
+        if job['attempts'] >= job.get('max_attempts', cls.DEFAULT_MAX_ATTEMPTS):
+            return JobStatus.FAILED, job['run_at']
+        return JobStatus.QUEUED, now + cls.retry_delay(job['attempts'])
+
+    @classmethod
+    def fail(cls, job: Dict, error: Exception) -> Optional[str]:
+        """Record a failed attempt; re-queue with backoff or give up after max_attempts.
+
+        Returns the new status, or None when the lease was lost and nothing was written.
+        """
+        now = datetime.utcnow()
+        status, run_at = cls._after_failure(job, now)
+
+        updated = cls.collection().update_one(
+            cls._leased(job),
+            {'$set': {'status': status, 'run_at': run_at, 'error': str(error), 'updated_at': now}}
+        )
+        if not updated.matched_count:
+            logger.warning(f"Job {job['_id']} ({job['type']}) failed after its lease was lost: {error}")
+            return None
+        logger.warning(f"Job {job['_id']} ({job['type']}) attempt {job['attempts']} failed: {error}")
+        return status
+
+    @classmethod
+    def requeue_stale(cls) -> int:
+        """Fail the attempts of jobs whose worker stopped renewing their lease.
+
+        Like fail(): the job is re-queued with backoff, or marked failed once
+        it has used max_attempts, so a job that keeps killing its worker stops
+        being retried. Returns how many stale jobs were handled.
+        """
+        now = datetime.utcnow()
+        handled = 0
+        for job in cls.collection().find({'status': JobStatus.RUNNING, 'locked_at': {'$lt': now - cls.STALE_AFTER}}):
+            status, run_at = cls._after_failure(job, now)
+            error = f"Worker {job.get('locked_by')} stopped while running the job"
+            # Matching locked_at skips jobs another worker re-claimed in the meantime
+            result = cls.collection().update_one(
+                {'_id': job['_id'], 'status': JobStatus.RUNNING, 'locked_at': job['locked_at']},
+                {'$set': {'status': status, 'run_at': run_at, 'error': error, 'updated_at': now}}
+            )
+            if result.modified_count:
+                handled += 1
+                logger.warning(f"Job {job['_id']} ({job['type']}) attempt {job['attempts']} went stale: {status}")
+        return handled
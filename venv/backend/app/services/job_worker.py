@@ -0,0 +1,128 @@
+# services/job_worker.py
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+import logging
+import os
+import socket
+import threading
+
+from app.services.job_queue import JobQueue
+from app.services.job_handlers import JOB_HANDLERS, JobHandler, purge_expired_reports
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Thread pool that polls the jobs collection and runs the registered handlers."""
+
+    def __init__(self, app, threads: int = 4, poll_interval: float = 1.0, handlers: Dict[str, JobHandler] = None):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.handlers = handlers or JOB_HANDLERS
+        self.stop_event = threading.Event()
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def run(self) -> None:
+        workers = [
+            threading.Thread(target=self._loop, args=(f"{self.worker_prefix}:{index}",), daemon=True)
+            for index in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        logger.info(f"Job worker {self.worker_prefix} started with {self.threads} threads")
+
+        try:
+            while not self.stop_event.wait(60):
+                with self.app.app_context():
+                    requeued = JobQueue.requeue_stale()
+                    self.purge_expired_reports()
+                if requeued:
+                    logger.warning(f"Recovered {requeued} stale jobs")
+        except KeyboardInterrupt:
+            self.stop()
+
+        for worker in workers:
+            worker.join()
+
+    @staticmethod
+    def purge_expired_reports() -> None:
+        try:
+            purge_expired_reports()
+        except Exception as e:
+            logger.error(f"Report cleanup failed: {str(e)}", exc_info=True)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def _loop(self, worker_id: str) -> None:
+        with self.app.app_context():
+            while not self.stop_event.is_set():
+                try:
+                    if not self.run_once(worker_id):
+                        self.stop_event.wait(self.poll_interval)
+                except Exception as e:
+                    logger.error(f"Job worker {worker_id} error: {str(e)}", exc_info=True)
+                    self.stop_event.wait(self.poll_interval)
+
+    def run_once(self, worker_id: str) -> bool:
+        """Run one due job (or one batch); returns False when the queue is idle."""
+        batch_types = [job_type for job_type, handler in self.handlers.items() if handler.batch_size]
+        for job_type in batch_types:
+            jobs = JobQueue.claim_batch(worker_id, job_type, self.handlers[job_type].batch_size)
+            if jobs:
+                self._run_batch(self.handlers[job_type], jobs)
+                return True
+
+        job = JobQueue.claim(worker_id, exclude_types=batch_types)
+        if not job:
+            return False
+
+        handler = self.handlers.get(job['type'])
+        try:
+            if not handler:
+                raise ValueError(f"No handler registered for job type {job['type']}")
+            with self._lease([job]):
+                result = handler.run(job)
+            JobQueue.complete(job, result, datetime.utcnow() + handler.ttl() if handler.ttl else None)
+        except Exception as e:
+            JobQueue.fail(job, e)
+        return True
+
+    @contextmanager
+    def _lease(self, jobs: List[Dict]):
+        """Renew the jobs' lease while they run, so a long report is never handed to a second worker."""
+        done = threading.Event()
+
+        def renew():
+            with self.app.app_context():
+                while not done.wait(JobQueue.HEARTBEAT_INTERVAL.total_seconds()):
+                    try:
+                        JobQueue.heartbeat(jobs)
+                    except Exception as e:
+                        logger.warning(f"Job heartbeat failed: {str(e)}")
+
+        heartbeat = threading.Thread(target=renew, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def _run_batch(self, handler: JobHandler, jobs) -> None:
+        try:
+            with self._lease(jobs):
+                results = handler.run(jobs)
+        except Exception as e:
+            for job in jobs:
+                JobQueue.fail(job, e)
+            return
+
+        for job in jobs:
+            error = results.get(job['_id'])
+            if error:
+                JobQueue.fail(job, error)
+            else:
+                JobQueue.complete(job, expires_at=datetime.utcnow() + handler.ttl() if handler.ttl else None)
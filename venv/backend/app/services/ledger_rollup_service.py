@@ -0,0 +1,380 @@
+# services/ledger_rollup_service.py
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from app import mongo
+from app.utils.cache import TTLCache
+from pymongo import ASCENDING, DeleteOne, ReplaceOne, UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Counters kept on every rollup document
+ROLLUP_FIELDS = (
+    'units_purchased', 'amount_purchased', 'purchase_count',
+    'units_used', 'amount_used', 'redemption_count'
+)
+
+# Marker in the migrations collection written once the rollups cover all token history
+BACKFILL_MARKER = 'ledger_rollups_backfill'
+# Positive answers never go stale; a negative one is re-checked after the TTL
+backfill_cache = TTLCache('ledger_rollups_backfill', maxsize=1, ttl=60)
+
+
+def month_key(date: datetime) -> str:
+    """Rollup bucket for a timestamp, e.g. '2025-02'."""
+    return date.strftime('%Y-%m')
+
+
+def month_start(date: datetime) -> datetime:
+    return datetime(date.year, date.month, 1)
+
+
+def next_month_start(date: datetime) -> datetime:
+    if date.month == 12:
+        return datetime(date.year + 1, 1, 1)
+    return datetime(date.year, date.month + 1, 1)
+
+
+class LedgerRollupService:
+    """Per-user, per-utility, per-month totals maintained alongside the token history.
+
+    Purchases are bucketed by the token's created_at month and redemptions by
+    the month they were applied to a meter, so summaries read O(months)
+    documents instead of scanning utility_recharge_tokens.
+
+    New writes keep the rollups current, but history from before they existed
+    is only covered once backfill() has run (the rebuild_ledger_rollups job
+    create_app queues, or rebuild_ledger_rollups.py). Until then every read
+    recomputes the totals from token history instead.
+    """
+    UTILITY_TYPES = ['water', 'energy', 'gas']
+
+    @staticmethod
+    def collection():
+        return mongo.db.utility_ledger_rollups
+
+    @classmethod
+    def ensure_indexes(cls) -> None:
+        cls.collection().create_index(
+            [('user_email', ASCENDING), ('utility_type', ASCENDING), ('month', ASCENDING)],
+            name='user_email_utility_type_month',
+            unique=True
+        )
+
+    @staticmethod
+    def _selector(user_email: str, utility_type: str, at: datetime) -> Dict:
+        return {'user_email': user_email, 'utility_type': utility_type, 'month': month_key(at)}
+
+    @staticmethod
+    def _increment_update(counters: Dict[str, float]) -> Dict:
+        return {'$inc': counters, '$set': {'updated_at': datetime.utcnow()}}
+
+    @classmethod
+    def _increment(cls, user_email: str, utility_type: str, at: datetime,
+                   counters: Dict[str, float], session=None) -> None:
+        cls.collection().update_one(
+            cls._selector(user_email, utility_type, at),
+            cls._increment_update(counters),
+            upsert=True,
+            session=session
+        )
+
+    @classmethod
+    def record_purchase(cls, user_email: str, utility_type: str, units: float,
+                        amount: float, at: datetime, session=None) -> None:
+        """Add a token purchase to its month's rollup (call inside the purchase transaction)."""
+        cls._increment(user_email, utility_type, at, {
+            'units_purchased': units,
+            'amount_purchased': amount,
+            'purchase_count': 1
+        }, session=session)
+
+    @classmethod
+    def record_redemption(cls, user_email: str, utility_type: str, units: float,
+                          amount: float, at: datetime, session=None) -> None:
+        """Add a meter redemption to its month's rollup (call inside the recharge transaction)."""
+        cls._increment(user_email, utility_type, at, {
+            'units_used': units,
+            'amount_used': amount,
+            'redemption_count': 1
+        }, session=session)
+
+    @classmethod
+    def redemption_operation(cls, user_email: str, utility_type: str, units: float,
+                             amount: float, count: int, at: datetime) -> UpdateOne:
+        """bulk_write form of record_redemption covering `count` tokens."""
+        return UpdateOne(
+            cls._selector(user_email, utility_type, at),
+            cls._increment_update({
+                'units_used': units,
+                'amount_used': amount,
+                'redemption_count': count
+            }),
+            upsert=True
+        )
+
+    @staticmethod
+    def is_backfilled() -> bool:
+        return backfill_cache.get_or_load(
+            BACKFILL_MARKER, lambda: mongo.db.migrations.find_one({'_id': BACKFILL_MARKER}) is not None
+        )
+
+    @classmethod
+    def backfill(cls) -> List[Dict]:
+        """Rebuild every rollup from history and record that reads may rely on them."""
+        drift = cls.rebuild(apply=True)
+        mongo.db.migrations.update_one(
+            {'_id': BACKFILL_MARKER},
+            {'$set': {'completed_at': datetime.utcnow(), 'repaired': len(drift)}},
+            upsert=True
+        )
+        backfill_cache.clear()
+        logger.info(f"Ledger rollups backfilled, {len(drift)} rollup(s) written")
+        return drift
+
+    @classmethod
+    def totals_by_utility(cls, user_email: str, start_month: Optional[str] = None,
+                          end_month: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Sum the rollups per utility type, optionally for months in [start_month, end_month)."""
+        if not cls.is_backfilled():
+            return cls._totals_from_history(user_email, start_month, end_month)
+
+        match = {'user_email': user_email}
+        if start_month or end_month:
+            match['month'] = {}
+            if start_month:
+                match['month']['$gte'] = start_month
+            if end_month:
+                match['month']['$lt'] = end_month
+
+        group = {'_id': '$utility_type'}
+        group.update({field: {'$sum': f'${field}'} for field in ROLLUP_FIELDS})
+
+        totals = {t: dict.fromkeys(ROLLUP_FIELDS, 0) for t in cls.UTILITY_TYPES}
+        for row in cls.collection().aggregate([{'$match': match}, {'$group': group}]):
+            totals[row['_id']] = {field: row.get(field, 0) for field in ROLLUP_FIELDS}
+        return totals
+
+    @classmethod
+    def _totals_from_history(cls, user_email: str, start_month: Optional[str],
+                             end_month: Optional[str]) -> Dict[str, Dict[str, float]]:
+        """totals_by_utility computed from token history, for before the backfill."""
+        totals = {t: dict.fromkeys(ROLLUP_FIELDS, 0) for t in cls.UTILITY_TYPES}
+        for (_, utility_type, month), counters in cls._rollups_from_history(user_email).items():
+            if (start_month and month < start_month) or (end_month and month >= end_month):
+                continue
+            entry = totals.setdefault(utility_type, dict.fromkeys(ROLLUP_FIELDS, 0))
+            for field in ROLLUP_FIELDS:
+                entry[field] += counters[field]
+        return totals
+
+    @staticmethod
+    def _split_period(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+        """First and last month boundary inside [start, end]; the whole months lie between them."""
+        full_start = start if start == month_start(start) else next_month_start(start)
+        return full_start, month_start(end)
+
+    @classmethod
+    def period_summary(cls, user_email: str, start: datetime, end: datetime,
+                       utility_type: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Purchase totals per utility type for tokens created in [start, end].
+
+        Whole calendar months inside the window come from the rollups; only
+        the partial months at either edge are scanned from token history.
+        """
+        full_start, full_end = cls._split_period(start, end)
+
+        if full_start >= full_end or not cls.is_backfilled():
+            return cls._scan_summary(user_email, [(start, end)], utility_type)
+
+        summary = cls._scan_summary(user_email, [(start, full_start), (full_end, end)], utility_type)
+        rollups = cls.totals_by_utility(user_email, month_key(full_start), month_key(full_end))
+        for rollup_type, totals in rollups.items():
+            if utility_type and rollup_type != utility_type:
+                continue
+            if not totals['purchase_count']:
+                continue
+            entry = summary.setdefault(rollup_type, {'total_units': 0, 'total_amount': 0, 'count': 0})
+            entry['total_units'] += totals['units_purchased']
+            entry['total_amount'] += totals['amount_purchased']
+            entry['count'] += totals['purchase_count']
+        return summary
+
+    @classmethod
+    def period_usage(cls, user_email: str, start: datetime, end: datetime,
+                     utility_type: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Redemption totals per utility type for tokens applied to a meter in [start, end].
+
+        Split like period_summary, so the two describe the same window.
+        """
+        full_start, full_end = cls._split_period(start, end)
+
+        if full_start >= full_end or not cls.is_backfilled():
+            return cls._scan_usage(user_email, [(start, end)], utility_type)
+
+        usage = cls._scan_usage(user_email, [(start, full_start), (full_end, end)], utility_type)
+        rollups = cls.totals_by_utility(user_email, month_key(full_start), month_key(full_end))
+        for rollup_type, totals in rollups.items():
+            if utility_type and rollup_type != utility_type:
+                continue
+            if not totals['redemption_count']:
+                continue
+            entry = usage.setdefault(rollup_type, {'units_used': 0, 'amount_used': 0, 'redemption_count': 0})
+            for field in entry:
+                entry[field] += totals[field]
+        return usage
+
+    @staticmethod
+    def _windows(ranges: List[Tuple[datetime, datetime]]) -> List[Dict]:
+        """Range conditions, half-open except for the last, which includes its end."""
+        windows = []
+        for index, (range_start, range_end) in enumerate(ranges):
+            if range_start > range_end:
+                continue
+            upper = '$lte' if index == len(ranges) - 1 else '$lt'
+            windows.append({'$gte': range_start, upper: range_end})
+        return windows
+
+    @classmethod
+    def _scan_summary(cls, user_email: str, ranges: List[Tuple[datetime, datetime]],
+                      utility_type: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Aggregate raw tokens created in the given ranges."""
+        windows = cls._windows(ranges)
+        if not windows:
+            return {}
+
+        match = {'user_email': user_email, '$or': [{'created_at': window} for window in windows]}
+        if utility_type:
+            match['utility_type'] = utility_type
+
+        aggregations = mongo.db.utility_recharge_tokens.aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': '$utility_type',
+                'total_units': {'$sum': '$units'},
+                'total_amount': {'$sum': '$total_amount'},
+                'count': {'$sum': 1}
+            }}
+        ])
+        return {agg['_id']: {
+            'total_units': agg['total_units'],
+            'total_amount': agg['total_amount'],
+            'count': agg['count']
+        } for agg in aggregations}
+
+    @classmethod
+    def _scan_usage(cls, user_email: str, ranges: List[Tuple[datetime, datetime]],
+                    utility_type: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Aggregate raw tokens redeemed in the given ranges (bucketed like rebuild: used_at, else created_at)."""
+        windows = cls._windows(ranges)
+        if not windows:
+            return {}
+
+        conditions = []
+        for window in windows:
+            conditions.append({'used_at': window})
+            conditions.append({'used_at': None, 'created_at': window})
+        match = {'user_email': user_email, 'status': {'$ne': 'active'}, '$or': conditions}
+        if utility_type:
+            match['utility_type'] = utility_type
+
+        aggregations = mongo.db.utility_recharge_tokens.aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': '$utility_type',
+                'units_used': {'$sum': '$units'},
+                'amount_used': {'$sum': '$total_amount'},
+                'redemption_count': {'$sum': 1}
+            }}
+        ])
+        return {agg['_id']: {
+            'units_used': agg['units_used'],
+            'amount_used': agg['amount_used'],
+            'redemption_count': agg['redemption_count']
+        } for agg in aggregations}
+
+    @staticmethod
+    def _rollups_from_history(user_email: Optional[str] = None) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+        """Recompute every rollup from utility_recharge_tokens."""
+        match = {'user_email': user_email} if user_email else {}
+        purchases = mongo.db.utility_recharge_tokens.aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': {
+                    'user_email': '$user_email',
+                    'utility_type': '$utility_type',
+                    'month': {'$dateToString': {'format': '%Y-%m', 'date': '$created_at'}}
+                },
+                'units_purchased': {'$sum': '$units'},
+                'amount_purchased': {'$sum': '$total_amount'},
+                'purchase_count': {'$sum': 1}
+            }}
+        ])
+        redemptions = mongo.db.utility_recharge_tokens.aggregate([
+            {'$match': dict(match, status={'$ne': 'active'})},
+            {'$group': {
+                '_id': {
+                    'user_email': '$user_email',
+                    'utility_type': '$utility_type',
+                    'month': {'$dateToString': {
+                        'format': '%Y-%m',
+                        'date': {'$ifNull': ['$used_at', '$created_at']}
+                    }}
+                },
+                'units_used': {'$sum': '$units'},
+                'amount_used': {'$sum': '$total_amount'},
+                'redemption_count': {'$sum': 1}
+            }}
+        ])
+
+        expected = {}
+        for row in list(purchases) + list(redemptions):
+            key = (row['_id']['user_email'], row['_id']['utility_type'], row['_id']['month'])
+            counters = expected.setdefault(key, dict.fromkeys(ROLLUP_FIELDS, 0))
+            counters.update({field: row[field] for field in ROLLUP_FIELDS if field in row})
+        return expected
+
+    @classmethod
+    def rebuild(cls, user_email: Optional[str] = None, apply: bool = True) -> List[Dict]:
+        """Compare the stored rollups with token history and report any drift.
+
+        With apply=True the drifted documents are rewritten (and orphaned
+        ones removed) so the collection matches history again.
+        """
+        expected = cls._rollups_from_history(user_email)
+        stored = {
+            (doc['user_email'], doc['utility_type'], doc['month']): doc
+            for doc in cls.collection().find({'user_email': user_email} if user_email else {})
+        }
+
+        drift = []
+        operations = []
+        for key in sorted(set(expected) | set(stored)):
+            want = expected.get(key, dict.fromkeys(ROLLUP_FIELDS, 0))
+            have = {field: stored.get(key, {}).get(field, 0) for field in ROLLUP_FIELDS}
+            if all(abs(want[field] - have[field]) < 1e-6 for field in ROLLUP_FIELDS):
+                continue
+
+            user, utility_type, month = key
+            drift.append({
+                'user_email': user,
+                'utility_type': utility_type,
+                'month': month,
+                'expected': want,
+                'stored': have if key in stored else None
+            })
+            selector = {'user_email': user, 'utility_type': utility_type, 'month': month}
+            if key in expected:
+                operations.append(ReplaceOne(
+                    selector,
+                    dict(selector, updated_at=datetime.utcnow(), **want),
+                    upsert=True
+                ))
+            else:
+                operations.append(DeleteOne(selector))
+
+        if apply and operations:
+            cls.collection().bulk_write(operations, ordered=False)
+            logger.info(f"Rewrote {len(operations)} drifted ledger rollups")
+
+        return drift
@@ -0,0 +1,28 @@
+import logging
+import smtplib
+from email.mime.text import MIMEText
+
+logger = logging.getLogger(__name__)
+
+def send_token_email(to_email, token):
+    # Email configuration
+    sender_email = 'your-email@gmail.com'
+    sender_password = 'your-email-password'
+    subject = 'Your Purchased Token'
+    body = f'Your token is: {token}'
+
+    # Create the email
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = sender_email
+    msg['To'] = to_email
+
+    # Send the email
+    try:
+        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+            server.starttls()
+            server.login(sender_email, sender_password)
+            server.sendmail(sender_email, to_email, msg.as_string())
+        logger.info(f'Token email sent to {to_email}')
+    except Exception as e:
+        logger.error(f'Failed to send token email to {to_email}: {e}')
\ No newline at end of file
@@ -0,0 +1,201 @@
+# services/redemption_service.py
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime
+from collections import defaultdict
+from bson import ObjectId
+from app import mongo
+from app.services.ledger_rollup_service import LedgerRollupService
+from pymongo import UpdateOne
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+class RedemptionStatus:
+    REDEEMED = 'redeemed'
+    ALREADY_USED = 'already_used'
+    NOT_FOUND = 'not_found'
+    INVALID_REQUEST = 'invalid_request'
+    UTILITY_MISMATCH = 'utility_mismatch'
+    DUPLICATE = 'duplicate_in_batch'
+    RACE_LOST = 'race_lost'
+    BALANCE_NOT_FOUND = 'balance_not_found'
+
+
+class RedemptionAborted(Exception):
+    """Raised inside the transaction so nothing from the batch is committed"""
+
+
+class TokenRedemptionService:
+    """Redeem many (meter_id, token) pairs with one read and one transaction.
+
+    Tokens are validated with a single $in query; token status, utility
+    balances and ledger rollups are then updated with bulk_write inside one
+    transaction. A token redeemed concurrently by another request between
+    the read and the write is reported as race_lost; a token whose owner has
+    no utilities_balance document is left active and reported as
+    balance_not_found.
+    """
+    MAX_BATCH_SIZE = 1000
+    TOKEN_PATTERN = re.compile(r"^\d{4}-\d{4}-\d{4}-\d{4}$")
+
+    @classmethod
+    def redeem_batch(cls, redemptions: List[Dict], owner: Optional[str] = None) -> List[Dict]:
+        """Redeem a batch; with `owner`, tokens belonging to anyone else are reported as not_found"""
+        requests = [r if isinstance(r, dict) else {} for r in redemptions]
+        results = [
+            {'meter_id': r.get('meter_id'), 'token': r.get('token'), 'status': None}
+            for r in requests
+        ]
+
+        # Format checks and in-batch duplicates need no database access
+        pending = {}
+        for index, redemption in enumerate(requests):
+            token = redemption.get('token')
+            if not redemption.get('meter_id') or not isinstance(token, str) or not cls.TOKEN_PATTERN.match(token):
+                results[index]['status'] = RedemptionStatus.INVALID_REQUEST
+            elif token in pending:
+                results[index]['status'] = RedemptionStatus.DUPLICATE
+            else:
+                pending[token] = index
+
+        records = {
+            record['recharge_token']: record
+            for record in mongo.db.utility_recharge_tokens.find(
+                {'recharge_token': {'$in': list(pending)}},
+                {'recharge_token': 1, 'user_email': 1, 'utility_type': 1,
+                 'units': 1, 'total_amount': 1, 'status': 1}
+            )
+        } if pending else {}
+
+        candidates = []
+        for token, index in pending.items():
+            record = records.get(token)
+            requested_type = requests[index].get('utility_type')
+            if not record or (owner is not None and record['user_email'] != owner):
+                results[index]['status'] = RedemptionStatus.NOT_FOUND
+            elif record['status'] != 'active':
+                results[index]['status'] = RedemptionStatus.ALREADY_USED
+            elif requested_type and requested_type != record['utility_type']:
+                results[index]['status'] = RedemptionStatus.UTILITY_MISMATCH
+            else:
+                candidates.append((index, record))
+
+        redeemed, unfunded = cls._apply(candidates, requests) if candidates else (set(), set())
+        for index, record in candidates:
+            if record['_id'] in unfunded:
+                results[index]['status'] = RedemptionStatus.BALANCE_NOT_FOUND
+            elif record['_id'] in redeemed:
+                results[index].update({
+                    'status': RedemptionStatus.REDEEMED,
+                    'utility_type': record['utility_type'],
+                    'units': record['units']
+                })
+            else:
+                results[index]['status'] = RedemptionStatus.RACE_LOST
+
+        return results
+
+    @classmethod
+    def _apply(cls, candidates: List[Tuple[int, Dict]],
+               requests: List[Dict]) -> Tuple[Set[ObjectId], Set[ObjectId]]:
+        """Write every candidate redemption in one transaction.
+
+        Returns (token ids redeemed, token ids skipped because the owner has no balance document).
+        """
+        batch_id = ObjectId()
+        applied_at = datetime.utcnow()
+
+        def apply_in_transaction(session):
+            # Tokens are only burnt when there is a balance to move their units out of.
+            # Balances created at registration are keyed by 'type' rather than 'utility_type'.
+            funded = {
+                (doc['user_email'], doc.get('utility_type') or doc.get('type')): doc['_id']
+                for doc in mongo.db.utilities_balance.find(
+                    {'user_email': {'$in': sorted({record['user_email'] for _, record in candidates})}},
+                    {'user_email': 1, 'utility_type': 1, 'type': 1},
+                    session=session
+                )
+            }
+            unfunded = {
+                record['_id'] for _, record in candidates
+                if (record['user_email'], record['utility_type']) not in funded
+            }
+            eligible = [(index, record) for index, record in candidates if record['_id'] not in unfunded]
+            if not eligible:
+                return set(), unfunded
+            token_ids = [record['_id'] for _, record in eligible]
+
+            result = mongo.db.utility_recharge_tokens.bulk_write([
+                UpdateOne(
+                    {'_id': record['_id'], 'status': 'active'},
+                    {'$set': {
+                        'status': 'used',
+                        'used_at': applied_at,
+                        'meter_id': requests[index]['meter_id'],
+                        'redemption_batch': batch_id
+                    }}
+                )
+                for index, record in eligible
+            ], ordered=False, session=session)
+
+            won = eligible
+            if result.modified_count < len(eligible):
+                # Some tokens were redeemed elsewhere after our read
+                won_ids = {
+                    doc['_id'] for doc in mongo.db.utility_recharge_tokens.find(
+                        {'_id': {'$in': token_ids}, 'redemption_batch': batch_id},
+                        {'_id': 1},
+                        session=session
+                    )
+                }
+                won = [(index, record) for index, record in eligible if record['_id'] in won_ids]
+
+            totals = defaultdict(lambda: {'units': 0, 'amount': 0, 'count': 0, 'history': []})
+            for index, record in won:
+                entry = totals[(record['user_email'], record['utility_type'])]
+                entry['units'] += record['units']
+                entry['amount'] += record.get('total_amount', 0)
+                entry['count'] += 1
+                entry['history'].append({
+                    'token': record['recharge_token'],
+                    'units': record['units'],
+                    'meter_id': requests[index]['meter_id'],
+                    'timestamp': applied_at
+                })
+
+            if totals:
+                balances = mongo.db.utilities_balance.bulk_write([
+                    UpdateOne(
+                        {'_id': funded[(user_email, utility_type)]},
+                        {
+                            '$inc': {'units': -entry['units']},
+                            '$push': {'recharge_history': {'$each': entry['history']}},
+                            '$set': {'last_updated': applied_at}
+                        }
+                    )
+                    for (user_email, utility_type), entry in totals.items()
+                ], ordered=False, session=session)
+                if balances.matched_count != len(totals):
+                    # A balance document vanished since the check above; commit none of it
+                    raise RedemptionAborted(
+                        f"{len(totals) - balances.matched_count} balance documents missing in batch {batch_id}"
+                    )
+                LedgerRollupService.collection().bulk_write([
+                    LedgerRollupService.redemption_operation(
+                        user_email, utility_type, entry['units'], entry['amount'], entry['count'], applied_at
+                    )
+                    for (user_email, utility_type), entry in totals.items()
+                ], ordered=False, session=session)
+
+            return {record['_id'] for _, record in won}, unfunded
+
+        # with_transaction retries the whole callback on transient write conflicts
+        with mongo.db.client.start_session() as session:
+            redeemed, unfunded = session.with_transaction(apply_in_transaction)
+
+        if unfunded:
+            logger.warning(f"Redemption batch {batch_id}: {len(unfunded)} tokens skipped, owner has no balance")
+        logger.info(f"Redemption batch {batch_id}: {len(redeemed)}/{len(candidates)} tokens redeemed")
+        return redeemed, unfunded
@@ -0,0 +1,84 @@
+# services/user_service.py
+from typing import Dict, List, Optional
+from datetime import datetime
+from bson import ObjectId
+from app import mongo
+from app.utils.cache import TTLCache, invalidate_on_change
+from dataclasses import dataclass
+
+# Looked up on every message send and dashboard load; profile writes invalidate
+user_cache = TTLCache('users', maxsize=4096, ttl=60)
+registered_users_cache = TTLCache('registered_users', maxsize=1, ttl=60)
+
+@dataclass
+class UserProfile:
+    user_id: str
+    first_name: str
+    last_name: str
+    email: str
+    phone_number: str
+    address: str
+    avatar: str
+    created_at: datetime
+    last_login: datetime
+
+    @classmethod
+    def from_db(cls, user_data: Dict) -> 'UserProfile':
+        return cls(
+            user_id=str(user_data['_id']),
+            first_name=user_data['firstName'],
+            last_name=user_data['lastName'],
+            email=user_data['email'],
+            phone_number=user_data.get('phoneNumber', 'N/A'),
+            address=user_data.get('address', 'N/A'),
+            avatar=user_data.get('avatar', ''),
+            created_at=user_data.get('createdAt'),
+            last_login=user_data.get('lastLogin')
+        )
+
+class UserService:
+    @staticmethod
+    def get_user(email: str) -> Optional[Dict]:
+        """Cached user document (read-only), or None if no such user."""
+        return user_cache.get_or_load(email, lambda: mongo.db.users.find_one({"email": email}))
+
+    @staticmethod
+    def registered_emails() -> List[str]:
+        return registered_users_cache.get_or_load(
+            'emails', lambda: [user['email'] for user in mongo.db.users.find({}, {'email': 1})]
+        )
+
+    @staticmethod
+    def invalidate_user(email: Optional[str] = None) -> None:
+        """Drop one cached user (or all of them when the email is unknown) and the user list."""
+        if email:
+            user_cache.invalidate(email)
+        else:
+            user_cache.clear()
+        registered_users_cache.clear()
+
+    @staticmethod
+    def get_profile(email: str) -> Optional[UserProfile]:
+        user = UserService.get_user(email)
+        return UserProfile.from_db(user) if user else None
+
+    @staticmethod
+    def update_profile(email: str, update_data: Dict) -> bool:
+        valid_fields = {'phoneNumber', 'address', 'avatar'}
+        update_fields = {
+            k: v for k, v in update_data.items() 
+            if k in valid_fields and (k != 'avatar' or v.startswith("data:image"))
+        }
+        
+        if not update_fields:
+            return False
+            
+        result = mongo.db.users.update_one(
+            {"email": email},
+            {"$set": update_fields}
+        )
+        UserService.invalidate_user(email)
+        return result.modified_count > 0
+
+
+invalidate_on_change('users', lambda user: UserService.invalidate_user(user.get('email') if user else None))
\ No newline at end of file
@@ -0,0 +1,337 @@
+# services/utility_service.py
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from app import mongo
+from app.services.ledger_rollup_service import LedgerRollupService
+from app.utils.cache import TTLCache, invalidate_on_change
+from pymongo import ASCENDING, DESCENDING
+import logging
+from http import HTTPStatus
+
+logger = logging.getLogger(__name__)
+
+# Tariffs change a few times a year; writers invalidate, the TTL bounds anything missed
+unit_price_cache = TTLCache('unit_prices', maxsize=32, ttl=300)
+
+@dataclass
+class UtilityStats:
+    type: str
+    purchased: float
+    purchased_cost: float
+    used: float
+    used_cost: float
+    balance: float
+    balance_cost: float
+
+    @classmethod
+    def calculate(cls, utility_type: str, purchases: List[Dict], usage: List[Dict]) -> 'UtilityStats':
+        total_purchased = sum(txn["units"] for txn in purchases)
+        total_purchased_cost = sum(txn["amount"] for txn in purchases)
+        total_used = sum(usg["units"] for usg in usage)
+        total_used_cost = sum(usg["cost"] for usg in usage)
+        
+        return cls(
+            type=utility_type,
+            purchased=total_purchased,
+            purchased_cost=total_purchased_cost,
+            used=total_used,
+            used_cost=total_used_cost,
+            balance=total_purchased - total_used,
+            balance_cost=total_purchased_cost - total_used_cost
+        )
+
+    @classmethod
+    def from_rollup(cls, utility_type: str, totals: Dict[str, float]) -> 'UtilityStats':
+        return cls(
+            type=utility_type,
+            purchased=totals['units_purchased'],
+            purchased_cost=totals['amount_purchased'],
+            used=totals['units_used'],
+            used_cost=totals['amount_used'],
+            balance=totals['units_purchased'] - totals['units_used'],
+            balance_cost=totals['amount_purchased'] - totals['amount_used']
+        )
+
+@dataclass
+class UtilityBalance:
+    utility_type: str
+    total: float
+    used: float
+    purchased: float
+    cost: float
+    remaining_units: float
+    remaining_cost: float
+
+    @classmethod
+    def from_db(cls, data):
+        return cls(
+            utility_type=data.get('utility_type', ''),
+            total=data.get('units', 0),  # Ensure correct key
+            used=data.get('used', 0),  # Add missing fields if necessary
+            purchased=data.get('purchased', 0),
+            cost=data.get('cost', 0),
+            remaining_units=data.get('remaining_units', 0),
+            remaining_cost=data.get('remaining_cost', 0)
+        )
+
+
+class UtilityService:
+    UTILITY_TYPES = ['water', 'energy', 'gas']
+
+    @classmethod
+    def get_unit_price(cls, utility_type: str) -> float:
+        """Fetch unit price for a given utility type (cached)."""
+        def load():
+            price_record = mongo.db.utility_unit_prices.find_one({"utility_type": utility_type})
+            return price_record["price_per_unit"] if price_record else 0
+        return unit_price_cache.get_or_load(utility_type, load)
+
+    @classmethod
+    def set_unit_prices(cls, prices: List[Dict]) -> None:
+        """Upsert tariff documents (keyed by utility_type) and drop the cached prices."""
+        for price in prices:
+            mongo.db.utility_unit_prices.update_one(
+                {"utility_type": price["utility_type"]},
+                {"$set": price},
+                upsert=True
+            )
+        cls.invalidate_unit_prices()
+
+    @staticmethod
+    def invalidate_unit_prices(document: Optional[Dict] = None) -> None:
+        if document and document.get("utility_type"):
+            unit_price_cache.invalidate(document["utility_type"])
+        else:
+            unit_price_cache.clear()
+
+    @classmethod
+    def get_utility_stats(cls, user_email: str) -> List[UtilityStats]:
+        totals = LedgerRollupService.totals_by_utility(user_email)
+        return [UtilityStats.from_rollup(utility, totals[utility]) for utility in cls.UTILITY_TYPES]
+
+    @classmethod
+    def get_utility_balances(cls, user_email: str) -> List[UtilityBalance]:
+        stats = list(mongo.db.utilities_balance.find({'userEmail': user_email}))  # Fetch all utilities
+
+        if not stats:
+            return [UtilityBalance(utility_type=t, total=0, used=0, purchased=0, 
+                                cost=0, remaining_units=0, remaining_cost=0)
+                    for t in cls.UTILITY_TYPES]
+
+        # Create a dictionary to map utilities
+        utility_map = {stat['utility_type']: stat for stat in stats}
+
+        return [
+            UtilityBalance.from_db(utility_map[t]) if t in utility_map else UtilityBalance(utility_type=t, total=0, used=0, purchased=0, cost=0, remaining_units=0, remaining_cost=0)
+            for t in cls.UTILITY_TYPES
+        ]
+
+    from typing import List, Dict
+
+ 
+
+    @classmethod
+    def get_all_utility_balances(cls, user_email: str) -> List[Dict[str, float]]:
+        # Fetch the latest balance for each utility type
+        balances = list(mongo.db.utilities_balance.find({'user_email': user_email}))
+        logger.debug(f"Found {len(balances)} utility balances for {user_email}")
+
+        # Create a mapping of utility types to their latest balance
+        utility_map = {b['utility_type']: b for b in balances}
+
+        # Construct response ensuring all utility types are included
+        return [
+            {
+                "utility_type": utility_type,
+                "units": utility_map.get(utility_type, {}).get("units", 0)
+            }
+            for utility_type in cls.UTILITY_TYPES
+        ]
+
+
+    class UtilityService:
+        UTILITY_TYPES = ['water', 'energy', 'gas']
+
+    @classmethod
+    def get_specific_utility_balance(cls, user_email: str, utility_type: str) -> Optional[float]:
+        if utility_type not in cls.UTILITY_TYPES:
+            return None
+
+        # Find the latest balance data for the specific utility
+        balance_data = mongo.db.utilities_balance.find_one(
+            {'user_email': user_email, 'utility_type': utility_type},
+            sort=[('last_updated', -1)]  # Sort by last_updated in descending order
+        )
+
+        # Return the balance if it exists, or 0 if not
+        return balance_data.get('units', 0) if balance_data else 0
+
+    @classmethod
+    def add_utility_units(cls, user_email: str, utility_type: str, units: float, amount: float) -> float:
+        if utility_type not in cls.UTILITY_TYPES:
+            return None
+
+        existing_balance = mongo.db.utility_balances.find_one({'userEmail': user_email}) or {}
+
+        new_balance = existing_balance.get(utility_type, 0) + units
+        total_cost = existing_balance.get(f"{utility_type}_cost", 0) + amount
+
+        mongo.db.utility_balances.update_one(
+            {'userEmail': user_email},
+            {'$set': {utility_type: new_balance, f"{utility_type}_cost": total_cost}},
+            upsert=True
+        )
+
+        return new_balance
+
+    @classmethod
+    def deduct_utility_units(cls, user_email: str, utility_type: str, units: float) -> Optional[float]:
+        if utility_type not in cls.UTILITY_TYPES:
+            return None
+
+        balance_data = mongo.db.utility_balances.find_one({'userEmail': user_email})
+        if not balance_data or balance_data.get(utility_type, 0) < units:
+            return None  # Insufficient balance
+
+        new_balance = balance_data[utility_type] - units
+
+        mongo.db.utility_balances.update_one(
+            {'userEmail': user_email},
+            {'$set': {utility_type: new_balance}}
+        )
+
+        return new_balance
+
+    @classmethod
+    def get_utility_transactions(cls, user_email: str) -> List[Dict]:
+        transactions = mongo.db.transactions.find({'user_email': user_email}).sort("date", DESCENDING)
+        return [{**txn, '_id': str(txn['_id'])} for txn in transactions]
+
+    # Compound index backing the monthly aggregation (equality on the user,
+    # range on created_at) and the keyset-paginated listing, which sorts on
+    # (created_at, _id).
+    MONTHLY_DATA_INDEX = [("user_email", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+
+    @classmethod
+    def ensure_indexes(cls) -> None:
+        """Create the indexes used by the utility dashboard and transaction listing queries."""
+        mongo.db.utility_recharge_tokens.create_index(
+            cls.MONTHLY_DATA_INDEX, name="user_email_created_at_id"
+        )
+
+    @classmethod
+    def get_unit_prices(cls, utility_types: List[str]) -> Dict[str, float]:
+        """Fetch unit prices for several utility types, loading any uncached ones in one round trip."""
+        prices = {}
+        generation = unit_price_cache.generation
+        for utility_type in utility_types:
+            price = unit_price_cache.get(utility_type)
+            if price is not None:
+                prices[utility_type] = price
+        missing = [utility_type for utility_type in utility_types if utility_type not in prices]
+        if missing:
+            records = mongo.db.utility_unit_prices.find(
+                {"utility_type": {"$in": missing}},
+                {"utility_type": 1, "price_per_unit": 1}
+            )
+            loaded = {record["utility_type"]: record["price_per_unit"] for record in records}
+            for utility_type in missing:
+                prices[utility_type] = loaded.get(utility_type, 0)
+                unit_price_cache.set(utility_type, prices[utility_type], generation)
+        return prices
+
+    @staticmethod
+    def monthly_totals_pipeline(user_email: str, first_day_of_last_month: datetime,
+                                first_day_of_month: datetime) -> List[Dict]:
+        """Build the single-pass $group pipeline over utility_recharge_tokens.
+
+        Tokens from last month feed the brought-forward figure (units still
+        unredeemed), tokens from this month feed the purchased/used totals.
+        Non-active tokens are considered used.
+        """
+        this_month = {"$gte": ["$created_at", first_day_of_month]}
+        last_month = {"$lt": ["$created_at", first_day_of_month]}
+        used = {"$ne": ["$status", "active"]}
+
+        def sum_if(condition, field):
+            return {"$sum": {"$cond": [condition, f"${field}", 0]}}
+
+        return [
+            {"$match": {
+                "user_email": user_email,
+                "created_at": {"$gte": first_day_of_last_month}
+            }},
+            {"$group": {
+                "_id": "$utility_type",
+                "last_month_purchased": sum_if(last_month, "units"),
+                "last_month_used": sum_if({"$and": [last_month, used]}, "units"),
+                "units_purchased": sum_if(this_month, "units"),
+                "cost_purchased": sum_if(this_month, "total_amount"),
+                "units_used": sum_if({"$and": [this_month, used]}, "units"),
+                "cost_used": sum_if({"$and": [this_month, used]}, "total_amount"),
+            }}
+        ]
+
+    @classmethod
+    def get_monthly_utility_data(cls, user_email: str) -> List[Dict]:
+        current_date = datetime.utcnow()
+        first_day_of_month = datetime(current_date.year, current_date.month, 1)
+        last_month = first_day_of_month - timedelta(days=1)
+        first_day_of_last_month = datetime(last_month.year, last_month.month, 1)
+
+        # Utility types the user holds a balance for, in storage order
+        utilities_data = mongo.db.utilities_balance.find(
+            {"user_email": user_email},
+            {"utility_type": 1, "type": 1}
+        )
+        utility_types = []
+        for utility in utilities_data:
+            utility_type = utility.get("utility_type") or utility.get("type")  # Handle both cases
+            if utility_type:
+                utility_types.append(utility_type)
+
+        if not utility_types:
+            return []
+
+        # One aggregation for every utility type instead of three queries each
+        totals = {
+            row["_id"]: row
+            for row in mongo.db.utility_recharge_tokens.aggregate(
+                cls.monthly_totals_pipeline(user_email, first_day_of_last_month, first_day_of_month)
+            )
+        }
+        unit_prices = cls.get_unit_prices(set(utility_types))
+
+        response_data = []
+        for utility_type in utility_types:
+            row = totals.get(utility_type, {})
+            units_balance_brought_forward = row.get("last_month_purchased", 0) - row.get("last_month_used", 0)
+            units_purchased_to_date = row.get("units_purchased", 0)
+            cost_of_units_purchased_to_date = row.get("cost_purchased", 0)
+            units_used_to_date = row.get("units_used", 0)
+            cost_of_units_used_to_date = row.get("cost_used", 0)
+
+            unit_price = unit_prices[utility_type]
+            total_units_to_date = units_purchased_to_date + units_balance_brought_forward
+            total_costs_to_date = total_units_to_date * unit_price  # This calculates the cost for the units bought
+
+            units_balance_remaining_to_date = units_balance_brought_forward + units_purchased_to_date - units_used_to_date
+
+            response_data.append({
+                "utility_type": utility_type,
+                "units_balance_brought_forward": units_balance_brought_forward,
+                "units_purchased_to_date": units_purchased_to_date,
+                "units_used_to_date": units_used_to_date,
+                "cost_of_units_used_to_date": cost_of_units_used_to_date,
+                "cost_of_units_purchased_to_date": cost_of_units_purchased_to_date,
+                "units_balance_remaining_to_date": units_balance_remaining_to_date,
+                "unit_price": unit_price,  # Include the unit price in the response
+                "total_costs_to_date": total_costs_to_date,  # total costs of units brought forward and purchased units to date  based on unit price
+                "total_units_to_date": total_units_to_date
+            })
+
+        return response_data
+
+
+invalidate_on_change('utility_unit_prices', UtilityService.invalidate_unit_prices)
@@ -0,0 +1,27 @@
+# services/wallet_service.py
+from typing import Optional
+from app import mongo
+from app.utils.cache import TTLCache, invalidate_on_change
+
+# Balance display only; the purchase path always reads the wallet fresh
+balance_cache = TTLCache('wallet_balances', maxsize=4096, ttl=30)
+
+class WalletService:
+    @staticmethod
+    def get_balance(user_email: str) -> float:
+        def load():
+            wallet = mongo.db.wallet_balance.find_one({'user_email': user_email}, {'balance': 1})
+            return float(wallet.get('balance', 0)) if wallet else 0.0
+        return balance_cache.get_or_load(user_email, load)
+
+    @staticmethod
+    def invalidate_balance(user_email: Optional[str] = None) -> None:
+        if user_email:
+            balance_cache.invalidate(user_email)
+        else:
+            balance_cache.clear()
+
+
+invalidate_on_change(
+    'wallet_balance', lambda wallet: WalletService.invalidate_balance(wallet.get('user_email') if wallet else None)
+)
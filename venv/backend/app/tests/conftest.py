@@ -0,0 +1,42 @@
+# backend/app/tests/conftest.py
+import sys
+import os
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import mongo
+from app.utils.cache import CACHES
+
+
+class FakeSession:
+    """Transaction-less session: mongomock rejects real sessions but ignores a falsy one"""
+
+    def __bool__(self):
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def start_transaction(self):
+        return self
+
+    def with_transaction(self, callback, **kwargs):
+        return callback(self)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Swap the shared PyMongo handle for an in-memory mongomock database"""
+    database = mongomock.MongoClient().token_meter_recharge
+    monkeypatch.setattr(database.client, 'start_session', lambda **kwargs: FakeSession(), raising=False)
+    monkeypatch.setattr(mongo, 'db', database, raising=False)
+    # Caches are process-wide; start every test from empty ones
+    for cache in CACHES.values():
+        cache.clear()
+    return database
@@ -0,0 +1,100 @@
+# backend/app/tests/test_cache.py
+from app.services.user_service import UserService
+from app.services.utility_service import UtilityService, unit_price_cache
+from app.services.wallet_service import WalletService
+from app.utils.cache import TTLCache, change_streams_supported, notify_change
+
+EMAIL = 'leonard1@gmail.com'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expires():
+    clock = FakeClock()
+    cache = TTLCache('test_lru', maxsize=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    clock.now = 11
+    assert cache.get('c') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (2, 2, 1, 1)
+
+
+def test_load_that_raced_an_invalidation_is_not_cached():
+    cache = TTLCache('test_race', maxsize=4, ttl=10)
+
+    def stale_load():
+        cache.invalidate('price')  # a writer commits while we are reading
+        return 'old'
+
+    assert cache.get_or_load('price', stale_load) == 'old'
+    assert cache.get_or_load('price', lambda: 'new') == 'new'
+
+
+def test_unit_prices_are_cached_until_invalidated(db):
+    UtilityService.set_unit_prices([{'utility_type': 'water', 'price_per_unit': 1.5}])
+    assert UtilityService.get_unit_price('water') == 1.5
+
+    db.utility_unit_prices.update_one({'utility_type': 'water'}, {'$set': {'price_per_unit': 9.0}})
+    assert UtilityService.get_unit_price('water') == 1.5
+    assert UtilityService.get_unit_prices(['water', 'gas']) == {'water': 1.5, 'gas': 0}
+
+    notify_change('utility_unit_prices', {'utility_type': 'water', 'price_per_unit': 9.0})
+    assert UtilityService.get_unit_price('water') == 9.0
+
+    UtilityService.set_unit_prices([{'utility_type': 'gas', 'price_per_unit': 2.0}])
+    assert UtilityService.get_unit_prices(['water', 'gas']) == {'water': 9.0, 'gas': 2.0}
+    assert unit_price_cache.stats()['hits'] >= 2
+
+
+def test_profile_update_invalidates_cached_user(db):
+    db.users.insert_one({'email': EMAIL, 'firstName': 'Leo', 'lastName': 'Nard', 'address': 'Old Rd'})
+    assert UserService.get_profile(EMAIL).address == 'Old Rd'
+    assert UserService.registered_emails() == [EMAIL]
+
+    assert UserService.update_profile(EMAIL, {'address': 'New Rd'})
+    assert UserService.get_profile(EMAIL).address == 'New Rd'
+
+    db.users.insert_one({'email': 'other@gmail.com'})
+    notify_change('users', None)
+    assert sorted(UserService.registered_emails()) == [EMAIL, 'other@gmail.com']
+
+
+def test_wallet_balance_cached_until_invalidated(db):
+    db.wallet_balance.insert_one({'user_email': EMAIL, 'balance': 10.0})
+    assert WalletService.get_balance(EMAIL) == 10.0
+
+    db.wallet_balance.update_one({'user_email': EMAIL}, {'$set': {'balance': 4.0}})
+    assert WalletService.get_balance(EMAIL) == 10.0
+    WalletService.invalidate_balance(EMAIL)
+    assert WalletService.get_balance(EMAIL) == 4.0
+
+
+def test_change_streams_are_detected_from_the_server_topology():
+    class Database:
+        def __init__(self, hello):
+            self.client = self
+            self.admin = self
+            self.hello = hello
+
+        def command(self, name):
+            if isinstance(self.hello, Exception):
+                raise self.hello
+            return self.hello
+
+    assert change_streams_supported(Database({'isWritablePrimary': True, 'setName': 'rs0'}))
+    assert change_streams_supported(Database({'isWritablePrimary': True, 'msg': 'isdbgrid'}))
+    assert not change_streams_supported(Database({'isWritablePrimary': True}))
+    assert not change_streams_supported(Database(ConnectionError('down')))
@@ -0,0 +1,90 @@
+# backend/app/tests/test_fleet_simulator.py
+import numpy as np
+import pytest
+
+from app.meter_simulator.fleet_simulator import FleetConfig, FleetSimulator, UTILITY_TYPES
+from app.meter_simulator.utils import USAGE_RATE, USAGE_VARIATION
+
+
+class StubTokenHandler:
+    def __init__(self, units=25):
+        self.units = units
+        self.batches = []
+
+    def redeem_tokens(self, redemptions):
+        self.batches.append(redemptions)
+        return [dict(r, status='redeemed', units=self.units) for r in redemptions]
+
+
+def _config(**overrides):
+    values = dict(meters=3000, users=200, ticks=3, seed=7, batch_size=100)
+    values.update(overrides)
+    return FleetConfig(**values)
+
+
+def test_same_seed_reproduces_consumption(db):
+    first = FleetSimulator(_config(), db=db)
+    second = FleetSimulator(_config(), db=db)
+    assert np.array_equal(first.consume(), second.consume())
+    assert not np.array_equal(FleetSimulator(_config(seed=8), db=db).consume(), first.consume())
+
+
+def test_usage_follows_emulator_rates(db):
+    simulator = FleetSimulator(_config(), db=db)
+    usage = simulator.consume()
+    rate = simulator.base_rate
+    assert np.all(usage >= rate * (1 - USAGE_VARIATION) - 1e-9)
+    assert np.all(usage <= rate * (1 + USAGE_VARIATION) + 1e-9)
+    assert set(np.unique(rate)) == {USAGE_RATE[t] for t in UTILITY_TYPES}
+
+
+def test_run_writes_readings_to_meters_only(db):
+    simulator = FleetSimulator(_config(meters=300, users=40), db=db)
+    simulator.seed_database(tokens_per_user=0)
+    pools = {(d['user_email'], d['utility_type']): d['units'] for d in db.utilities_balance.find()}
+
+    report = simulator.run()
+
+    meters = {doc['meter_id']: doc['units'] for doc in db.meters.find()}
+    assert len(meters) == 300
+    assert np.allclose([meters[simulator.meter_id(m)] for m in range(300)], simulator.balance)
+    # Consumption never touches the purchased-units pool
+    assert {(d['user_email'], d['utility_type']): d['units'] for d in db.utilities_balance.find()} == pools
+    assert report.meter_readings == 300 * 3
+    assert len(report.write_latency.samples) == -(-report.meter_updates // 100)
+
+
+def test_unseeded_meters_fail_instead_of_being_created(db):
+    with pytest.raises(RuntimeError, match='--seed-db'):
+        FleetSimulator(_config(ticks=1), db=db).run()
+    assert db.meters.count_documents({}) == 0
+
+
+def test_redeeming_against_another_database_fails_loudly(db):
+    class WrongDatabaseHandler(StubTokenHandler):
+        def redeem_tokens(self, redemptions):
+            return [dict(r, status='not_found') for r in redemptions]
+
+    simulator = FleetSimulator(_config(meters=50, users=10, initial_units=0.1, redeem=True), db=db,
+                               token_handler=WrongDatabaseHandler())
+    simulator.seed_database(tokens_per_user=1)
+    with pytest.raises(RuntimeError, match='MONGO_URI'):
+        simulator.run()
+
+
+def test_low_meters_redeem_their_owners_tokens(db):
+    handler = StubTokenHandler()
+    simulator = FleetSimulator(_config(meters=50, users=10, initial_units=0.1, redeem=True), db=db,
+                               token_handler=handler)
+    simulator.seed_database(tokens_per_user=1)
+
+    simulator.run()
+
+    redeemed = [r for batch in handler.batches for r in batch]
+    assert redeemed
+    assert simulator.report.redemptions == len(redeemed)
+    tokens = {t['recharge_token']: t for t in db.utility_recharge_tokens.find()}
+    for redemption in redeemed:
+        meter = int(redemption['meter_id'][3:])
+        assert tokens[redemption['token']]['user_email'] == simulator.user_email(int(simulator.user_index[meter]))
+        assert tokens[redemption['token']]['utility_type'] == UTILITY_TYPES[int(simulator.utility_index[meter])]
@@ -0,0 +1,200 @@
+# backend/app/tests/test_job_queue.py
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app import mail
+from app.services.job_queue import JobQueue, JobStatus
+from app.routes.jobs import queued_report_response, report_is_queued
+from app.services.job_handlers import JobHandler, purge_expired_reports
+from app.services.job_worker import JobWorker
+
+
+@pytest.fixture
+def app(db):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, MAIL_SERVER='localhost', MAIL_PORT=1025,
+                      MAIL_DEFAULT_SENDER='admin@tokenmeter.com')
+    mail.init_app(app)
+    JobQueue.ensure_indexes()
+    with app.app_context():
+        yield app
+
+
+def _token_email(transaction_id):
+    return {
+        'email': 'leonard1@gmail.com',
+        'token_data': {
+            'transaction_id': transaction_id,
+            'utilityType': 'water',
+            'rechargeToken': '1234-5678-9012-3456',
+            'units': 10,
+            'totalAmount': 15.0
+        }
+    }
+
+
+def test_enqueue_is_idempotent(db):
+    JobQueue.ensure_indexes()
+    first = JobQueue.enqueue('send_token_email', _token_email('t1'), idempotency_key='token-email:t1')
+    second = JobQueue.enqueue('send_token_email', _token_email('t1'), idempotency_key='token-email:t1')
+
+    assert first == second
+    assert db.jobs.count_documents({}) == 1
+
+
+def test_failed_job_backs_off_then_gives_up(db):
+    JobQueue.enqueue('statement_report', {}, max_attempts=2)
+
+    job = JobQueue.claim('worker-1')
+    assert JobQueue.fail(job, RuntimeError('boom')) == JobStatus.QUEUED
+    assert JobQueue.claim('worker-1') is None  # backing off
+
+    db.jobs.update_one({}, {'$set': {'run_at': datetime.utcnow() - timedelta(seconds=1)}})
+    job = JobQueue.claim('worker-1')
+    assert job['attempts'] == 2
+    assert JobQueue.fail(job, RuntimeError('boom')) == JobStatus.FAILED
+    assert db.jobs.find_one()['error'] == 'boom'
+
+
+def test_token_emails_share_one_smtp_connection(app, db, monkeypatch):
+    for transaction_id in ('t1', 't2', 't3'):
+        JobQueue.enqueue('send_token_email', _token_email(transaction_id))
+
+    connections = []
+    original_connect = mail.connect
+
+    def counting_connect():
+        connections.append(1)
+        return original_connect()
+
+    monkeypatch.setattr(mail, 'connect', counting_connect)
+    with mail.record_messages() as outbox:
+        assert JobWorker(app).run_once('worker-1')
+
+    assert len(outbox) == 3
+    assert len(connections) == 1
+    assert db.jobs.count_documents({'status': JobStatus.COMPLETED}) == 3
+
+
+def test_worker_runs_single_jobs_through_handlers(app, db):
+    handlers = {'echo': JobHandler(lambda job: {'echo': job['payload']['value']})}
+    job_id = JobQueue.enqueue('echo', {'value': 42})
+
+    worker = JobWorker(app, handlers=handlers)
+    assert worker.run_once('worker-1')
+    assert not worker.run_once('worker-1')
+    assert JobQueue.get(job_id)['result'] == {'echo': 42}
+
+
+def test_stale_jobs_count_as_failed_attempts(db):
+    JobQueue.enqueue('statement_report', {}, max_attempts=2)
+    stale = datetime.utcnow() - JobQueue.STALE_AFTER - timedelta(minutes=1)
+
+    JobQueue.claim('worker-1')
+    db.jobs.update_one({}, {'$set': {'locked_at': stale}})
+    assert JobQueue.requeue_stale() == 1
+    job = db.jobs.find_one()
+    assert job['status'] == JobStatus.QUEUED
+    assert job['run_at'] > datetime.utcnow()  # backs off like fail()
+
+    db.jobs.update_one({}, {'$set': {'run_at': datetime.utcnow() - timedelta(seconds=1)}})
+    JobQueue.claim('worker-2')
+    db.jobs.update_one({}, {'$set': {'locked_at': stale}})
+    assert JobQueue.requeue_stale() == 1
+    job = db.jobs.find_one()
+    assert job['status'] == JobStatus.FAILED
+    assert job['attempts'] == 2
+    assert 'worker-2' in job['error']
+
+
+def test_report_jobs_are_opt_in(app, db):
+    def queued(query, format_type):
+        with app.test_request_context(f'/download?{query}'):
+            return report_is_queued(format_type)
+
+    # Without a flag the download stays a synchronous file
+    assert not queued('', 'pdf') and not queued('', 'xlsx')
+    assert queued('async=1', 'pdf') and queued('async=true', 'csv')
+    assert queued('stream=1', 'xlsx') and not queued('stream=1', 'csv')
+
+    start = datetime(2025, 1, 1)
+    with app.test_request_context(headers={'Idempotency-Key': 'k1'}):
+        response, status = queued_report_response('leonard1@gmail.com', 'wallet', 'pdf', start,
+                                                  start + timedelta(days=365))
+        again, _ = queued_report_response('leonard1@gmail.com', 'wallet', 'pdf', start,
+                                          start + timedelta(days=365))
+
+    assert status == 202
+    assert response.get_json()['job_id'] == again.get_json()['job_id']
+    job = db.jobs.find_one()
+    assert job['type'] == 'statement_report'
+    assert job['payload']['kind'] == 'wallet' and job['user_email'] == 'leonard1@gmail.com'
+
+
+def test_leases_keep_running_jobs_and_only_the_holder_can_finish_them(db):
+    JobQueue.enqueue('statement_report', {})
+    stale = datetime.utcnow() - JobQueue.STALE_AFTER - timedelta(minutes=1)
+
+    first = JobQueue.claim('worker-1')
+    db.jobs.update_one({}, {'$set': {'locked_at': stale}})
+    assert JobQueue.heartbeat([first]) == 1
+    assert JobQueue.requeue_stale() == 0  # the heartbeat renewed the lease
+
+    # worker-1 stops heartbeating; its job goes to worker-2
+    db.jobs.update_one({}, {'$set': {'locked_at': stale}})
+    assert JobQueue.requeue_stale() == 1
+    db.jobs.update_one({}, {'$set': {'run_at': datetime.utcnow() - timedelta(seconds=1)}})
+    second = JobQueue.claim('worker-2')
+
+    assert not JobQueue.complete(first, {'file_name': 'stale.pdf'})
+    assert JobQueue.fail(first, RuntimeError('late')) is None
+    assert JobQueue.heartbeat([first]) == 0
+    assert JobQueue.complete(second, {'file_name': 'fresh.pdf'})
+    assert db.jobs.find_one()['result'] == {'file_name': 'fresh.pdf'}
+
+
+def test_worker_renews_the_lease_while_a_handler_runs(app, db, monkeypatch):
+    monkeypatch.setattr(JobQueue, 'HEARTBEAT_INTERVAL', timedelta(milliseconds=10))
+    renewed = []
+
+    def slow_report(job):
+        import time
+        time.sleep(0.1)
+        renewed.append(db.jobs.find_one()['locked_at'])
+        return {}
+
+    JobQueue.enqueue('slow', {})
+    assert JobWorker(app, handlers={'slow': JobHandler(slow_report)}).run_once('worker-1')
+    job = db.jobs.find_one()
+    assert job['status'] == JobStatus.COMPLETED
+    assert renewed[0] > job['created_at']
+
+
+def test_reports_expire_with_their_job_rows(app, db, tmp_path):
+    app.config.update(REPORTS_FOLDER=str(tmp_path), REPORT_TTL=timedelta(hours=1))
+    assert db.jobs.index_information()['expires_at_ttl']['expireAfterSeconds'] == 0
+
+    def report(job):
+        (tmp_path / f"{job['_id']}.pdf").write_bytes(b'%PDF')
+        return {'file_name': f"{job['_id']}.pdf"}
+
+    JobQueue.enqueue('statement_report', {})
+    JobQueue.enqueue('statement_report', {})
+    worker = JobWorker(app, handlers={'statement_report': JobHandler(report, ttl=lambda: timedelta(hours=1))})
+    assert worker.run_once('worker-1') and worker.run_once('worker-1')
+    old, fresh = db.jobs.find().sort('_id')
+    assert fresh['expires_at'] > datetime.utcnow() + timedelta(minutes=59)
+
+    # The first report was built two hours ago
+    db.jobs.update_one({'_id': old['_id']}, {'$set': {'expires_at': datetime.utcnow() - timedelta(hours=1)}})
+    two_hours_ago = (datetime.now() - timedelta(hours=2)).timestamp()
+    os.utime(tmp_path / f"{old['_id']}.pdf", (two_hours_ago, two_hours_ago))
+    (tmp_path / 'orphan.xlsx.part').write_bytes(b'')
+    os.utime(tmp_path / 'orphan.xlsx.part', (two_hours_ago, two_hours_ago))
+
+    assert purge_expired_reports() == 2
+    assert sorted(os.listdir(tmp_path)) == [f"{fresh['_id']}.pdf"]
+    assert [job['_id'] for job in db.jobs.find()] == [fresh['_id']]
@@ -0,0 +1,130 @@
+# backend/app/tests/test_ledger_rollup_service.py
+from datetime import datetime
+
+import pytest
+
+from app.services.ledger_rollup_service import BACKFILL_MARKER, LedgerRollupService
+
+EMAIL = 'leonard1@gmail.com'
+
+
+@pytest.fixture
+def backfilled(db):
+    db.migrations.insert_one({'_id': BACKFILL_MARKER})
+
+
+def _token(utility_type, units, amount, created_at, status='active', used_at=None):
+    token = {
+        'user_email': EMAIL,
+        'utility_type': utility_type,
+        'units': units,
+        'total_amount': amount,
+        'status': status,
+        'created_at': created_at,
+    }
+    if used_at:
+        token['used_at'] = used_at
+    return token
+
+
+def test_purchases_and_redemptions_accumulate(db, backfilled):
+    LedgerRollupService.record_purchase(EMAIL, 'water', 10, 15.0, datetime(2025, 1, 3))
+    LedgerRollupService.record_purchase(EMAIL, 'water', 5, 7.5, datetime(2025, 1, 20))
+    LedgerRollupService.record_redemption(EMAIL, 'water', 10, 15.0, datetime(2025, 2, 1))
+
+    assert db.utility_ledger_rollups.count_documents({}) == 2
+    totals = LedgerRollupService.totals_by_utility(EMAIL)
+    assert totals['water']['units_purchased'] == 15
+    assert totals['water']['purchase_count'] == 2
+    assert totals['water']['units_used'] == 10
+    assert totals['gas']['units_purchased'] == 0
+
+    january = LedgerRollupService.totals_by_utility(EMAIL, '2025-01', '2025-02')
+    assert january['water']['units_used'] == 0
+
+
+def test_period_summary_matches_token_scan(db, backfilled):
+    tokens = [
+        _token('water', 1, 1.5, datetime(2025, 1, 10)),   # before the window
+        _token('water', 2, 3.0, datetime(2025, 1, 20)),   # leading partial month
+        _token('water', 4, 6.0, datetime(2025, 2, 1)),    # full month
+        _token('gas', 3, 6.0, datetime(2025, 3, 15)),     # full month
+        _token('gas', 5, 10.0, datetime(2025, 4, 2)),     # trailing partial month
+        _token('gas', 7, 14.0, datetime(2025, 4, 9)),     # after the window
+    ]
+    db.utility_recharge_tokens.insert_many(tokens)
+    for token in tokens:
+        LedgerRollupService.record_purchase(
+            EMAIL, token['utility_type'], token['units'], token['total_amount'], token['created_at']
+        )
+
+    summary = LedgerRollupService.period_summary(EMAIL, datetime(2025, 1, 15), datetime(2025, 4, 5))
+
+    assert summary == {
+        'water': {'total_units': 6, 'total_amount': 9.0, 'count': 2},
+        'gas': {'total_units': 8, 'total_amount': 16.0, 'count': 2},
+    }
+    assert LedgerRollupService.period_summary(
+        EMAIL, datetime(2025, 1, 15), datetime(2025, 4, 5), 'gas'
+    ) == {'gas': {'total_units': 8, 'total_amount': 16.0, 'count': 2}}
+
+
+def test_rebuild_reports_and_repairs_drift(db):
+    db.utility_recharge_tokens.insert_many([
+        _token('water', 10, 15.0, datetime(2025, 1, 3)),
+        _token('water', 4, 6.0, datetime(2025, 1, 5), status='used', used_at=datetime(2025, 2, 2)),
+    ])
+    LedgerRollupService.record_purchase(EMAIL, 'water', 10, 15.0, datetime(2025, 1, 3))
+    LedgerRollupService.record_purchase(EMAIL, 'gas', 1, 2.0, datetime(2025, 1, 3))  # no history
+
+    drift = LedgerRollupService.rebuild(apply=False)
+    assert [(d['utility_type'], d['month']) for d in drift] == [
+        ('gas', '2025-01'), ('water', '2025-01'), ('water', '2025-02')
+    ]
+
+    LedgerRollupService.rebuild()
+    assert LedgerRollupService.rebuild(apply=False) == []
+    totals = LedgerRollupService.totals_by_utility(EMAIL)
+    assert totals['water']['units_purchased'] == 14
+    assert totals['water']['units_used'] == 4
+    assert totals['gas']['purchase_count'] == 0
+
+
+def test_period_usage_covers_the_same_window_as_period_summary(db, backfilled):
+    tokens = [
+        _token('water', 10, 15.0, datetime(2024, 6, 1), status='used', used_at=datetime(2025, 1, 20)),
+        _token('water', 4, 6.0, datetime(2025, 1, 2), status='used', used_at=datetime(2025, 2, 10)),
+        _token('water', 3, 4.5, datetime(2025, 2, 3), status='used', used_at=datetime(2025, 4, 9)),  # after
+        _token('gas', 2, 4.0, datetime(2024, 12, 1), status='used', used_at=datetime(2025, 1, 10)),   # before
+    ]
+    db.utility_recharge_tokens.insert_many(tokens)
+    for token in tokens:
+        LedgerRollupService.record_redemption(
+            EMAIL, token['utility_type'], token['units'], token['total_amount'], token['used_at']
+        )
+
+    usage = LedgerRollupService.period_usage(EMAIL, datetime(2025, 1, 15), datetime(2025, 4, 5))
+
+    assert usage == {'water': {'units_used': 14, 'amount_used': 21.0, 'redemption_count': 2}}
+
+
+def test_history_is_scanned_until_the_backfill_has_run(db):
+    # Tokens from before the rollups existed: no rollup documents yet
+    db.utility_recharge_tokens.insert_many([
+        _token('water', 10, 15.0, datetime(2024, 11, 3)),
+        _token('water', 4, 6.0, datetime(2024, 12, 5), status='used', used_at=datetime(2025, 1, 2)),
+    ])
+    window = (EMAIL, datetime(2024, 10, 15), datetime(2025, 2, 5))
+
+    assert LedgerRollupService.period_summary(*window) == {
+        'water': {'total_units': 14, 'total_amount': 21.0, 'count': 2}
+    }
+    assert LedgerRollupService.period_usage(*window)['water']['units_used'] == 4
+    assert LedgerRollupService.totals_by_utility(EMAIL)['water']['units_purchased'] == 14
+
+    LedgerRollupService.backfill()
+
+    assert LedgerRollupService.is_backfilled()
+    assert db.utility_ledger_rollups.count_documents({}) == 3
+    assert LedgerRollupService.period_summary(*window)['water']['total_units'] == 14
+    assert LedgerRollupService.totals_by_utility(EMAIL)['water']['units_used'] == 4
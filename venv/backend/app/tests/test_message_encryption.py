@@ -0,0 +1,87 @@
+# backend/app/tests/test_message_encryption.py
+import base64
+import os
+
+import pytest
+from bson import ObjectId
+
+from app.utils import message_encryption
+from app.utils.message_encryption import MessageEncryption, decrypted_cache
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    monkeypatch.setenv('MASTER_KEY', base64.b64encode(os.urandom(32)).decode())
+    monkeypatch.setenv('ENCRYPTION_SALT', base64.b64encode(os.urandom(16)).decode())
+    monkeypatch.delenv('MESSAGE_KEY_VERSION', raising=False)
+
+
+def mailbox(encryption, count):
+    return [{'_id': ObjectId(), 'content': encryption.encrypt_message(f'message {i}')} for i in range(count)]
+
+
+def test_keys_are_derived_lazily_and_once(keys):
+    encryption = MessageEncryption()
+    assert encryption._ciphers == {}
+
+    token = encryption.encrypt_message('hello')
+    assert encryption.cipher('v1') is encryption.cipher('v1')
+    assert encryption.decrypt_message(token) == 'hello'
+    # Same env, fresh process state: the legacy untagged format still decrypts
+    assert MessageEncryption().decrypt_message(token) == 'hello'
+
+
+def test_rotated_key_tags_new_messages_and_keeps_old_ones_readable(keys, monkeypatch):
+    old_token = MessageEncryption().encrypt_message('before rotation')
+    assert ':' not in old_token
+
+    monkeypatch.setenv('MESSAGE_KEY_VERSION', 'v2')
+    monkeypatch.setenv('MASTER_KEY_V2', base64.b64encode(os.urandom(32)).decode())
+    monkeypatch.setenv('ENCRYPTION_SALT_V2', base64.b64encode(os.urandom(16)).decode())
+    rotated = MessageEncryption()
+    new_token = rotated.encrypt_message('after rotation')
+
+    assert new_token.startswith('v2:')
+    assert rotated.decrypt_messages([{'_id': 1, 'content': old_token}, {'_id': 2, 'content': new_token}]) == [
+        'before rotation', 'after rotation'
+    ]
+
+
+def test_unknown_key_version_fails_only_that_message(keys):
+    encryption = MessageEncryption()
+    good = encryption.encrypt_message('ok')
+
+    assert encryption.decrypt_messages([
+        {'_id': 1, 'content': 'v9:gAAAAAbogus'},
+        {'_id': 2, 'content': good},
+        {'_id': 3, 'content': 'not a token'},
+        {'_id': 4},
+    ]) == [None, 'ok', None, None]
+
+
+def test_decrypted_bodies_are_cached_per_message_and_ciphertext(keys):
+    encryption = MessageEncryption()
+    messages = mailbox(encryption, 3)
+
+    first = encryption.decrypt_messages(messages)
+    misses = decrypted_cache.misses
+    assert encryption.decrypt_messages(messages) == first
+    assert decrypted_cache.misses == misses
+    assert decrypted_cache.hits >= 3
+
+    # An edited message has new ciphertext, so it is decrypted again
+    messages[0]['content'] = encryption.encrypt_message('edited')
+    assert encryption.decrypt_messages(messages)[0] == 'edited'
+
+
+def test_large_pages_decrypt_on_the_pool_in_order(keys, monkeypatch):
+    monkeypatch.setattr(message_encryption, 'PARALLEL_THRESHOLD', 4)
+    encryption = MessageEncryption()
+    messages = mailbox(encryption, 25)
+    messages[7]['content'] = 'corrupt'
+
+    plaintexts = encryption.decrypt_messages(messages)
+
+    assert encryption._pool is not None
+    assert plaintexts[7] is None
+    assert [p for i, p in enumerate(plaintexts) if i != 7] == [f'message {i}' for i in range(25) if i != 7]
@@ -0,0 +1,118 @@
+# backend/app/tests/test_metrics.py
+import logging
+from datetime import timedelta
+from itertools import count
+
+import pytest
+from flask import Flask, jsonify
+from pymongo import monitoring
+
+from app.utils.metrics import init_metrics, metrics, query_shape
+
+_request_ids = count(1)
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(METRICS_ENABLED=True, METRICS_SAMPLE_RATE=1.0, METRICS_SLOW_QUERY_MS=100,
+                      METRICS_TOKEN=None)
+    app.config.update(config)
+    listeners = init_metrics(app)
+
+    def run_command(command, ms):
+        """What the driver does around a command, for each listener the client was given."""
+        request_id = next(_request_ids)
+        name = next(iter(command))
+        for listener in listeners:
+            listener.started(monitoring.CommandStartedEvent(command, 'test', request_id, ('localhost', 27017), 1))
+            listener.succeeded(monitoring.CommandSucceededEvent(
+                timedelta(milliseconds=ms), {'ok': 1}, name, request_id, ('localhost', 27017), 1))
+
+    @app.route('/api/users/<email>')
+    def get_user(email):
+        run_command({'find': 'users', 'filter': {'email': email}}, 2)
+        run_command({'find': 'wallet_balance', 'filter': {'user_email': email}}, 3)
+        return jsonify({'email': email})
+
+    @app.route('/api/report')
+    def slow_report():
+        run_command({'find': 'utility_recharge_tokens',
+                     'filter': {'user_email': 'leonard1@gmail.com', 'status': {'$in': ['used', 'unused']}}}, 250)
+        return jsonify({})
+
+    @app.route('/api/broken')
+    def broken():
+        raise RuntimeError('boom')
+
+    app.listeners = listeners
+    return app
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_requests_are_timed_per_endpoint_with_their_mongo_commands():
+    client = make_app().test_client()
+    for email in ('a@x.com', 'b@x.com'):
+        assert client.get(f'/api/users/{email}').status_code == 200
+    client.get('/api/missing')
+
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_request_duration_seconds_count{method="GET",endpoint="get_user"} 2' in body
+    assert 'http_requests_total{method="GET",endpoint="get_user",status="200"} 2' in body
+    assert 'http_requests_total{method="GET",endpoint="unmatched",status="404"} 1' in body
+    assert 'http_request_mongo_commands_bucket{endpoint="get_user",le="1"} 0' in body
+    assert 'http_request_mongo_commands_bucket{endpoint="get_user",le="2"} 2' in body
+    assert 'http_request_mongo_commands_sum{endpoint="get_user"} 4' in body
+    assert 'mongo_command_duration_seconds_count{command="find"} 4' in body
+    assert 'cache_hits_total' in body
+
+
+def test_slow_commands_are_logged_with_the_filter_shape_only(caplog):
+    client = make_app().test_client()
+    with caplog.at_level(logging.WARNING, logger='app.utils.metrics'):
+        client.get('/api/report')
+
+    [record] = caplog.records
+    assert "filter {'user_email': '?', 'status': {'$in': ['?']}}" in record.getMessage()
+    assert 'leonard1' not in record.getMessage()
+    assert 'endpoint slow_report' in record.getMessage()
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'mongo_slow_commands_total{command="find",collection="utility_recharge_tokens"} 1' in body
+
+
+def test_unhandled_errors_are_counted_once_as_500():
+    client = make_app().test_client()
+    assert client.get('/api/broken').status_code == 500
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",endpoint="broken",status="500"} 1' in body
+
+
+def test_sampling_and_disabling():
+    client = make_app(METRICS_SAMPLE_RATE=0.0).test_client()
+    client.get('/api/users/a@x.com')
+    assert 'get_user' not in metrics.render()
+
+    disabled = make_app(METRICS_ENABLED=False)
+    assert disabled.listeners == []
+    assert disabled.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_token():
+    client = make_app(METRICS_TOKEN='scrape').test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape'}).status_code == 200
+
+
+def test_query_shape_keeps_structure_and_drops_values():
+    assert query_shape({'$or': [{'sender': 'a'}, {'recipient': 'a', 'status': 'sent'}]}) == {
+        '$or': [{'sender': '?'}, {'recipient': '?', 'status': '?'}]
+    }
+    assert query_shape([{'$match': {'user_email': 'a'}}, {'$group': {'_id': '$utility_type'}}]) == [
+        {'$match': {'user_email': '?'}}, {'$group': {'_id': '?'}}
+    ]
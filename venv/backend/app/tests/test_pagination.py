@@ -0,0 +1,80 @@
+# backend/app/tests/test_pagination.py
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo import ASCENDING, DESCENDING
+
+from app.utils.pagination import InvalidCursor, encode_cursor, paginate, parse_limit
+
+EMAIL = 'leonard1@gmail.com'
+
+
+def _seed(db, count=7):
+    start = datetime(2025, 1, 1)
+    # Pairs of documents share a timestamp so the _id tiebreak matters
+    db.utility_recharge_tokens.insert_many([
+        {'user_email': EMAIL, 'created_at': start + timedelta(hours=index // 2), 'units': index}
+        for index in range(count)
+    ])
+    db.utility_recharge_tokens.insert_one({'user_email': 'other@gmail.com', 'created_at': start, 'units': 99})
+
+
+def _walk(collection, query, direction, limit):
+    pages, cursor = [], None
+    while True:
+        page = paginate(collection, query, 'created_at', direction, limit=limit, cursor=cursor)
+        pages.append(page)
+        if not page.next_cursor:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize('direction', [DESCENDING, ASCENDING])
+def test_next_cursors_visit_every_document_once_in_order(db, direction):
+    _seed(db)
+    query = {'user_email': EMAIL}
+    pages = _walk(db.utility_recharge_tokens, query, direction, limit=3)
+
+    seen = [doc['_id'] for page in pages for doc in page.items]
+    expected = [doc['_id'] for doc in db.utility_recharge_tokens.find(query).sort(
+        [('created_at', direction), ('_id', direction)])]
+    assert seen == expected
+    assert [len(page.items) for page in pages] == [3, 3, 1]
+    assert pages[0].prev_cursor is None
+
+
+def test_prev_cursor_returns_the_previous_page(db):
+    _seed(db)
+    query = {'user_email': EMAIL}
+    pages = _walk(db.utility_recharge_tokens, query, DESCENDING, limit=3)
+
+    back = paginate(db.utility_recharge_tokens, query, 'created_at', DESCENDING, limit=3,
+                    cursor=pages[2].prev_cursor)
+    assert [doc['_id'] for doc in back.items] == [doc['_id'] for doc in pages[1].items]
+    assert back.next_cursor and back.prev_cursor
+
+    first = paginate(db.utility_recharge_tokens, query, 'created_at', DESCENDING, limit=3,
+                     cursor=back.prev_cursor)
+    assert [doc['_id'] for doc in first.items] == [doc['_id'] for doc in pages[0].items]
+    assert first.prev_cursor is None
+
+
+def test_cursor_is_rejected_for_another_query_or_when_malformed(db):
+    _seed(db)
+    page = paginate(db.utility_recharge_tokens, {'user_email': EMAIL}, 'created_at', limit=3)
+
+    with pytest.raises(InvalidCursor):
+        paginate(db.utility_recharge_tokens, {'user_email': 'other@gmail.com'}, 'created_at',
+                 limit=3, cursor=page.next_cursor)
+    with pytest.raises(InvalidCursor):
+        paginate(db.utility_recharge_tokens, {'user_email': EMAIL}, 'created_at', cursor='not-a-cursor')
+    with pytest.raises(InvalidCursor):
+        paginate(db.utility_recharge_tokens, {'user_email': EMAIL}, 'created_at', cursor=encode_cursor({'v': 1}))
+
+
+def test_parse_limit_clamps_and_defaults():
+    assert parse_limit(None) == 20
+    assert parse_limit('5') == 5
+    assert parse_limit('0') == 1
+    assert parse_limit('100000') == 100
+    assert parse_limit('abc', default=50) == 50
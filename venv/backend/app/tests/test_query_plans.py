@@ -0,0 +1,128 @@
+# backend/app/tests/test_query_plans.py
+"""explain() regression tests: listing queries must be served by an index.
+
+mongomock has no query planner, so these run against a real mongod
+(MONGO_TEST_URI, default localhost) and are skipped when none is reachable.
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo import DESCENDING, MongoClient
+from pymongo.errors import PyMongoError
+
+from app import mongo
+from app.utils.db_indexes import ensure_indexes
+from app.utils.pagination import keyset_query, paginate
+
+EMAIL = 'leonard1@gmail.com'
+OTHER = 'other@gmail.com'
+
+
+@pytest.fixture(scope='module')
+def client():
+    client = MongoClient(os.getenv('MONGO_TEST_URI', 'mongodb://localhost:27017'), serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command('ping')
+    except PyMongoError:
+        pytest.skip('explain() tests need a running mongod')
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def real_db(client, monkeypatch):
+
+    database = client['token_meter_query_plans']
+    client.drop_database(database.name)
+    monkeypatch.setattr(mongo, 'db', database, raising=False)
+    ensure_indexes()
+    _seed(database)
+    yield database
+    client.drop_database(database.name)
+
+
+def _seed(database):
+    start = datetime(2025, 1, 1)
+    for email in (EMAIL, OTHER):
+        database.utility_recharge_tokens.insert_many([
+            {'user_email': email, 'created_at': start + timedelta(hours=i), 'utility_type': 'water',
+             'units': i, 'total_amount': i * 1.5, 'status': 'active', 'recharge_token': f'0000-0000-0000-{i:04d}'}
+            for i in range(50)
+        ])
+        database.messages.insert_many([
+            {'sender': email, 'recipient': OTHER if email == EMAIL else EMAIL, 'status': 'sent',
+             'read': False, 'timestamp': start + timedelta(minutes=i), 'content': 'x'}
+            for i in range(50)
+        ])
+        database.wallet_transactions.insert_many([
+            {'_id': f'{email}-{i}', 'user_email': email, 'date': start + timedelta(hours=i), 'amount': i}
+            for i in range(50)
+        ])
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+def _assert_indexed(collection, query, sort_field, direction=DESCENDING):
+    """Explain the first page and a cursor page of a keyset listing."""
+    cursor = paginate(collection, query, sort_field, direction, limit=5).next_cursor
+    assert cursor
+    for page_cursor in (None, cursor):
+        filter_, sort, _ = keyset_query(query, sort_field, direction, page_cursor)
+        plan = collection.find(filter_).sort(sort).limit(6).explain()['queryPlanner']['winningPlan']
+        stages = set(_stages(plan))
+        assert 'COLLSCAN' not in stages, plan
+        assert 'IXSCAN' in stages or 'EXPRESS_IXSCAN' in stages, plan
+
+
+def test_transaction_listing_uses_index(real_db):
+    from app.routes.transactions import build_transactions_query
+
+    start, end = datetime(2025, 1, 1), datetime(2025, 2, 1)
+    _assert_indexed(real_db.utility_recharge_tokens, build_transactions_query(EMAIL, start, end), 'created_at')
+    _assert_indexed(real_db.utility_recharge_tokens,
+                    build_transactions_query(EMAIL, start, end, 'water', 'active'), 'created_at')
+
+
+@pytest.mark.parametrize('folder', ['inbox', 'outbox', 'sent', 'all'])
+def test_message_folders_use_index(real_db, folder):
+    from app.routes.messages import message_folder_query
+
+    query = message_folder_query(EMAIL, folder)
+    if folder == 'outbox':
+        real_db.messages.update_many({'sender': EMAIL}, {'$set': {'status': 'pending'}})
+    _assert_indexed(real_db.messages, query, 'timestamp')
+
+
+def test_wallet_transactions_use_index(real_db):
+    _assert_indexed(real_db.wallet_transactions, {'user_email': EMAIL}, 'date')
+
+
+def test_token_and_count_lookups_use_index(real_db):
+    plans = [
+        real_db.utility_recharge_tokens.find(
+            {'recharge_token': {'$in': ['0000-0000-0000-0001', '0000-0000-0000-0002']}}
+        ).explain(),
+        real_db.messages.find({'recipient': EMAIL, 'status': 'sent', 'read': False}).explain(),
+    ]
+    for explained in plans:
+        assert 'COLLSCAN' not in set(_stages(explained['queryPlanner']['winningPlan']))
+
+
+def test_startup_bootstrap_never_drops_superseded_indexes(db):
+    db.utility_recharge_tokens.create_index([('user_email', 1), ('created_at', 1)], name='user_email_created_at')
+
+    ensure_indexes()
+    assert 'user_email_created_at' in db.utility_recharge_tokens.index_information()
+
+    ensure_indexes(drop_superseded=True)
+    assert 'user_email_created_at' not in db.utility_recharge_tokens.index_information()
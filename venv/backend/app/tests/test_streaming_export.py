@@ -0,0 +1,40 @@
+# backend/app/tests/test_streaming_export.py
+import io
+
+from openpyxl import load_workbook
+
+from app.utils import streaming_export
+from app.utils.streaming_export import stream_csv, stream_xlsx, stream_pdf
+
+HEADER = ['Transaction ID', 'Units']
+
+
+def _rows(count):
+    return ([f'txn-{i}', i] for i in range(count))
+
+
+def test_csv_is_emitted_in_row_chunks(monkeypatch):
+    monkeypatch.setattr(streaming_export, 'CSV_CHUNK_ROWS', 2)
+    chunks = list(stream_csv([['Report']], HEADER, _rows(5)))
+
+    # preamble + header, two full chunks, then the remainder
+    assert chunks[0] == b'Report\r\nTransaction ID,Units\r\n'
+    assert chunks[1] == b'txn-0,0\r\ntxn-1,1\r\n'
+    assert b''.join(chunks).count(b'\r\n') == 7
+
+
+def test_xlsx_writes_summary_and_transactions_sheets():
+    data = b''.join(stream_xlsx([['Report'], ['Total', 3]], HEADER, _rows(3)))
+    wb = load_workbook(io.BytesIO(data), read_only=True)
+
+    assert wb.sheetnames == ['Summary', 'Transactions']
+    rows = list(wb['Transactions'].values)
+    assert rows[0] == tuple(HEADER)
+    assert rows[-1] == ('txn-2', 2)
+
+
+def test_pdf_spans_multiple_pages():
+    data = b''.join(stream_pdf('Report', [['Period: 2025']], HEADER, _rows(200)))
+
+    assert data.startswith(b'%PDF')
+    assert data.count(b'/Type /Page\n') > 1
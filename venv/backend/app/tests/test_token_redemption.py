@@ -0,0 +1,132 @@
+# backend/app/tests/test_token_redemption.py
+from datetime import datetime
+
+from app.services.ledger_rollup_service import BACKFILL_MARKER, LedgerRollupService
+from app.services.redemption_service import RedemptionStatus, TokenRedemptionService
+
+EMAIL = 'leonard1@gmail.com'
+
+
+def _seed(db):
+    # Read the rollups themselves rather than the pre-backfill history scan
+    db.migrations.insert_one({'_id': BACKFILL_MARKER})
+    db.utilities_balance.insert_many([
+        {'user_email': EMAIL, 'utility_type': 'water', 'units': 100, 'recharge_history': []},
+        {'user_email': EMAIL, 'utility_type': 'gas', 'units': 50, 'recharge_history': []},
+    ])
+    db.utility_recharge_tokens.insert_many([
+        {'recharge_token': '1111-1111-1111-1111', 'user_email': EMAIL, 'utility_type': 'water',
+         'units': 10, 'total_amount': 15.0, 'status': 'active', 'created_at': datetime(2025, 1, 1)},
+        {'recharge_token': '2222-2222-2222-2222', 'user_email': EMAIL, 'utility_type': 'water',
+         'units': 5, 'total_amount': 7.5, 'status': 'active', 'created_at': datetime(2025, 1, 1)},
+        {'recharge_token': '3333-3333-3333-3333', 'user_email': EMAIL, 'utility_type': 'gas',
+         'units': 4, 'total_amount': 6.0, 'status': 'used', 'created_at': datetime(2025, 1, 1)},
+        {'recharge_token': '4444-4444-4444-4444', 'user_email': EMAIL, 'utility_type': 'gas',
+         'units': 8, 'total_amount': 12.0, 'status': 'active', 'created_at': datetime(2025, 1, 1)},
+    ])
+
+
+def test_redeem_batch_reports_per_token_status(db):
+    _seed(db)
+    results = TokenRedemptionService.redeem_batch([
+        {'meter_id': 'M1', 'token': '1111-1111-1111-1111'},
+        {'meter_id': 'M2', 'token': '2222-2222-2222-2222', 'utility_type': 'water'},
+        {'meter_id': 'M3', 'token': '1111-1111-1111-1111'},
+        {'meter_id': 'M4', 'token': '3333-3333-3333-3333'},
+        {'meter_id': 'M5', 'token': '9999-9999-9999-9999'},
+        {'meter_id': 'M6', 'token': 'not-a-token'},
+        {'meter_id': 'M7', 'token': '4444-4444-4444-4444', 'utility_type': 'water'},
+        'garbage',
+    ])
+
+    assert [r['status'] for r in results] == [
+        RedemptionStatus.REDEEMED,
+        RedemptionStatus.REDEEMED,
+        RedemptionStatus.DUPLICATE,
+        RedemptionStatus.ALREADY_USED,
+        RedemptionStatus.NOT_FOUND,
+        RedemptionStatus.INVALID_REQUEST,
+        RedemptionStatus.UTILITY_MISMATCH,
+        RedemptionStatus.INVALID_REQUEST,
+    ]
+    assert results[0]['units'] == 10
+
+    water = db.utilities_balance.find_one({'utility_type': 'water'})
+    assert water['units'] == 85
+    assert [h['token'] for h in water['recharge_history']] == ['1111-1111-1111-1111', '2222-2222-2222-2222']
+    assert db.utilities_balance.find_one({'utility_type': 'gas'})['units'] == 50
+
+    redeemed = db.utility_recharge_tokens.find_one({'recharge_token': '1111-1111-1111-1111'})
+    assert redeemed['status'] == 'used'
+    assert redeemed['meter_id'] == 'M1'
+    assert db.utility_recharge_tokens.find_one({'recharge_token': '4444-4444-4444-4444'})['status'] == 'active'
+
+    totals = LedgerRollupService.totals_by_utility(EMAIL)
+    assert totals['water']['units_used'] == 15
+    assert totals['water']['amount_used'] == 22.5
+    assert totals['water']['redemption_count'] == 2
+
+
+def test_redeem_batch_reports_race_lost_tokens(db, monkeypatch):
+    _seed(db)
+    find = db.utility_recharge_tokens.find
+
+    def find_then_lose_race(*args, **kwargs):
+        # Another request redeems the token between our read and our write
+        records = list(find(*args, **kwargs))
+        db.utility_recharge_tokens.update_one({'recharge_token': '2222-2222-2222-2222'}, {'$set': {'status': 'used'}})
+        return records
+
+    monkeypatch.setattr(db.utility_recharge_tokens, 'find', find_then_lose_race, raising=False)
+    results = TokenRedemptionService.redeem_batch([
+        {'meter_id': 'M1', 'token': '1111-1111-1111-1111'},
+        {'meter_id': 'M2', 'token': '2222-2222-2222-2222'},
+    ])
+
+    assert [r['status'] for r in results] == [RedemptionStatus.REDEEMED, RedemptionStatus.RACE_LOST]
+    assert db.utilities_balance.find_one({'utility_type': 'water'})['units'] == 90
+    assert LedgerRollupService.totals_by_utility(EMAIL)['water']['redemption_count'] == 1
+
+
+def test_tokens_without_a_balance_document_are_not_burnt(db):
+    _seed(db)
+    db.utilities_balance.delete_one({'utility_type': 'gas'})
+
+    results = TokenRedemptionService.redeem_batch([
+        {'meter_id': 'M1', 'token': '1111-1111-1111-1111'},
+        {'meter_id': 'M2', 'token': '4444-4444-4444-4444'},
+    ])
+
+    assert [r['status'] for r in results] == [RedemptionStatus.REDEEMED, RedemptionStatus.BALANCE_NOT_FOUND]
+    assert db.utility_recharge_tokens.find_one({'recharge_token': '4444-4444-4444-4444'})['status'] == 'active'
+    assert LedgerRollupService.totals_by_utility(EMAIL)['gas']['units_used'] == 0
+
+
+def test_owner_can_only_redeem_their_own_tokens(db):
+    _seed(db)
+    results = TokenRedemptionService.redeem_batch(
+        [{'meter_id': 'M1', 'token': '1111-1111-1111-1111'}], owner='someone.else@gmail.com'
+    )
+
+    assert results[0]['status'] == RedemptionStatus.NOT_FOUND
+    assert db.utility_recharge_tokens.find_one({'recharge_token': '1111-1111-1111-1111'})['status'] == 'active'
+
+
+def test_balances_created_at_registration_are_redeemed_into(db):
+    _seed(db)
+    # /api/auth/register keys the balance by 'type'
+    db.utilities_balance.insert_one({'user_email': 'new.user@gmail.com', 'type': 'energy', 'units': 0.0})
+    db.utility_recharge_tokens.insert_one({
+        'recharge_token': '5555-5555-5555-5555', 'user_email': 'new.user@gmail.com', 'utility_type': 'energy',
+        'units': 20, 'total_amount': 2.6, 'status': 'active', 'created_at': datetime(2025, 1, 1)
+    })
+
+    results = TokenRedemptionService.redeem_batch([
+        {'meter_id': 'M1', 'token': '1111-1111-1111-1111'},
+        {'meter_id': 'M5', 'token': '5555-5555-5555-5555'},
+    ])
+
+    assert [r['status'] for r in results] == [RedemptionStatus.REDEEMED, RedemptionStatus.REDEEMED]
+    balance = db.utilities_balance.find_one({'user_email': 'new.user@gmail.com'})
+    assert balance['units'] == -20 and balance['recharge_history'][0]['meter_id'] == 'M5'
+    assert db.utilities_balance.count_documents({'user_email': 'new.user@gmail.com'}) == 1
@@ -0,0 +1,68 @@
+# backend/app/tests/test_utility_service.py
+from datetime import datetime, timedelta
+
+from app.services.utility_service import UtilityService
+
+EMAIL = 'leonard1@gmail.com'
+
+
+def _month_starts():
+    now = datetime.utcnow()
+    first_day_of_month = datetime(now.year, now.month, 1)
+    last_month = first_day_of_month - timedelta(days=1)
+    return datetime(last_month.year, last_month.month, 1), first_day_of_month
+
+
+def _token(utility_type, units, amount, status, created_at):
+    return {
+        'user_email': EMAIL,
+        'utility_type': utility_type,
+        'units': units,
+        'total_amount': amount,
+        'status': status,
+        'created_at': created_at,
+    }
+
+
+def test_monthly_utility_data_single_pass(db):
+    first_day_of_last_month, first_day_of_month = _month_starts()
+    db.utility_unit_prices.insert_many([
+        {'utility_type': 'water', 'price_per_unit': 1.5},
+        {'utility_type': 'gas', 'price_per_unit': 2.0},
+    ])
+    db.utilities_balance.insert_many([
+        {'user_email': EMAIL, 'utility_type': 'water', 'units': 10},
+        {'user_email': EMAIL, 'utility_type': 'gas', 'units': 0},
+    ])
+    db.utility_recharge_tokens.insert_many([
+        # Older than last month: ignored
+        _token('water', 100, 150, 'active', first_day_of_last_month - timedelta(days=3)),
+        # Last month: 5 unredeemed units are brought forward
+        _token('water', 5, 7.5, 'active', first_day_of_last_month + timedelta(days=2)),
+        _token('water', 4, 6, 'used', first_day_of_last_month + timedelta(days=3)),
+        # This month
+        _token('water', 10, 15, 'active', first_day_of_month),
+        _token('water', 3, 4.5, 'used', first_day_of_month + timedelta(seconds=1)),
+    ])
+
+    water, gas = UtilityService.get_monthly_utility_data(EMAIL)
+
+    assert water == {
+        'utility_type': 'water',
+        'units_balance_brought_forward': 5,
+        'units_purchased_to_date': 13,
+        'units_used_to_date': 3,
+        'cost_of_units_used_to_date': 4.5,
+        'cost_of_units_purchased_to_date': 19.5,
+        'units_balance_remaining_to_date': 15,
+        'unit_price': 1.5,
+        'total_costs_to_date': 27.0,
+        'total_units_to_date': 18,
+    }
+    assert gas['utility_type'] == 'gas'
+    assert gas['units_purchased_to_date'] == 0
+    assert gas['unit_price'] == 2.0
+
+
+def test_monthly_utility_data_without_balances(db):
+    assert UtilityService.get_monthly_utility_data(EMAIL) == []
@@ -0,0 +1,28 @@
+import logging
+import os
+import sys
+from datetime import datetime
+
+# Run as a script from anywhere: make the backend package importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.utility_service import UtilityService
+
+logger = logging.getLogger(__name__)
+
+# Define utility prices
+utilities = [
+    {"utility_type": "water", "price_per_unit": 1.50, "currency": "USD","unit type": "cubic meters", "last_updated": datetime.utcnow()},
+    {"utility_type": "gas", "price_per_unit": 2.00, "currency": "USD", "unit type": "cubic meters", "last_updated": datetime.utcnow()},
+    {"utility_type": "energy", "price_per_unit": 0.13, "currency": "USD", "unit type": "kWh", "last_updated": datetime.utcnow()},
+]
+
+if __name__ == '__main__':
+    # Upserts the prices and invalidates the unit price cache; running API workers
+    # pick the change up from the change stream (CACHE_CHANGE_STREAM) or their TTL
+    app = create_app()
+    with app.app_context():
+        UtilityService.set_unit_prices(utilities)
+
+    logger.info("Utility prices updated successfully!")
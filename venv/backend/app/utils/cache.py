@@ -0,0 +1,196 @@
+# app/utils/cache.py
+"""In-process read caches for documents that rarely change.
+
+Each TTLCache is a bounded LRU whose entries also expire after `ttl`
+seconds. Services own their caches and invalidate them after their own
+writes; writes from other processes (other Gunicorn workers, standalone
+scripts) are picked up by ChangeStreamInvalidator, which create_app starts
+whenever MongoDB is a replica set (CACHE_CHANGE_STREAM=auto, the default);
+on a standalone server they are only bounded by the TTL, so multi-worker
+deployments should run a (single-node) replica set.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Every cache by name, for stats and bulk clearing
+CACHES: Dict[str, 'TTLCache'] = {}
+
+# collection name -> callbacks taking the changed document (None when unknown)
+_CHANGE_HOOKS: Dict[str, List[Callable[[Optional[Dict]], None]]] = defaultdict(list)
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters.
+
+    Cached values are shared between requests, so callers must treat them
+    as read-only.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = True
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a load that raced a write is not cached
+        self._generation = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        CACHES[name] = self
+
+    @property
+    def generation(self) -> int:
+        """Pass to set() to skip caching a value loaded before an invalidation."""
+        return self._generation
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling loader() and caching its result on a miss."""
+        if not self.enabled:
+            return loader()
+        generation = self.generation
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def configure_caches(enabled: bool = True) -> None:
+    """Turn every cache on or off (disabling also drops what is cached)."""
+    for cache in CACHES.values():
+        cache.enabled = enabled
+        if not enabled:
+            cache.clear()
+
+
+def invalidate_on_change(collection: str, callback: Callable[[Optional[Dict]], None]) -> None:
+    """Register a callback run for every change to `collection` seen on the change stream."""
+    _CHANGE_HOOKS[collection].append(callback)
+
+
+def notify_change(collection: str, document: Optional[Dict]) -> None:
+    for callback in _CHANGE_HOOKS.get(collection, []):
+        try:
+            callback(document)
+        except Exception as e:
+            logger.error(f"Cache invalidation for {collection} failed: {str(e)}")
+
+
+def change_streams_supported(database) -> bool:
+    """Whether the server can open change streams (a replica set member or mongos)."""
+    try:
+        hello = database.client.admin.command('hello')
+    except Exception as e:
+        logger.warning(f"Could not check for change stream support: {str(e)}")
+        return False
+    return bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+
+
+class ChangeStreamInvalidator:
+    """Follow a Mongo change stream and invalidate caches for writes made elsewhere.
+
+    Needs a replica set. Runs as a daemon thread per process; after an error
+    the caches are cleared (changes may have been missed) and the stream is
+    reopened.
+    """
+    RETRY_SECONDS = 5
+
+    def __init__(self, database):
+        self.database = database
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'ChangeStreamInvalidator':
+        self._thread = threading.Thread(target=self._follow, name='cache-invalidator', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _follow(self) -> None:
+        from app.utils.metrics import untracked_thread
+        untracked_thread()  # each getMore waits up to max_await_time_ms by design
+        pipeline = [{'$match': {'ns.coll': {'$in': list(_CHANGE_HOOKS)}}}]
+        while not self._stop.is_set():
+            try:
+                with self.database.watch(pipeline, full_document='updateLookup', max_await_time_ms=1000) as stream:
+                    logger.info(f"Following change stream for {sorted(_CHANGE_HOOKS)}")
+                    while not self._stop.is_set():
+                        event = stream.try_next()
+                        if event is None:
+                            continue
+                        notify_change(event['ns']['coll'], event.get('fullDocument'))
+            except Exception as e:
+                # Anything missed while disconnected is unknown, so start again from empty caches
+                logger.warning(f"Cache change stream interrupted: {str(e)}")
+                for cache in CACHES.values():
+                    cache.clear()
+                self._stop.wait(self.RETRY_SECONDS)
@@ -0,0 +1,94 @@
+# app/utils/db_indexes.py
+"""Index plan for the listing, lookup and summary queries.
+
+ensure_indexes() is idempotent: create_index is a no-op for indexes that
+already exist. It runs from create_app (ENSURE_INDEXES_ON_STARTUP) and from
+the ensure_indexes.py CLI. Startup only ever creates indexes; dropping the
+superseded ones is an explicit `ensure_indexes.py --drop-superseded` step,
+to run once no instance of the previous release still relies on them.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# collection -> [(keys, options)]
+INDEXES: Dict[str, List[Tuple[List[Tuple[str, int]], Dict]]] = {
+    'utility_recharge_tokens': [
+        # (user_email, created_at, _id) for listings and dashboards is owned by UtilityService
+        # Token redemption lookups
+        ([('recharge_token', ASCENDING), ('status', ASCENDING)], {'name': 'recharge_token_status'}),
+    ],
+    'messages': [
+        # Inbox listing
+        ([('recipient', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'recipient_timestamp_id'}),
+        # Sent / outbox listings (and the sender half of the "all" folder)
+        ([('sender', ASCENDING), ('status', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'sender_status_timestamp_id'}),
+        # Unread counts
+        ([('recipient', ASCENDING), ('status', ASCENDING), ('read', ASCENDING)],
+         {'name': 'recipient_status_read'}),
+    ],
+    'wallet_transactions': [
+        ([('user_email', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'user_email_date_id'}),
+    ],
+    'direct_payments': [
+        ([('user_email', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'user_email_date_id'}),
+    ],
+    'users': [
+        ([('email', ASCENDING)], {'name': 'email'}),
+    ],
+    'wallet_balance': [
+        ([('user_email', ASCENDING)], {'name': 'user_email'}),
+    ],
+    'utilities_balance': [
+        ([('user_email', ASCENDING), ('utility_type', ASCENDING)], {'name': 'user_email_utility_type'}),
+    ],
+    'utility_unit_prices': [
+        ([('utility_type', ASCENDING)], {'name': 'utility_type'}),
+    ],
+}
+
+# Indexes made redundant by a wider one in the current plan
+SUPERSEDED_INDEXES: Dict[str, List[str]] = {
+    'utility_recharge_tokens': ['user_email_created_at'],
+}
+
+
+def ensure_indexes(drop_superseded: bool = False) -> List[str]:
+    """Create every index in the plan plus the ones owned by the services; returns the plan's index names."""
+    from app.services.job_queue import JobQueue
+    from app.services.ledger_rollup_service import LedgerRollupService
+    from app.services.utility_service import UtilityService
+
+    created = []
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            created.append(f"{collection}.{mongo.db[collection].create_index(keys, **options)}")
+
+    UtilityService.ensure_indexes()
+    LedgerRollupService.ensure_indexes()
+    JobQueue.ensure_indexes()
+
+    if drop_superseded:
+        for collection, names in SUPERSEDED_INDEXES.items():
+            existing = mongo.db[collection].index_information()
+            for name in names:
+                if name not in existing:
+                    continue
+                try:
+                    mongo.db[collection].drop_index(name)
+                    logger.info(f"Dropped superseded index {collection}.{name}")
+                except OperationFailure:
+                    pass  # another worker dropped it first
+
+    logger.info(f"Ensured {len(created)} indexes")
+    return created
@@ -0,0 +1,41 @@
+# src/utils/decorators.py
+from functools import wraps
+import hmac
+import time
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from app.utils.logger import logger
+
+def timing_decorator(f):
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        start = time.time()
+        result = f(*args, **kwargs)
+        end = time.time()
+        logger.info(f'Route {f.__name__} took: {end-start:.2f} seconds')
+        return result
+    return wrap
+
+def log_request_info():
+    logger.debug(f"Request Method: {request.method}, URL: {request.url}, Data: {request.data}")
+
+
+def meter_or_user_required(f):
+    """Allow a meter gateway sending METER_API_KEY in X-Meter-Key, or a logged-in user.
+
+    g.acting_user is the JWT identity, or None for a meter gateway (which may
+    act for any user).
+    """
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        presented = request.headers.get('X-Meter-Key')
+        if presented is not None:
+            configured = current_app.config.get('METER_API_KEY')
+            if not configured or not hmac.compare_digest(presented.encode(), configured.encode()):
+                return jsonify({'error': 'Invalid meter key'}), 401
+            g.acting_user = None
+        else:
+            verify_jwt_in_request()
+            g.acting_user = get_jwt_identity()
+        return f(*args, **kwargs)
+    return wrap
@@ -0,0 +1,173 @@
+# app/utils/message_encryption.py
+"""Fernet encryption for message bodies with lazily derived, versioned keys.
+
+A key is derived with PBKDF2 the first time its version is used in a
+process and then reused, so importing the app costs nothing. New messages
+are encrypted with MESSAGE_KEY_VERSION; ciphertexts from any version other
+than the original one carry a "<version>:" prefix, so keys can rotate
+(MESSAGE_KEY_VERSION=v2 with MASTER_KEY_V2 / ENCRYPTION_SALT_V2) while older
+messages keep decrypting with their own key.
+
+Decrypted bodies are kept in a bounded in-process cache keyed by message id
+and ciphertext hash; plaintext therefore lives in worker memory for up to
+DECRYPTED_TTL seconds.
+"""
+import base64
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Untagged ciphertexts predate key versioning and use MASTER_KEY / ENCRYPTION_SALT
+LEGACY_KEY_VERSION = 'v1'
+KDF_ITERATIONS = 100000
+
+# Pages with at least this many uncached messages are decrypted on the pool
+PARALLEL_THRESHOLD = 64
+MAX_DECRYPT_WORKERS = min(8, os.cpu_count() or 1)
+DECRYPTED_TTL = 3600
+
+decrypted_cache = TTLCache('decrypted_messages', maxsize=20000, ttl=DECRYPTED_TTL)
+
+
+class MessageEncryption:
+    def __init__(self, current_version: Optional[str] = None):
+        self.current_version = current_version or os.environ.get('MESSAGE_KEY_VERSION', LEGACY_KEY_VERSION)
+        self._ciphers: Dict[str, Fernet] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def _env_suffix(version: str) -> str:
+        return '' if version == LEGACY_KEY_VERSION else f'_{version.upper()}'
+
+    def _key_material(self, version: str) -> Tuple[bytes, str]:
+        """Salt and master key for a version from the environment"""
+        suffix = self._env_suffix(version)
+        stored_salt = os.environ.get(f'ENCRYPTION_SALT{suffix}')
+        stored_key = os.environ.get(f'MASTER_KEY{suffix}')
+        if version != self.current_version and not (stored_salt and stored_key):
+            raise KeyError(f'No key configured for message key version {version}')
+        if not (stored_salt and stored_key):
+            logger.warning(f'MASTER_KEY{suffix}/ENCRYPTION_SALT{suffix} not set; '
+                           f'using a random per-process key for messages')
+        salt = base64.b64decode(stored_salt) if stored_salt else os.urandom(16)
+        master_key = stored_key or base64.b64encode(os.urandom(32)).decode('utf-8')
+        return salt, master_key
+
+    def cipher(self, version: str) -> Fernet:
+        """Fernet for a key version, deriving it on first use"""
+        cipher = self._ciphers.get(version)
+        if cipher is None:
+            with self._lock:
+                cipher = self._ciphers.get(version)
+                if cipher is None:
+                    salt, master_key = self._key_material(version)
+                    kdf = PBKDF2HMAC(
+                        algorithm=hashes.SHA256(),
+                        length=32,
+                        salt=salt,
+                        iterations=KDF_ITERATIONS,
+                    )
+                    cipher = Fernet(base64.urlsafe_b64encode(kdf.derive(master_key.encode())))
+                    self._ciphers[version] = cipher
+        return cipher
+
+    @staticmethod
+    def split_version(encrypted_message: str) -> Tuple[str, str]:
+        # Fernet tokens are urlsafe base64, so they never contain ':'
+        version, separator, token = encrypted_message.partition(':')
+        return (version, token) if separator else (LEGACY_KEY_VERSION, encrypted_message)
+
+    def encrypt_message(self, message: str) -> str:
+        """Encrypt a message"""
+        token = self.cipher(self.current_version).encrypt(message.encode()).decode()
+        if self.current_version == LEGACY_KEY_VERSION:
+            return token
+        return f'{self.current_version}:{token}'
+
+    def decrypt_message(self, encrypted_message: str) -> str:
+        """Decrypt a message"""
+        version, token = self.split_version(encrypted_message)
+        return self.cipher(version).decrypt(token.encode()).decode()
+
+    def _try_decrypt(self, encrypted_message: str) -> Optional[str]:
+        try:
+            return self.decrypt_message(encrypted_message)
+        except (InvalidToken, KeyError, ValueError) as e:
+            logger.warning(f'Message decryption failed: {type(e).__name__}: {e}')
+            return None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=MAX_DECRYPT_WORKERS,
+                                                    thread_name_prefix='message-decrypt')
+        return self._pool
+
+    @staticmethod
+    def cache_key(message: Dict) -> Tuple[str, bytes]:
+        digest = hashlib.blake2b(message['content'].encode(), digest_size=16).digest()
+        return str(message.get('_id')), digest
+
+    def decrypt_messages(self, messages: List[Dict]) -> List[Optional[str]]:
+        """Plaintext of each message's content, in order (None where it cannot be decrypted).
+
+        Cached bodies are reused; the rest are decrypted together, on the
+        thread pool when there are at least PARALLEL_THRESHOLD of them.
+        """
+        results: List[Optional[str]] = [None] * len(messages)
+        pending = []
+        for index, message in enumerate(messages):
+            if not isinstance(message.get('content'), str):
+                continue
+            key = self.cache_key(message)
+            cached = decrypted_cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, key, message['content']))
+
+        if not pending:
+            return results
+
+        contents = [content for _, _, content in pending]
+        if len(pending) >= PARALLEL_THRESHOLD:
+            # Split into one chunk per worker so the pool overhead is paid per chunk, not per message
+            size = -(-len(contents) // MAX_DECRYPT_WORKERS)
+            chunks = [contents[start:start + size] for start in range(0, len(contents), size)]
+            plaintexts = [
+                plaintext
+                for chunk in self._executor().map(lambda part: [self._try_decrypt(c) for c in part], chunks)
+                for plaintext in chunk
+            ]
+        else:
+            plaintexts = [self._try_decrypt(content) for content in contents]
+
+        for (index, key, _), plaintext in zip(pending, plaintexts):
+            results[index] = plaintext
+            if plaintext is not None:
+                decrypted_cache.set(key, plaintext)
+        return results
+
+    def generate_new_keys(self):
+        """Generate new salt and master key - use this to create your initial keys"""
+        new_salt = base64.b64encode(os.urandom(16)).decode('utf-8')
+        new_master_key = base64.b64encode(os.urandom(32)).decode('utf-8')
+
+        print("\nGenerated new encryption keys:")
+        print(f"ENCRYPTION_SALT={new_salt}")
+        print(f"MASTER_KEY={new_master_key}")
+
+        return new_salt, new_master_key
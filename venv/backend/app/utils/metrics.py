@@ -0,0 +1,290 @@
+# app/utils/metrics.py
+"""Request latency and Mongo command metrics, exported in Prometheus text format.
+
+init_metrics(app) hooks every request and returns the CommandListener to
+hand to the Mongo client, so commands are attributed to the request (the
+Flask endpoint) that issued them. Commands from background threads (the job
+worker) are counted by command only. Metrics are per process, like the
+caches: with several Gunicorn workers each one exports its own numbers.
+
+METRICS_SAMPLE_RATE instruments only that fraction of requests (latency,
+status and command counts alike); METRICS_ENABLED=false removes the hooks
+and the listener altogether.
+"""
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Blueprint, Response, current_app, request
+from pymongo import monitoring
+
+from app.utils.cache import cache_stats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMAND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COMMANDS_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Where each command keeps the filter that the slow-query log reports
+_FILTER_FIELDS = {
+    'find': 'filter',
+    'count': 'query',
+    'distinct': 'query',
+    'findAndModify': 'query',
+    'aggregate': 'pipeline',
+}
+_STATEMENT_FIELDS = {'update': 'updates', 'delete': 'deletes'}
+
+_local = threading.local()
+
+
+class Histogram:
+    """Fixed-bucket histogram; callers hold the owning Metrics lock."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    __slots__ = ('commands', 'mongo_seconds')
+
+    def __init__(self):
+        self.commands = 0
+        self.mongo_seconds = 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+            self.request_status: Counter = Counter()
+            self.request_commands: Dict[str, Histogram] = {}
+            self.request_mongo_seconds: Dict[str, float] = defaultdict(float)
+            self.command_latency: Dict[str, Histogram] = {}
+            self.slow_commands: Counter = Counter()
+
+    def observe_request(self, method: str, endpoint: str, status: int, seconds: float,
+                        stats: RequestStats) -> None:
+        with self._lock:
+            latency = self.request_latency.get((method, endpoint))
+            if latency is None:
+                latency = self.request_latency[(method, endpoint)] = Histogram(LATENCY_BUCKETS)
+            latency.observe(seconds)
+            self.request_status[(method, endpoint, str(status))] += 1
+            commands = self.request_commands.get(endpoint)
+            if commands is None:
+                commands = self.request_commands[endpoint] = Histogram(COMMANDS_PER_REQUEST_BUCKETS)
+            commands.observe(stats.commands)
+            self.request_mongo_seconds[endpoint] += stats.mongo_seconds
+
+    def observe_command(self, command_name: str, seconds: float, slow_collection: Optional[str] = None) -> None:
+        with self._lock:
+            latency = self.command_latency.get(command_name)
+            if latency is None:
+                latency = self.command_latency[command_name] = Histogram(COMMAND_BUCKETS)
+            latency.observe(seconds)
+            if slow_collection is not None:
+                self.slow_commands[(command_name, slow_collection)] += 1
+
+    def render(self) -> str:
+        """Everything in Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            _histogram(lines, 'http_request_duration_seconds', 'Request latency by endpoint',
+                       {_labels(method=m, endpoint=e): h for (m, e), h in self.request_latency.items()})
+            _counter(lines, 'http_requests_total', 'Requests by endpoint and status',
+                     {_labels(method=m, endpoint=e, status=s): n for (m, e, s), n in self.request_status.items()})
+            _histogram(lines, 'http_request_mongo_commands', 'Mongo commands sent per request',
+                       {_labels(endpoint=e): h for e, h in self.request_commands.items()})
+            _counter(lines, 'http_request_mongo_seconds_total', 'Time spent in Mongo commands by endpoint',
+                     {_labels(endpoint=e): s for e, s in self.request_mongo_seconds.items()})
+            _histogram(lines, 'mongo_command_duration_seconds', 'Mongo command latency by command',
+                       {_labels(command=c): h for c, h in self.command_latency.items()})
+            _counter(lines, 'mongo_slow_commands_total', 'Mongo commands slower than METRICS_SLOW_QUERY_MS',
+                     {_labels(command=c, collection=coll): n for (c, coll), n in self.slow_commands.items()})
+
+        caches = cache_stats()
+        for field, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+                            ('size', 'gauge')):
+            name = f'cache_{field}_total' if kind == 'counter' else f'cache_{field}'
+            values = {_labels(cache=cache): stats[field] for cache, stats in caches.items()}
+            _series(lines, name, f'In-process cache {field}', kind, values)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+
+
+def _series(lines: List[str], name: str, help_text: str, kind: str, values: Dict[str, Any]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for labels, value in sorted(values.items()):
+        lines.append(f'{name}{{{labels}}} {value}')
+
+
+def _counter(lines: List[str], name: str, help_text: str, values: Dict[str, Any]) -> None:
+    _series(lines, name, help_text, 'counter', values)
+
+
+def _histogram(lines: List[str], name: str, help_text: str, histograms: Dict[str, Histogram]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+
+def query_shape(value: Any) -> Any:
+    """The filter with every value replaced by '?', so it can be logged without user data."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [query_shape(item) for item in value]
+        return ['?'] if value else []
+    return '?'
+
+
+def command_filter(command_name: str, command: Dict) -> Any:
+    field = _FILTER_FIELDS.get(command_name)
+    if field:
+        return command.get(field)
+    statements = command.get(_STATEMENT_FIELDS.get(command_name, ''))
+    if statements:
+        return statements[0].get('q')
+    return None
+
+
+def untracked_thread() -> None:
+    """Leave the calling thread's commands out of the metrics (e.g. a change stream's long getMores)."""
+    _local.skip = True
+
+
+class MongoCommandProfiler(monitoring.CommandListener):
+    """Times every Mongo command, charges it to the current request and logs slow ones."""
+
+    def __init__(self, registry: Metrics = metrics, slow_query_ms: float = 100):
+        self.registry = registry
+        self.slow_seconds = slow_query_ms / 1000.0
+        # request_id -> (command, collection) while the command is in flight
+        self._inflight: Dict[int, Tuple[Dict, Any]] = {}
+
+    def started(self, event):
+        if getattr(_local, 'skip', False):
+            return
+        self._inflight[event.request_id] = (event.command, event.command.get(event.command_name))
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        inflight = self._inflight.pop(event.request_id, None)
+        if inflight is None:
+            return
+        seconds = event.duration_micros / 1e6
+        stats = getattr(_local, 'stats', None)
+        if stats is not None:
+            stats.commands += 1
+            stats.mongo_seconds += seconds
+
+        if seconds < self.slow_seconds:
+            self.registry.observe_command(event.command_name, seconds)
+            return
+        command, collection = inflight
+        collection = str(collection)
+        self.registry.observe_command(event.command_name, seconds, slow_collection=collection)
+        logger.warning(
+            f"Slow Mongo {event.command_name} on {collection}: {seconds * 1000:.1f} ms, "
+            f"filter {query_shape(command_filter(event.command_name, command))}, "
+            f"endpoint {getattr(_local, 'endpoint', None)}"
+        )
+
+
+def _start_request(sample_rate: float):
+    if sample_rate < 1 and random.random() >= sample_rate:
+        _local.skip = True
+        _local.stats = None
+        return
+    _local.skip = False
+    _local.stats = RequestStats()
+    _local.endpoint = request.endpoint or 'unmatched'
+    _local.started = time.perf_counter()
+
+
+def _record(status: int) -> None:
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        return
+    metrics.observe_request(request.method, _local.endpoint, status,
+                            time.perf_counter() - _local.started, stats)
+    _local.stats = None
+
+
+def _finish_request(response):
+    _record(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # after_request does not run for unhandled exceptions
+    if exc is not None:
+        _record(500)
+    _local.stats = None
+    _local.skip = False
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app) -> List[monitoring.CommandListener]:
+    """Register the request hooks and /metrics; returns the listeners for the Mongo client."""
+    if not app.config['METRICS_ENABLED']:
+        return []
+    sample_rate = app.config['METRICS_SAMPLE_RATE']
+    app.before_request(lambda: _start_request(sample_rate))
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    app.register_blueprint(metrics_bp)
+    return [MongoCommandProfiler(metrics, app.config['METRICS_SLOW_QUERY_MS'])]
@@ -0,0 +1,127 @@
+# app/utils/pagination.py
+"""Keyset (seek) pagination with opaque cursors.
+
+Pages are ordered by (sort_field, _id) and each cursor remembers the
+boundary document's values, so fetching page N costs the same index seek
+as page 1 instead of skipping N * limit documents. Cursors are
+base64-encoded extended JSON and are tied to the query they came from.
+"""
+import base64
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from bson import json_util
+from pymongo import ASCENDING, DESCENDING
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False, json_mode=json_util.JSONMode.CANONICAL)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: List[Dict]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+    limit: int
+
+    def pagination(self) -> Dict:
+        return {
+            'per_page': self.limit,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_more': self.next_cursor is not None
+        }
+
+    def headers(self) -> Dict[str, str]:
+        """Cursors as response headers, for endpoints whose body is a bare list."""
+        headers = {}
+        if self.next_cursor:
+            headers['X-Next-Cursor'] = self.next_cursor
+        if self.prev_cursor:
+            headers['X-Prev-Cursor'] = self.prev_cursor
+        return headers
+
+
+def parse_limit(value, default: int = DEFAULT_LIMIT) -> int:
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(payload: Dict) -> str:
+    raw = json_util.dumps(payload, json_options=_JSON_OPTIONS).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Dict:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json_util.loads(raw, json_options=_JSON_OPTIONS)
+    except Exception:
+        raise InvalidCursor('Malformed pagination cursor')
+    if not isinstance(payload, dict) or payload.get('d') not in ('next', 'prev') or '_id' not in payload:
+        raise InvalidCursor('Malformed pagination cursor')
+    return payload
+
+
+def query_scope(query: Dict, sort_field: str, direction: int) -> str:
+    """Short fingerprint of the query so a cursor cannot be replayed against another one."""
+    raw = json_util.dumps([query, sort_field, direction], json_options=_JSON_OPTIONS)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+
+def keyset_query(query: Dict, sort_field: str, direction: int = DESCENDING,
+                 cursor: Optional[str] = None):
+    """Return (filter, sort, backwards) for the page after/before `cursor`."""
+    if not cursor:
+        return query, [(sort_field, direction), ('_id', direction)], False
+
+    state = decode_cursor(cursor)
+    if state.get('s') != query_scope(query, sort_field, direction):
+        raise InvalidCursor('Cursor does not belong to this query')
+
+    backwards = state['d'] == 'prev'
+    order = -direction if backwards else direction
+    op = '$gt' if order == ASCENDING else '$lt'
+    seek = {'$or': [
+        {sort_field: {op: state['v']}},
+        {sort_field: state['v'], '_id': {op: state['_id']}}
+    ]}
+    return {'$and': [query, seek]}, [(sort_field, order), ('_id', order)], backwards
+
+
+def paginate(collection, query: Dict, sort_field: str, direction: int = DESCENDING,
+             limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None,
+             projection: Optional[Dict] = None) -> KeysetPage:
+    """Fetch one page of `query` ordered by (sort_field, _id)."""
+    filter_, sort, backwards = keyset_query(query, sort_field, direction, cursor)
+    docs = list(collection.find(filter_, projection).sort(sort).limit(limit + 1))
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    if backwards:
+        docs.reverse()
+    if not docs:
+        return KeysetPage([], None, None, limit)
+
+    scope = query_scope(query, sort_field, direction)
+
+    def boundary(doc, towards):
+        return encode_cursor({'v': doc.get(sort_field), '_id': doc['_id'], 'd': towards, 's': scope})
+
+    if backwards:
+        # We came back from the following page, so there is always a next one
+        next_cursor = boundary(docs[-1], 'next')
+        prev_cursor = boundary(docs[0], 'prev') if has_more else None
+    else:
+        next_cursor = boundary(docs[-1], 'next') if has_more else None
+        prev_cursor = boundary(docs[0], 'prev') if cursor else None
+    return KeysetPage(docs, next_cursor, prev_cursor, limit)
@@ -0,0 +1,149 @@
+# app/utils/streaming_export.py
+"""Statement exports that never hold the full report in memory.
+
+Each generator consumes an iterator of already formatted rows (typically
+backed by a Mongo cursor) and yields bytes. Only CSV is truly streamed:
+its first chunk goes out before the cursor is read. XLSX and PDF are
+written to a temporary file and yielded once complete, so their memory
+stays flat but nothing is sent until the last row is drawn; the download
+routes therefore hand those formats to the statement_report job
+(app/services/job_handlers.py) and stream CSV only.
+"""
+import csv
+import io
+import tempfile
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from flask import Response, stream_with_context
+from openpyxl import Workbook
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfgen import canvas
+
+CSV_CHUNK_ROWS = 500
+FILE_CHUNK_BYTES = 64 * 1024
+CURSOR_BATCH_SIZE = 1000
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf'
+}
+
+
+def _drain(buffer: io.StringIO) -> bytes:
+    data = buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate(0)
+    return data
+
+
+def _read_file(file_obj) -> Iterator[bytes]:
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(FILE_CHUNK_BYTES)
+        if not chunk:
+            break
+        yield chunk
+
+
+def stream_csv(preamble: Sequence[Sequence], header: Sequence[str],
+               rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Yield the CSV preamble, then the rows in blocks of CSV_CHUNK_ROWS."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line in preamble:
+        writer.writerow(line)
+    writer.writerow(header)
+    yield _drain(buffer)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CSV_CHUNK_ROWS == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def stream_xlsx(preamble: Sequence[Sequence], header: Sequence[str],
+                rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Write a write-only workbook to a temporary file and stream it back.
+
+    openpyxl's write-only mode flushes each row to disk as it is appended,
+    so memory stays flat; the archive can only be sent once it is closed,
+    i.e. the first byte comes after the last row.
+    """
+    wb = Workbook(write_only=True)
+    summary_sheet = wb.create_sheet('Summary')
+    for line in preamble:
+        summary_sheet.append(list(line))
+
+    transactions_sheet = wb.create_sheet('Transactions')
+    transactions_sheet.append(list(header))
+    for row in rows:
+        transactions_sheet.append(list(row))
+
+    with tempfile.TemporaryFile() as output:
+        wb.save(output)
+        yield from _read_file(output)
+
+
+def stream_pdf(title: str, preamble: Sequence[Sequence], header: Sequence[str],
+               rows: Iterable[Sequence], col_widths: Optional[List[float]] = None) -> Iterator[bytes]:
+    """Draw the report page by page with reportlab into a temporary file, then yield it.
+
+    Rows are drawn straight onto the canvas and each finished page is
+    compressed, so memory tracks the size of the PDF rather than the
+    number of row objects; like XLSX, nothing is yielded until the file is complete.
+    """
+    page_width, page_height = landscape(A4)
+    margin = 30
+    line_height = 14
+    font_size = 8
+    col_widths = col_widths or [(page_width - 2 * margin) / len(header)] * len(header)
+
+    def draw_row(pdf, y, values, bold=False):
+        pdf.setFont('Helvetica-Bold' if bold else 'Helvetica', font_size)
+        x = margin
+        for value, width in zip(values, col_widths):
+            text = str(value)
+            max_chars = int(width / (font_size * 0.5))
+            if len(text) > max_chars:
+                text = text[:max_chars - 1] + '…'
+            pdf.drawString(x + 2, y, text)
+            x += width
+
+    with tempfile.TemporaryFile() as output:
+        pdf = canvas.Canvas(output, pagesize=(page_width, page_height), pageCompression=1)
+        pdf.setTitle(title)
+
+        y = page_height - margin
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawString(margin, y, title)
+        y -= line_height * 2
+        pdf.setFont('Helvetica', 10)
+        for line in preamble:
+            pdf.drawString(margin, y, '  '.join(str(value) for value in line))
+            y -= line_height
+        y -= line_height
+
+        draw_row(pdf, y, header, bold=True)
+        y -= line_height
+        for row in rows:
+            if y < margin:
+                pdf.showPage()
+                y = page_height - margin
+                draw_row(pdf, y, header, bold=True)
+                y -= line_height
+            draw_row(pdf, y, row)
+            y -= line_height
+
+        pdf.save()
+        yield from _read_file(output)
+
+
+def streaming_response(chunks: Iterator[bytes], format_type: str, download_name: str) -> Response:
+    """Wrap an export generator in a chunked attachment response."""
+    return Response(
+        stream_with_context(chunks),
+        mimetype=MIMETYPES[format_type],
+        headers={'Content-Disposition': f'attachment; filename={download_name}'}
+    )
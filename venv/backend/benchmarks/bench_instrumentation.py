@@ -0,0 +1,110 @@
+# backend/benchmarks/bench_instrumentation.py
+"""Measure what the request/Mongo instrumentation adds to each request.
+
+Drives a minimal Flask app through its test client with metrics off, on,
+and sampled, and reports the median per-request time of each. Every request
+runs --commands Mongo commands: against a real server with --uri, otherwise
+the command listener callbacks are invoked the way the driver would, around
+a --round-trip-us wait standing in for the server (0 shows the absolute
+cost against an empty handler).
+
+    python benchmarks/bench_instrumentation.py --requests 5000
+    python benchmarks/bench_instrumentation.py --uri mongodb://localhost:27017/token_meter_bench
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from itertools import count
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify
+from pymongo import MongoClient, monitoring
+
+from app.utils.metrics import init_metrics, metrics
+
+_request_ids = count(1)
+ADDRESS = ('localhost', 27017)
+
+
+def build_app(args, enabled, sample_rate):
+    app = Flask(__name__)
+    app.config.update(METRICS_ENABLED=enabled, METRICS_SAMPLE_RATE=sample_rate,
+                      METRICS_SLOW_QUERY_MS=100, METRICS_TOKEN=None)
+    listeners = init_metrics(app)
+
+    if args.uri:
+        client = MongoClient(args.uri, event_listeners=listeners)
+        collection = client.get_default_database().bench_instrumentation
+        collection.replace_one({'_id': 1}, {'_id': 1, 'user_email': 'bench@tokenmeter.com'}, upsert=True)
+
+        def run_commands():
+            for _ in range(args.commands):
+                collection.find_one({'_id': 1})
+    else:
+        command = {'find': 'users', 'filter': {'email': 'bench@tokenmeter.com'}}
+
+        def run_commands():
+            for _ in range(args.commands):
+                request_id = next(_request_ids)
+                for listener in listeners:
+                    listener.started(monitoring.CommandStartedEvent(command, 'bench', request_id, ADDRESS, 1))
+                if args.round_trip_us:
+                    time.sleep(args.round_trip_us / 1e6)
+                for listener in listeners:
+                    listener.succeeded(monitoring.CommandSucceededEvent(
+                        timedelta(microseconds=args.round_trip_us), {'ok': 1}, 'find', request_id, ADDRESS, 1))
+
+    @app.route('/api/dashboard/profile')
+    def profile():
+        run_commands()
+        return jsonify({'email': 'bench@tokenmeter.com', 'balances': [1.0, 2.0, 3.0]})
+
+    return app
+
+
+MODES = (('metrics off', False, 1.0), ('metrics on', True, 1.0), ('metrics sampled 10%', True, 0.1))
+
+
+def measure(args):
+    """Median us/request per mode; modes are interleaved round by round so drift hits them all alike."""
+    clients = [build_app(args, enabled, sample_rate).test_client() for _, enabled, sample_rate in MODES]
+    for client in clients:
+        for _ in range(200):
+            client.get('/api/dashboard/profile')
+    rounds = [[] for _ in MODES]
+    per_round = args.requests // args.rounds
+    for _ in range(args.rounds):
+        for samples, client in zip(rounds, clients):
+            start = time.perf_counter()
+            for _ in range(per_round):
+                client.get('/api/dashboard/profile')
+            samples.append((time.perf_counter() - start) / per_round * 1e6)
+    return [statistics.median(samples) for samples in rounds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default=os.getenv('BENCH_MONGO_URI'))
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--commands', type=int, default=3, help='Mongo commands per request')
+    parser.add_argument('--round-trip-us', type=int, default=300, help='simulated server time per command')
+    args = parser.parse_args()
+
+    baseline, *instrumented = measure(args)
+    print(f"{MODES[0][0]:<22} {baseline:9.1f} us/request")
+    for (label, _, _), took in zip(MODES[1:], instrumented):
+        print(f"{label:<22} {took:9.1f} us/request  "
+              f"(+{took - baseline:.1f} us, {100 * (took - baseline) / baseline:+.1f}%)")
+
+    render_start = time.perf_counter()
+    metrics.render()
+    print(f"render /metrics: {(time.perf_counter() - render_start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
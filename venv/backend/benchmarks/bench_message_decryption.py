@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_message_decryption.py
+"""Compare decrypting a whole 50k-message mailbox with decrypting one page.
+
+Builds an in-memory mailbox of encrypted messages (the Mongo side of the
+listing is covered by the query-plan tests) and times:
+
+  * key derivation, which used to run at import and now on first use
+  * the old GET /api/messages behaviour: decrypt every message
+  * one page, cold and from the decrypted cache
+  * a full page (MAX_LIMIT) decrypted serially and on the thread pool
+
+    python benchmarks/bench_message_decryption.py --messages 50000
+"""
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson import ObjectId
+from app.utils import message_encryption
+from app.utils.cache import cache_stats
+from app.utils.message_encryption import MessageEncryption, decrypted_cache
+from app.utils.pagination import MAX_LIMIT
+
+
+def timed(fn, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def build_mailbox(encryption, count, body_size):
+    body = 'x' * body_size
+    return [{'_id': ObjectId(), 'content': encryption.encrypt_message(f'{i} {body}')} for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50000)
+    parser.add_argument('--page-size', type=int, default=50)  # MESSAGES_PAGE_SIZE
+    parser.add_argument('--body-size', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('MASTER_KEY', base64.b64encode(os.urandom(32)).decode())
+    os.environ.setdefault('ENCRYPTION_SALT', base64.b64encode(os.urandom(16)).decode())
+
+    construct_ms = timed(MessageEncryption)
+    encryption = MessageEncryption()
+    derive_ms = timed(lambda: encryption.cipher(encryption.current_version))
+    print(f"construct: {construct_ms:8.2f} ms   first-use key derivation: {derive_ms:8.2f} ms")
+
+    mailbox = build_mailbox(encryption, args.messages, args.body_size)
+    print(f"mailbox: {len(mailbox)} messages, ~{args.body_size} byte bodies")
+
+    whole_ms = timed(lambda: [encryption.decrypt_message(m['content']) for m in mailbox])
+    print(f"whole mailbox (old listing):  {whole_ms:10.2f} ms")
+
+    page = mailbox[:args.page_size]
+    decrypted_cache.clear()
+    cold_ms = timed(lambda: encryption.decrypt_messages(page))
+    warm_ms = timed(lambda: encryption.decrypt_messages(page), args.repeat)
+    print(f"page of {len(page):<4} cold:            {cold_ms:10.2f} ms")
+    print(f"page of {len(page):<4} cached:          {warm_ms:10.2f} ms")
+
+    full_pages = [mailbox[start:start + MAX_LIMIT] for start in range(0, MAX_LIMIT * args.repeat, MAX_LIMIT)]
+
+    def cold_pages(threshold):
+        message_encryption.PARALLEL_THRESHOLD = threshold
+        samples = []
+        for full_page in full_pages:
+            decrypted_cache.clear()
+            samples.append(timed(lambda: encryption.decrypt_messages(full_page)))
+        return statistics.median(samples)
+
+    serial_ms = cold_pages(MAX_LIMIT + 1)
+    pooled_ms = cold_pages(1)
+    print(f"page of {MAX_LIMIT:<4} serial:          {serial_ms:10.2f} ms")
+    print(f"page of {MAX_LIMIT:<4} pool ({message_encryption.MAX_DECRYPT_WORKERS} workers): {pooled_ms:8.2f} ms")
+
+    print(f"speedup whole mailbox -> cold page: {whole_ms / cold_ms:,.0f}x")
+    print(f"decrypted cache: {cache_stats()['decrypted_messages']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# backend/benchmarks/bench_monthly_utility_data.py
+"""Compare the single-pass monthly aggregation with the old per-utility queries.
+
+Seeds a scratch database on a local mongod with a growing token history and
+times both implementations of UtilityService.get_monthly_utility_data.
+
+    python benchmarks/bench_monthly_utility_data.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from app import mongo
+from app.services.utility_service import UtilityService
+
+EMAIL = 'bench@tokenmeter.com'
+BATCH_SIZE = 10000
+
+
+def legacy_monthly_utility_data(user_email):
+    """The previous implementation: four round trips per utility type."""
+    current_date = datetime.utcnow()
+    first_day_of_month = datetime(current_date.year, current_date.month, 1)
+    last_month = first_day_of_month - timedelta(days=1)
+    first_day_of_last_month = datetime(last_month.year, last_month.month, 1)
+
+    response_data = []
+    for utility in mongo.db.utilities_balance.find({"user_email": user_email}):
+        utility_type = utility.get("utility_type") or utility.get("type")
+        if not utility_type:
+            continue
+        last_month_record = mongo.db.utility_recharge_tokens.find_one({
+            "userEmail": user_email,
+            "utility_type": utility_type,
+            "created_at": {"$gte": first_day_of_last_month, "$lt": first_day_of_month}
+        })
+        brought_forward = last_month_record["units"] if last_month_record else 0
+        purchases = list(mongo.db.utility_recharge_tokens.find({
+            "user_email": user_email,
+            "utility_type": utility_type,
+            "created_at": {"$gte": first_day_of_month}
+        }))
+        used_records = list(mongo.db.utility_recharge_tokens.find({
+            "user_email": user_email,
+            "utility_type": utility_type,
+            "status": {"$ne": "active"},
+            "created_at": {"$gte": first_day_of_month}
+        }))
+        unit_price = UtilityService.get_unit_price(utility_type)
+        purchased = sum(p["units"] for p in purchases)
+        used = sum(u["units"] for u in used_records)
+        response_data.append({
+            "utility_type": utility_type,
+            "units_balance_brought_forward": brought_forward,
+            "units_purchased_to_date": purchased,
+            "units_used_to_date": used,
+            "unit_price": unit_price,
+        })
+    return response_data
+
+
+def seed(size, months=24):
+    """Replace the scratch collections with `size` tokens spread over `months`."""
+    db = mongo.db
+    for name in ('utility_recharge_tokens', 'utilities_balance', 'utility_unit_prices'):
+        db[name].drop()
+
+    prices = {'water': 1.50, 'gas': 2.00, 'energy': 0.13}
+    db.utility_unit_prices.insert_many(
+        [{'utility_type': t, 'price_per_unit': p} for t, p in prices.items()]
+    )
+    db.utilities_balance.insert_many(
+        [{'user_email': EMAIL, 'utility_type': t, 'units': 0} for t in prices]
+    )
+
+    now = datetime.utcnow()
+    batch = []
+    for _ in range(size):
+        utility_type = random.choice(list(prices))
+        units = random.randint(1, 50)
+        batch.append({
+            'user_email': EMAIL,
+            'utility_type': utility_type,
+            'units': units,
+            'total_amount': units * prices[utility_type],
+            'status': random.choice(['active', 'used']),
+            'created_at': now - timedelta(minutes=random.randint(0, months * 30 * 24 * 60)),
+        })
+        if len(batch) == BATCH_SIZE:
+            db.utility_recharge_tokens.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.utility_recharge_tokens.insert_many(batch, ordered=False)
+    UtilityService.ensure_indexes()
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(EMAIL)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default=os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017/token_meter_bench'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.uri
+    mongo.init_app(app)
+
+    print(f"{'tokens':>10} {'legacy (ms)':>12} {'aggregate (ms)':>15} {'speedup':>8}")
+    with app.app_context():
+        for size in args.sizes:
+            seed(size)
+            legacy = time_call(legacy_monthly_utility_data, args.repeat)
+            single_pass = time_call(UtilityService.get_monthly_utility_data, args.repeat)
+            print(f"{size:>10} {legacy * 1000:>12.1f} {single_pass * 1000:>15.1f} {legacy / single_pass:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
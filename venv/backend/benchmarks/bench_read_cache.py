@@ -0,0 +1,123 @@
+# backend/benchmarks/bench_read_cache.py
+"""Count the Mongo round trips the read caches remove from hot request paths.
+
+A pymongo CommandListener counts the commands each operation sends, with the
+caches disabled (every read goes to Mongo) and enabled (steady state, after
+the first request warmed them).
+
+    python benchmarks/bench_read_cache.py --requests 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from pymongo import monitoring
+from app import mongo
+from app.services.user_service import UserService
+from app.services.utility_service import UtilityService
+from app.services.wallet_service import WalletService
+from app.utils.cache import cache_stats, configure_caches
+
+EMAIL = 'bench@tokenmeter.com'
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def purchase_reads():
+    """The reads purchase_utility makes before its transaction."""
+    UtilityService.get_unit_price('water')
+    mongo.db.wallet_balance.find_one({'user_email': EMAIL})  # always fresh: it gates the spend
+
+
+def price_list_reads():
+    """GET /api/utilities/utility_unit_price"""
+    for utility_type in ('water', 'gas', 'energy'):
+        UtilityService.get_unit_price(utility_type)
+
+
+def dashboard_reads():
+    """GET /api/dashboard/profile and GET /api/wallet/balances"""
+    UserService.get_profile(EMAIL)
+    WalletService.get_balance(EMAIL)
+
+
+def message_send_reads():
+    """Recipient lookup in POST /api/messages/messages and GET /api/messages/users"""
+    UserService.get_user(EMAIL)
+    UserService.registered_emails()
+
+
+OPERATIONS = [
+    ('purchase', purchase_reads),
+    ('unit prices', price_list_reads),
+    ('dashboard', dashboard_reads),
+    ('message send', message_send_reads),
+]
+
+
+def seed():
+    db = mongo.db
+    for name in ('utility_unit_prices', 'users', 'wallet_balance'):
+        db[name].drop()
+    UtilityService.set_unit_prices([
+        {'utility_type': 'water', 'price_per_unit': 1.50},
+        {'utility_type': 'gas', 'price_per_unit': 2.00},
+        {'utility_type': 'energy', 'price_per_unit': 0.13},
+    ])
+    db.users.insert_one({'email': EMAIL, 'firstName': 'Bench', 'lastName': 'User'})
+    db.wallet_balance.insert_one({'user_email': EMAIL, 'balance': 100.0})
+
+
+def measure(operation, counter, requests):
+    operation()  # warm up
+    before = counter.count
+    start = time.perf_counter()
+    for _ in range(requests):
+        operation()
+    elapsed = time.perf_counter() - start
+    return (counter.count - before) / requests, elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default=os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017/token_meter_bench'))
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.uri
+    mongo.init_app(app, event_listeners=[counter])
+
+    print(f"{'operation':<14} {'uncached trips':>15} {'cached trips':>13} {'uncached (us)':>14} {'cached (us)':>12}")
+    with app.app_context():
+        seed()
+        for name, operation in OPERATIONS:
+            configure_caches(enabled=False)
+            uncached_trips, uncached_us = measure(operation, counter, args.requests)
+            configure_caches(enabled=True)
+            cached_trips, cached_us = measure(operation, counter, args.requests)
+            print(f"{name:<14} {uncached_trips:>15.2f} {cached_trips:>13.2f} {uncached_us:>14.0f} {cached_us:>12.0f}")
+
+    for name, stats in cache_stats().items():
+        print(f"  {name:<18} hits={stats['hits']} misses={stats['misses']} hit_ratio={stats['hit_ratio']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+# backend/benchmarks/bench_streaming_export.py
+"""Peak RSS and time-to-first-byte of streaming vs in-memory statement exports.
+
+Each measurement runs in a fresh subprocess so ru_maxrss reflects only that
+export. Rows are synthetic token records, so no database is needed.
+
+XLSX and PDF are written to a temporary file and only sent once complete,
+so their time to first byte is their total time; the download routes queue
+those formats as report jobs and stream CSV only.
+
+--history seeds a local mongod with one user's token history of each size
+and exports a one-month statement and the whole history the way the
+routes do: the old list + summary loop + DataFrame path against the CSV
+stream (totals from the ledger rollups, rows from the cursor).
+
+    python benchmarks/bench_streaming_export.py --sizes 10000 100000 1000000
+    python benchmarks/bench_streaming_export.py --history 1000000 5000000 --sizes
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+EMAIL = 'bench@tokenmeter.com'
+HISTORY_START = datetime(2015, 1, 1)
+HISTORY_MINUTES = 10 * 365 * 24 * 60
+SEED_BATCH_SIZE = 10000
+
+COLUMNS = [
+    'Transaction ID', 'Date', 'Utility Type', 'Units', 'Amount',
+    'Payment Method', 'Status', 'Recharge Token'
+]
+
+
+def synthetic_tokens(count, start=datetime(2020, 1, 1), step=timedelta(minutes=1)):
+    for i in range(count):
+        yield {
+            'user_email': EMAIL,
+            'transaction_id': f'{i:024x}',
+            'created_at': start + step * i,
+            'utility_type': ('water', 'gas', 'energy')[i % 3],
+            'units': float(i % 50 + 1),
+            'total_amount': float(i % 50 + 1) * 1.5,
+            'payment_method': 'wallet',
+            'status': 'active' if i % 2 else 'used',
+            'recharge_token': '1234-5678-9012-3456',
+        }
+
+
+def format_row(t):
+    return [
+        t['transaction_id'], t['created_at'].strftime('%Y-%m-%d %H:%M:%S'), t['utility_type'],
+        t['units'], t['total_amount'], t['payment_method'], t['status'], t['recharge_token']
+    ]
+
+
+def legacy_csv(count):
+    """list() + DataFrame + to_csv, as download_transactions does without stream=1."""
+    import pandas as pd
+    from io import BytesIO
+    rows = [dict(zip(COLUMNS, format_row(t))) for t in list(synthetic_tokens(count))]
+    output = BytesIO()
+    pd.DataFrame(rows).to_csv(output, index=False)
+    yield output.getvalue()
+
+
+def legacy_html(count):
+    """Row-by-row += HTML build that precedes the wkhtmltopdf call."""
+    html_content = '<table>'
+    for row in map(format_row, list(synthetic_tokens(count))):
+        html_content += '<tr>' + ''.join(f'<td>{value}</td>' for value in row) + '</tr>'
+    html_content += '</table>'
+    yield html_content.encode('utf-8')
+
+
+def streaming(format_type):
+    from app.utils.streaming_export import stream_csv, stream_xlsx, stream_pdf
+    exporters = {
+        'csv': stream_csv,
+        'xlsx': stream_xlsx,
+        'pdf': lambda preamble, header, rows: stream_pdf('Report', preamble, header, rows),
+    }
+
+    def run(count):
+        rows = map(format_row, synthetic_tokens(count))
+        return exporters[format_type]([['Utility Transactions Report']], COLUMNS, rows)
+    return run
+
+
+def connect(uri):
+    from flask import Flask
+    from app import mongo
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = uri
+    mongo.init_app(app)
+    return app
+
+
+def seed_history(size):
+    """Replace the scratch token history with `size` tokens spread over ten years, plus rollups."""
+    from app import mongo
+    from app.services.ledger_rollup_service import LedgerRollupService
+    from app.utils.db_indexes import ensure_indexes
+
+    mongo.db.utility_recharge_tokens.drop()
+    LedgerRollupService.collection().drop()
+    step = timedelta(minutes=HISTORY_MINUTES / size)
+    batch = []
+    for token in synthetic_tokens(size, HISTORY_START, step):
+        if token['status'] == 'used':
+            token['used_at'] = token['created_at']
+        batch.append(token)
+        if len(batch) == SEED_BATCH_SIZE:
+            mongo.db.utility_recharge_tokens.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        mongo.db.utility_recharge_tokens.insert_many(batch, ordered=False)
+    ensure_indexes()
+    LedgerRollupService.ensure_indexes()
+    LedgerRollupService.backfill()
+
+
+def history_window(window):
+    end = HISTORY_START + timedelta(minutes=HISTORY_MINUTES)
+    return (end - timedelta(days=30) if window == 'month' else HISTORY_START), end
+
+
+def history_legacy_csv(window):
+    """list(cursor) + per-row summary loop + DataFrame, as the synchronous download does."""
+    import pandas as pd
+    from io import BytesIO
+    from app import mongo
+    start, end = history_window(window)
+    tokens = list(mongo.db.utility_recharge_tokens.find(
+        {'user_email': EMAIL, 'created_at': {'$gte': start, '$lte': end}}))
+    summary = {}
+    for t in tokens:
+        totals = summary.setdefault(t['utility_type'], [0, 0, 0])
+        totals[0] += t['units']
+        totals[1] += t['total_amount']
+        totals[2] += 1
+    output = BytesIO()
+    pd.DataFrame([dict(zip(COLUMNS, format_row(t))) for t in tokens]).to_csv(output, index=False)
+    yield output.getvalue()
+
+
+def history_stream(format_type):
+    def run(window):
+        from app import mongo
+        from app.services.ledger_rollup_service import LedgerRollupService
+        from app.utils.streaming_export import CURSOR_BATCH_SIZE, stream_csv, stream_xlsx
+        start, end = history_window(window)
+        summary = LedgerRollupService.period_summary(EMAIL, start, end)
+        preamble = [[utility, data['total_units'], data['total_amount'], data['count']]
+                    for utility, data in summary.items()]
+        cursor = mongo.db.utility_recharge_tokens.find(
+            {'user_email': EMAIL, 'created_at': {'$gte': start, '$lte': end}}
+        ).sort('created_at', 1).batch_size(CURSOR_BATCH_SIZE)
+        exporter = stream_csv if format_type == 'csv' else stream_xlsx
+        return exporter(preamble, COLUMNS, map(format_row, cursor))
+    return run
+
+
+HISTORY_EXPORTS = {
+    'legacy-csv': history_legacy_csv,
+    'stream-csv': history_stream('csv'),
+    'stream-xlsx': history_stream('xlsx'),
+}
+
+
+EXPORTS = {
+    'legacy-csv': legacy_csv,
+    'legacy-html': legacy_html,
+    'stream-csv': streaming('csv'),
+    'stream-xlsx': streaming('xlsx'),
+    'stream-pdf': streaming('pdf'),
+}
+
+
+def measure(export):
+    """Run one export in this process and print a JSON result line."""
+    start = time.perf_counter()
+    first_byte = None
+    total = 0
+    for chunk in export():
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        total += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'ttfb': first_byte, 'elapsed': elapsed, 'peak_mb': peak_kb / 1024, 'bytes': total}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 100000, 1000000])
+    parser.add_argument('--exports', nargs='+', default=list(EXPORTS), choices=list(EXPORTS))
+    parser.add_argument('--history', type=int, nargs='*', default=[],
+                        help='token history sizes to seed on --uri and export from')
+    parser.add_argument('--uri', default=os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017/token_meter_bench'))
+    parser.add_argument('--child', nargs=2, metavar=('EXPORT', 'ROWS'), help=argparse.SUPPRESS)
+    parser.add_argument('--child-history', nargs=2, metavar=('EXPORT', 'WINDOW'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(lambda: EXPORTS[args.child[0]](int(args.child[1])))
+        return
+    if args.child_history:
+        with connect(args.uri).app_context():
+            measure(lambda: HISTORY_EXPORTS[args.child_history[0]](args.child_history[1]))
+        return
+
+    def run_child(*child_args):
+        output = subprocess.run(
+            [sys.executable, __file__, '--uri', args.uri, *child_args],
+            check=True, capture_output=True, text=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def report(label, rows, result):
+        print(f"{label:<12} {rows:>9} {result['ttfb'] * 1000:>10.1f} {result['elapsed']:>10.2f} "
+              f"{result['peak_mb']:>14.1f} {result['bytes'] / 2**20:>12.1f}")
+
+    header = f"{'rows':>9} {'ttfb (ms)':>10} {'total (s)':>10} {'peak RSS (MB)':>14} {'output (MB)':>12}"
+    if args.sizes:
+        print(f"{'export':<12} {header}")
+    for size in args.sizes:
+        for name in args.exports:
+            report(name, size, run_child('--child', name, str(size)))
+
+    if args.history:
+        app = connect(args.uri)
+        print(f"\n{'history':>9} {'window':<6} {'export':<12} {header}")
+    for size in args.history:
+        with app.app_context():
+            seed_history(size)
+        for window in ('month', 'all'):
+            rows = int(size * 30 * 24 * 60 / HISTORY_MINUTES) if window == 'month' else size
+            for name in HISTORY_EXPORTS:
+                print(f"{size:>9} {window:<6} ", end='')
+                report(name, rows, run_child('--child-history', name, window))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+# backend/benchmarks/load_redeem_tokens.py
+"""Measure token redemptions/sec: per-token round trips vs the batch endpoint.
+
+Seeds a scratch database on a local mongod (transactions need a replica set,
+e.g. `mongod --replSet rs0` followed by `rs.initiate()`) with active tokens
+spread over many users, then redeems all of them in one of three modes:
+
+    single  the legacy flow, reproduced in-process: find the token, update the
+            balance, then mark the token used (three round trips per token)
+    batch   TokenRedemptionService.redeem_batch in-process, --batch-size at a time
+    http    MeterTokenHandler.redeem_tokens against a running backend, with
+            --concurrency concentrators uploading in parallel; export the
+            backend's METER_API_KEY so the handler can authenticate
+
+    python benchmarks/load_redeem_tokens.py --mode batch --tokens 50000 --batch-size 500
+    python benchmarks/load_redeem_tokens.py --mode http --backend http://localhost:5000 --concurrency 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from app import mongo
+from app.services.redemption_service import TokenRedemptionService
+
+UTILITY_TYPES = ['water', 'energy', 'gas']
+INSERT_BATCH_SIZE = 10000
+
+
+def seed(count, users):
+    """Replace the scratch collections with `count` active tokens; returns redemption requests."""
+    db = mongo.db
+    for name in ('utility_recharge_tokens', 'utilities_balance', 'utility_ledger_rollups'):
+        db[name].drop()
+
+    emails = [f'bench{index}@tokenmeter.com' for index in range(users)]
+    db.utilities_balance.insert_many([
+        {'user_email': email, 'utility_type': utility_type, 'units': 10 ** 9, 'recharge_history': []}
+        for email in emails for utility_type in UTILITY_TYPES
+    ])
+    db.utility_recharge_tokens.create_index('recharge_token', unique=True)
+
+    redemptions, batch = [], []
+    for index in range(count):
+        token = f'{index:016d}'
+        token = '-'.join(token[i:i + 4] for i in range(0, 16, 4))
+        units = random.randint(1, 50)
+        batch.append({
+            'recharge_token': token,
+            'user_email': random.choice(emails),
+            'utility_type': random.choice(UTILITY_TYPES),
+            'units': units,
+            'total_amount': units * 1.5,
+            'status': 'active',
+            'created_at': datetime.utcnow()
+        })
+        redemptions.append({'meter_id': f'MTR{index % 5000:05d}', 'token': token})
+        if len(batch) == INSERT_BATCH_SIZE:
+            db.utility_recharge_tokens.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.utility_recharge_tokens.insert_many(batch, ordered=False)
+
+    random.shuffle(redemptions)
+    return redemptions
+
+
+def redeem_single(redemptions):
+    """The pre-batch flow: lookup, balance update and status update per token."""
+    statuses = Counter()
+    for redemption in redemptions:
+        record = mongo.db.utility_recharge_tokens.find_one({'recharge_token': redemption['token']})
+        if not record or record['status'] != 'active':
+            statuses['already_used'] += 1
+            continue
+        mongo.db.utilities_balance.update_one(
+            {'user_email': record['user_email'], 'utility_type': record['utility_type']},
+            {
+                '$inc': {'units': -record['units']},
+                '$push': {'recharge_history': {'token': record['recharge_token'], 'units': record['units'],
+                                               'timestamp': datetime.utcnow()}},
+                '$set': {'last_updated': datetime.utcnow()}
+            }
+        )
+        mongo.db.utility_recharge_tokens.update_one(
+            {'_id': record['_id']},
+            {'$set': {'status': 'used', 'used_at': datetime.utcnow(), 'meter_id': redemption['meter_id']}}
+        )
+        statuses['redeemed'] += 1
+    return statuses
+
+
+def chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def redeem_batches(redemptions, batch_size):
+    statuses = Counter()
+    for chunk in chunks(redemptions, batch_size):
+        statuses.update(result['status'] for result in TokenRedemptionService.redeem_batch(chunk))
+    return statuses
+
+
+def redeem_http(redemptions, batch_size, concurrency, backend, mongo_uri):
+    from app.meter_simulator.meter_simulator_token_handler import MeterTokenHandler
+
+    def upload(chunk):
+        handler = MeterTokenHandler(mongo_uri=mongo_uri, backend_url=backend)
+        handler.REDEEM_BATCH_SIZE = batch_size
+        return Counter(result['status'] for result in handler.redeem_tokens(chunk))
+
+    # One slice per concentrator, each uploaded in batch_size requests
+    slices = chunks(redemptions, -(-len(redemptions) // concurrency))
+    statuses = Counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for counts in pool.map(upload, slices):
+            statuses.update(counts)
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default=os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017/token_meter_bench?replicaSet=rs0'))
+    parser.add_argument('--mode', choices=['single', 'batch', 'http'], default='batch')
+    parser.add_argument('--tokens', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--backend', default='http://localhost:5000')
+    parser.add_argument('--duplicates', type=float, default=0.0,
+                        help='fraction of uploads replayed to exercise the already-used path')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.uri
+    mongo.init_app(app)
+
+    with app.app_context():
+        redemptions = seed(args.tokens, args.users)
+        replayed = random.sample(redemptions, int(len(redemptions) * args.duplicates))
+        redemptions = redemptions + replayed
+
+        start = time.perf_counter()
+        if args.mode == 'single':
+            statuses = redeem_single(redemptions)
+        elif args.mode == 'batch':
+            statuses = redeem_batches(redemptions, args.batch_size)
+        else:
+            statuses = redeem_http(redemptions, args.batch_size, args.concurrency, args.backend, args.uri)
+        elapsed = time.perf_counter() - start
+
+    print(f"mode={args.mode} tokens={len(redemptions)} elapsed={elapsed:.2f}s "
+          f"rate={len(redemptions) / elapsed:,.0f} redemptions/sec")
+    for status, count in sorted(statuses.items()):
+        print(f"  {status:<20} {count}")
+
+
+if __name__ == '__main__':
+    main()
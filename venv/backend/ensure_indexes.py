@@ -0,0 +1,36 @@
+# backend/ensure_indexes.py
+"""Create the indexes the listing, lookup and summary queries rely on.
+
+    python ensure_indexes.py                     # create missing indexes
+    python ensure_indexes.py --drop-superseded   # ...and drop the ones they replace
+
+Safe to re-run; the same bootstrap (without dropping anything) runs at
+startup unless ENSURE_INDEXES_ON_STARTUP=false. Only pass --drop-superseded
+once every instance runs the current release, since older ones may still
+depend on the superseded indexes.
+"""
+import argparse
+import sys
+
+from app import create_app
+from app.utils.db_indexes import ensure_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create the MongoDB indexes used by the API')
+    parser.add_argument('--drop-superseded', action='store_true',
+                        help='also drop indexes replaced by wider ones (after the rollout)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        names = ensure_indexes(drop_superseded=args.drop_superseded)
+
+    for name in names:
+        print(name)
+    print(f"{len(names)} index(es) ensured")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,7 @@
+# backend/generate_keys.py
+from app.utils.message_encryption import MessageEncryption
+
+
+if __name__ == "__main__":
+    encryption = MessageEncryption()
+    encryption.generate_new_keys()
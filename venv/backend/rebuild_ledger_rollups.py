@@ -0,0 +1,43 @@
+# backend/rebuild_ledger_rollups.py
+"""Recompute utility_ledger_rollups from token history and report drift.
+
+A full rebuild (no --user, no --verify) also marks the rollups as backfilled,
+which is what the rebuild_ledger_rollups job queued by create_app does on a
+database that predates them; until then summaries are scanned from history.
+
+    python rebuild_ledger_rollups.py              # rewrite drifted rollups
+    python rebuild_ledger_rollups.py --verify     # report only, exit 1 on drift
+    python rebuild_ledger_rollups.py --user someone@example.com
+"""
+import argparse
+import sys
+
+from app import create_app
+from app.services.ledger_rollup_service import LedgerRollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild or verify the monthly utility ledger rollups')
+    parser.add_argument('--verify', action='store_true', help='only report drift, do not rewrite rollups')
+    parser.add_argument('--user', help='limit the rebuild to a single user email')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        LedgerRollupService.ensure_indexes()
+        if args.user or args.verify:
+            drift = LedgerRollupService.rebuild(user_email=args.user, apply=not args.verify)
+        else:
+            drift = LedgerRollupService.backfill()
+
+    for entry in drift:
+        print(f"{entry['user_email']} {entry['utility_type']} {entry['month']}: "
+              f"stored={entry['stored']} expected={entry['expected']}")
+
+    action = 'found' if args.verify else 'repaired'
+    print(f"{len(drift)} drifted rollup(s) {action}")
+    return 1 if args.verify and drift else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# backend/run_fleet_simulator.py
+"""Headless fleet simulator for capacity testing the balance and redemption paths.
+
+    python run_fleet_simulator.py --seed-db --meters 100000 --users 20000 --ticks 20 --seed 7
+    METER_API_KEY=... python run_fleet_simulator.py --seed-db --redeem --backend http://localhost:5000
+
+Without --redeem it runs against a scratch database (token_meter_fleet by
+default). With --redeem the backend redeems against its own MONGO_URI
+database, so the fleet is seeded there instead: --mongo-uri/--db-name
+default to MONGO_URI, and the backend must have the same METER_API_KEY.
+Only fleet users (fleet*@tokenmeter.com) and meters (FLT*) are reset.
+The same --seed reproduces the same meters, consumption draws and tokens.
+"""
+import argparse
+import logging
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import uri_parser
+
+from app.config import Config
+from app.meter_simulator.fleet_simulator import FleetConfig, FleetSimulator
+
+
+def main():
+    defaults = FleetConfig()
+    parser = argparse.ArgumentParser(description='Simulate meter consumption for a whole fleet')
+    parser.add_argument('--meters', type=int, default=defaults.meters)
+    parser.add_argument('--users', type=int, default=defaults.users)
+    parser.add_argument('--ticks', type=int, default=defaults.ticks)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--batch-size', type=int, default=defaults.batch_size)
+    parser.add_argument('--initial-units', type=float, default=defaults.initial_units)
+    parser.add_argument('--low-balance', type=float, default=defaults.low_balance)
+    parser.add_argument('--mongo-uri', help=f'default {defaults.mongo_uri}, or MONGO_URI with --redeem')
+    parser.add_argument('--db-name', help=f'default {defaults.db_name}, or the MONGO_URI database with --redeem')
+    parser.add_argument('--seed-db', action='store_true', help='reset fleet meters and balances and create active tokens first')
+    parser.add_argument('--tokens-per-user', type=int, default=2)
+    parser.add_argument('--redeem', action='store_true', help='redeem tokens for low meters through the API')
+    parser.add_argument('--backend', default=defaults.backend_url)
+    parser.add_argument('--realtime', action='store_true', help='sleep so each tick lasts --tick-seconds')
+    parser.add_argument('--tick-seconds', type=float, default=defaults.tick_seconds)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.redeem:
+        # Tokens must be seeded where the backend will look them up
+        mongo_uri = args.mongo_uri or Config.MONGO_URI
+        db_name = args.db_name or uri_parser.parse_uri(Config.MONGO_URI)['database']
+    else:
+        mongo_uri = args.mongo_uri or defaults.mongo_uri
+        db_name = args.db_name or defaults.db_name
+
+    config = FleetConfig(
+        meters=args.meters, users=args.users, ticks=args.ticks, seed=args.seed,
+        batch_size=args.batch_size, initial_units=args.initial_units, low_balance=args.low_balance,
+        redeem=args.redeem, backend_url=args.backend, mongo_uri=mongo_uri, db_name=db_name,
+        realtime=args.realtime, tick_seconds=args.tick_seconds
+    )
+
+    token_handler = None
+    if args.redeem:
+        from app.meter_simulator.meter_simulator_token_handler import MeterTokenHandler
+        token_handler = MeterTokenHandler(mongo_uri=mongo_uri, backend_url=args.backend)
+
+    simulator = FleetSimulator(config, token_handler=token_handler)
+    if args.seed_db:
+        simulator.seed_database(tokens_per_user=args.tokens_per_user)
+    print(simulator.run().render())
+
+
+if __name__ == '__main__':
+    main()
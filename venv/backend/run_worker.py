@@ -0,0 +1,57 @@
+# backend/run_worker.py
+"""Background job worker: token emails, statement reports and the ledger rollup backfill.
+
+    python run_worker.py                          # one process, 4 threads
+    python run_worker.py --processes 2 --threads 8
+
+Mail goes to Config.MAIL_SERVER/MAIL_PORT (localhost:1025 by default), so a
+local SMTP stand-in such as `python -m aiosmtpd -n -l localhost:1025` is
+enough for development.
+
+Report files and their job rows are deleted REPORT_TTL after the report was
+built: at startup and then every minute, next to the stale-job recovery.
+"""
+import argparse
+import multiprocessing
+
+from app import create_app
+from app.services.job_queue import JobQueue
+from app.services.job_worker import JobWorker
+
+
+def run_process(threads, poll_interval):
+    # Each process builds its own app so the Mongo client is created after the fork
+    app = create_app()
+    with app.app_context():
+        JobQueue.ensure_indexes()
+        JobWorker.purge_expired_reports()
+    JobWorker(app, threads=threads, poll_interval=poll_interval).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the background job worker')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        run_process(args.threads, args.poll_interval)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_process, args=(args.threads, args.poll_interval))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()